@@ -3,11 +3,13 @@
 block_cipher = None
 
 
-a = Analysis(['engine\\api.py'],
-             pathex=[],
+a = Analysis(['engine\\server.py'],
+             pathex=['.'],
              binaries=[],
              datas=[('src\\media\\icon\\app.ico','.')],
-             hiddenimports=["uvicorn.logging",
+             # Workers import the app by name, engine.server does not import it then.
+             hiddenimports=["engine.api",
+                            "uvicorn.logging",
                             "uvicorn.lifespan.off",
                             "uvicorn.lifespan.on",
                             "uvicorn.lifespan",
@@ -0,0 +1,100 @@
+"""
+Memory allocated per authenticated request.
+
+Measures the tracemalloc peak of each request to ``engine.api.app``.
+With ``--per-request-container`` the app-scoped ``AuthContainer`` is rebuilt
+for every request, as the dependency graph used to do, to show the savings.
+
+    python -m benchmarks.bench_allocations --requests 500
+    python -m benchmarks.bench_allocations --requests 500 --per-request-container
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import tracemalloc
+from typing import AsyncIterator
+
+import httpx
+
+from benchmarks.bench_auth_path import ADMIN_USERNAME, ADMIN_PASSWORD
+
+ENDPOINTS = ("/roles/my_role", "/roles", "/users")
+
+
+async def run(args: argparse.Namespace) -> None:
+    from engine import db_preset
+    from engine.api import app
+    from engine.auth.container import AuthContainer
+    from engine.auth.depends import get_auth_container
+
+    await db_preset.main()
+
+    if args.per_request_container:
+
+        async def build_container() -> AsyncIterator[AuthContainer]:
+            container = AuthContainer.from_config()
+            try:
+                yield container
+            finally:
+                # Each one has its own hash executor, do not leak its threads.
+                container.shutdown()
+
+        app.dependency_overrides[get_auth_container] = build_container
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            login = await client.post(
+                "/login", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+            )
+            login.raise_for_status()
+            headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+            print(f"{'endpoint':<16}{'peak KiB':>10}{'retained B':>12}")
+            for endpoint in args.endpoints:
+                for _ in range(args.warmup):
+                    await client.get(endpoint, headers=headers)
+
+                peaks = []
+                tracemalloc.start()
+                start, _ = tracemalloc.get_traced_memory()
+                for _ in range(args.requests):
+                    before, _ = tracemalloc.get_traced_memory()
+                    tracemalloc.reset_peak()
+                    response = await client.get(endpoint, headers=headers)
+                    _, peak = tracemalloc.get_traced_memory()
+                    peaks.append(peak - before)
+                    response.raise_for_status()
+                end, _ = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+                print(
+                    f"{endpoint:<16}{statistics.median(peaks) / 1024:10.1f}"
+                    f"{(end - start) / args.requests:12.0f}"
+                )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--per-request-container", action="store_true")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Must be set before engine.db creates its engine.
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp_dir}/bench.db"
+        # Every benchmark request logs in from one address as one user.
+        os.environ.setdefault("LOGIN_RATE_LIMIT_IP", str(2**31))
+        os.environ.setdefault("LOGIN_RATE_LIMIT_USERNAME", str(2**31))
+        asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,177 @@
+"""
+Throughput and latency of the auth request path.
+
+Runs ``engine.api.app`` in-process against a temporary SQLite database
+seeded by ``engine.db_preset`` and writes the results to a JSON file.
+
+    python -m benchmarks.bench_auth_path --concurrency 16 --requests 500
+    python -m benchmarks.bench_auth_path --baseline bench_results.json --output new.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Optional
+
+import httpx
+
+ADMIN_USERNAME = "ondrei"
+ADMIN_PASSWORD = "a1024lagno"
+ENDPOINTS = ("/login", "/roles", "/roles/my_role", "/users", "/generate_user")
+
+Request = Callable[[httpx.AsyncClient], Awaitable[httpx.Response]]
+
+
+def build_requests(token: str) -> dict[str, Request]:
+    headers = {"Authorization": f"Bearer {token}"}
+
+    return {
+        "/login": lambda client: client.post(
+            "/login", data={"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+        ),
+        "/roles": lambda client: client.get("/roles", headers=headers),
+        "/roles/my_role": lambda client: client.get("/roles/my_role", headers=headers),
+        "/users": lambda client: client.get("/users", headers=headers),
+        "/generate_user": lambda client: client.post(
+            "/generate_user", json={"role_id": 2}, headers=headers
+        ),
+    }
+
+
+async def run_endpoint(
+    client: httpx.AsyncClient, request: Request, total: int, concurrency: int
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors = 0
+    remaining = iter(range(total))
+
+    async def worker() -> None:
+        nonlocal errors
+        for _ in remaining:
+            start = time.perf_counter()
+            response = await request(client)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": total,
+        "errors": errors,
+        "throughput_rps": total / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+    }
+
+
+async def seed_users(count: int) -> None:
+    from engine.auth.repos import RoleRepository, UserRepository
+    from engine.auth.schemas.schemes import UserGenerateMany
+    from engine.auth.services.user_manager import UserManager
+    from engine.db import async_session_maker
+    from engine.utils import PasswordHelper
+
+    async with async_session_maker() as session:
+        manager = UserManager(
+            UserRepository(session), RoleRepository(session), PasswordHelper()
+        )
+        while count > 0:
+            batch = min(count, 1000)
+            await manager.generate_users(UserGenerateMany(role_id=3, count=batch))
+            count -= batch
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    from engine import db_preset
+    from engine.api import app
+
+    await db_preset.main()
+    await seed_users(args.users)
+
+    results = {}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://bench"
+        ) as client:
+            login = await build_requests("")["/login"](client)
+            login.raise_for_status()
+            requests = build_requests(login.json()["access_token"])
+
+            for endpoint in args.endpoints:
+                await run_endpoint(client, requests[endpoint], args.warmup, 1)
+                results[endpoint] = await run_endpoint(
+                    client, requests[endpoint], args.requests, args.concurrency
+                )
+
+    return results
+
+
+def compare(results: dict[str, Any], baseline: dict[str, Any]) -> None:
+    previous = baseline.get("results", {})
+    print(f"{'endpoint':<16}{'rps':>18}{'p50 ms':>18}{'p99 ms':>18}")
+    for endpoint, result in results.items():
+        cells = []
+        for key in ("throughput_rps", "p50_ms", "p99_ms"):
+            cell = f"{result[key]:.1f}"
+            if endpoint in previous:
+                cell += f" ({(result[key] / previous[endpoint][key] - 1) * 100:+.0f}%)"
+            cells.append(f"{cell:>18}")
+        print(f"{endpoint:<16}{''.join(cells)}")
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--requests", type=int, default=200, help="per endpoint")
+    parser.add_argument("--warmup", type=int, default=5, help="per endpoint")
+    parser.add_argument("--users", type=int, default=100, help="extra seeded users")
+    parser.add_argument("--endpoints", nargs="+", choices=ENDPOINTS, default=ENDPOINTS)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="previous results file to compare with")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Must be set before engine.db creates its engine.
+        os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{tmp_dir}/bench.db"
+        # Every benchmark request logs in from one address as one user.
+        os.environ.setdefault("LOGIN_RATE_LIMIT_IP", str(2**31))
+        os.environ.setdefault("LOGIN_RATE_LIMIT_USERNAME", str(2**31))
+        results = asyncio.run(run(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "users": args.users,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as file:
+        json.dump(report, file, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+    compare(results, baseline)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Time from spawning the backend to its first ``/ready`` response.
+
+The first run starts on an empty database, the following ones on the
+database it created, which is what every later app launch sees.
+
+    python -m benchmarks.bench_cold_start --runs 5
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+def wait_ready(url: str, process: subprocess.Popen, timeout: float) -> dict:
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Backend exited with code {process.returncode}.")
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                return json.load(response)
+        except (urllib.error.URLError, ConnectionError):
+            time.sleep(0.005)
+
+    raise TimeoutError(f"{url} did not answer in {timeout}s.")
+
+
+def start_once(
+    port: int, path: str, env: dict[str, str], timeout: float
+) -> tuple[float, dict]:
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "engine.server", "--port", str(port)],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        body = wait_ready(f"http://127.0.0.1:{port}{path}", process, timeout)
+        return time.perf_counter() - start, body
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def startup_marks(body) -> str:
+    return str(body.get("startup", "")) if isinstance(body, dict) else ""
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=7799)
+    parser.add_argument("--timeout", type=float, default=30)
+    parser.add_argument("--path", default="/ready", help="e.g. /hello/x for old builds")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite+aiosqlite:///{tmp_dir}/bench.db",
+            "PYTHONPATH": os.pathsep.join(
+                filter(None, [os.getcwd(), os.getenv("PYTHONPATH")])
+            ),
+        }
+        first, body = start_once(args.port, args.path, env, args.timeout)
+        print(f"first launch  {first * 1000:8.1f} ms  {startup_marks(body)}")
+
+        restarts = []
+        for _ in range(args.runs):
+            seconds, body = start_once(args.port, args.path, env, args.timeout)
+            restarts.append(seconds)
+        print(
+            f"restart       {statistics.median(restarts) * 1000:8.1f} ms"
+            f"  (median of {args.runs})  {startup_marks(body)}"
+        )
+
+
+if __name__ == "__main__":
+    main()
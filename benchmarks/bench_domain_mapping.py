@@ -0,0 +1,57 @@
+"""
+Per-row cost of building ``User`` domain objects from ORM rows.
+
+Compares ``model_validate(from_attributes=True)`` with the trusted
+``DomainMapper`` path used by the repositories.
+
+    python -m benchmarks.bench_domain_mapping --rows 10000
+"""
+
+import argparse
+import timeit
+
+from engine.auth.domain import User
+from engine.auth.models import UserORMModel, RoleORMModel
+from engine.base import DomainMapper
+
+
+def make_rows(count: int, roles: int) -> list[UserORMModel]:
+    role_objs = [RoleORMModel(id=i, name=f"role-{i}") for i in range(roles)]
+    return [
+        UserORMModel(
+            id=i,
+            username=f"user-{i}",
+            hashed_password="$argon2id$v=19$m=65536,t=3,p=4$salt$hash",
+            role_id=i % roles,
+            token_version=0,
+            role=role_objs[i % roles],
+        )
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--roles", type=int, default=3)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    rows = make_rows(args.rows, args.roles)
+    mapper = DomainMapper(User)
+
+    def validate() -> list[User]:
+        return [User.model_validate(row) for row in rows]
+
+    def construct() -> list[User]:
+        return mapper.map_many(rows)
+
+    assert validate() == construct()
+
+    for name, func in (("model_validate", validate), ("DomainMapper", construct)):
+        best = min(timeit.repeat(func, number=1, repeat=args.repeat))
+        print(f"{name:>15}: {best / args.rows * 1e6:8.2f} us/row")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Per-token cost of signing and verifying access tokens.
+
+Compares HS256 with RS256, ES256 and EdDSA, and verification with raw key
+material (parsed on every call) with the pre-parsed keys of a ``KeySet``.
+Needs ``pyjwt[crypto]``.
+
+    python -m benchmarks.bench_jwt --number 2000
+"""
+
+import argparse
+import secrets
+import timeit
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed25519, rsa
+
+from engine.auth.keys import JWTKey, KeySet
+from engine.utils import generate_jwt, decode_jwt
+
+AUDIENCE = ["cam:auth"]
+CLAIMS = {"sub": "1", "aud": AUDIENCE, "role_id": 1, "role_name": "admin", "ver": 0}
+
+
+def private_pem(key) -> bytes:
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+
+
+def public_pem(key) -> bytes:
+    return key.public_key().public_bytes(
+        serialization.Encoding.PEM,
+        serialization.PublicFormat.SubjectPublicKeyInfo,
+    )
+
+
+def make_keys() -> dict[str, tuple[bytes, bytes]]:
+    """Algorithm -> (signing material, verifying material)."""
+    secret = secrets.token_bytes(32)
+    asymmetric = {
+        "RS256": rsa.generate_private_key(public_exponent=65537, key_size=2048),
+        "ES256": ec.generate_private_key(ec.SECP256R1()),
+        "EdDSA": ed25519.Ed25519PrivateKey.generate(),
+    }
+    return {
+        "HS256": (secret, secret),
+        **{alg: (private_pem(key), public_pem(key)) for alg, key in asymmetric.items()},
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    def best_us(func) -> float:
+        timings = timeit.repeat(func, number=args.number, repeat=args.repeat)
+        return min(timings) / args.number * 1e6
+
+    print(
+        f"{'alg':>6} {'sign':>10} {'verify raw':>12} {'verify keyset':>14}  (us/token)"
+    )
+    for algorithm, (signing, verifying) in make_keys().items():
+        key = JWTKey(algorithm, private_key=signing, kid="bench")
+        keys = KeySet([key])
+        token = generate_jwt(CLAIMS, key.signing_key, algorithm, headers=key.headers)
+
+        def sign() -> str:
+            return generate_jwt(CLAIMS, key.signing_key, algorithm, headers=key.headers)
+
+        def verify_raw() -> dict:
+            return decode_jwt(token, verifying, AUDIENCE, [algorithm])
+
+        def verify_prepared() -> dict:
+            token_key = keys.for_token(token)
+            return decode_jwt(
+                token, token_key.verifying_key, AUDIENCE, [token_key.algorithm]
+            )
+
+        assert verify_raw() == verify_prepared()
+        print(
+            f"{algorithm:>6} {best_us(sign):10.1f}"
+            f" {best_us(verify_raw):12.1f} {best_us(verify_prepared):14.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
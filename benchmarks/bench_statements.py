@@ -0,0 +1,103 @@
+"""
+Per-call cost of repository lookups with statements rebuilt on every call
+and with the shared statements of ``statement_cache``.
+
+"prepare" only builds the statement and its SQLAlchemy cache key, the part
+a reused statement skips. "execute" runs the whole lookup against SQLite.
+
+    python -m benchmarks.bench_statements --number 5000
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from engine.auth.models import UserORMModel, RoleORMModel
+from engine.auth.repos import UserRepository
+from engine.base import statement_cache
+from engine.db import Base, create_db_engine
+
+
+def prepare_rebuilt(id_: int) -> None:
+    select(UserORMModel).where(UserORMModel.id == id_)._generate_cache_key()
+
+
+def prepare_cached(repo: UserRepository) -> None:
+    repo._statement("get", repo._build_get_stmt)._generate_cache_key()
+
+
+async def run(args: argparse.Namespace) -> None:
+    db_engine = create_db_engine("sqlite+aiosqlite://")
+    async with db_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+
+    session_maker = async_sessionmaker(db_engine, expire_on_commit=False)
+    async with session_maker() as session:
+        session.add(RoleORMModel(id=1, name="admin"))
+        session.add_all(
+            UserORMModel(id=i, username=f"user-{i}", hashed_password="x", role_id=1)
+            for i in range(1, args.users + 1)
+        )
+        await session.commit()
+
+    async with session_maker() as session:
+        repo = UserRepository(session)
+        ids = [i % args.users + 1 for i in range(args.number)]
+
+        async def execute_rebuilt() -> None:
+            for id_ in ids:
+                stmt = select(UserORMModel).where(UserORMModel.id == id_)
+                (await session.execute(stmt)).scalar_one()
+
+        async def execute_cached() -> None:
+            for id_ in ids:
+                await repo._get_orm_model(id_)
+
+        def best_us(func) -> float:
+            timings = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                for id_ in ids:
+                    func(id_)
+                timings.append(time.perf_counter() - start)
+            return min(timings) / args.number * 1e6
+
+        async def best_async_us(func) -> float:
+            timings = []
+            for _ in range(args.repeat):
+                session.expunge_all()
+                start = time.perf_counter()
+                await func()
+                timings.append(time.perf_counter() - start)
+            return min(timings) / args.number * 1e6
+
+        statement_cache.clear()
+        print(f"{'':>8} {'rebuilt':>10} {'cached':>10}  (us/call)")
+        print(
+            f"{'prepare':>8} {best_us(prepare_rebuilt):10.1f}"
+            f" {best_us(lambda _: prepare_cached(repo)):10.1f}"
+        )
+        print(
+            f"{'execute':>8} {await best_async_us(execute_rebuilt):10.1f}"
+            f" {await best_async_us(execute_cached):10.1f}"
+        )
+        print("statement cache:", statement_cache.stats())
+
+    await db_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--number", type=int, default=5000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--users", type=int, default=100)
+    args = parser.parse_args()
+
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
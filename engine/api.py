@@ -1,16 +1,63 @@
+# Imported first, startup times are measured from here.
+from engine import startup
+
+import asyncio
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 
-import api_model
-from auth.routers import router as auth_router
+from engine import api_model, instrumentation
+from engine.auth.container import AuthContainer
+from engine.auth.exceptions import register as auth_exceptions
+from engine.auth.routers import router as auth_router
+from engine.config import SERVER_HOST, SERVER_PORT
+from engine.db import dispose_engines, engine, read_engine, read_session_maker
+from engine.ws import router as ws_router
+
+
+HOST = SERVER_HOST
+PORT = SERVER_PORT
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.auth = AuthContainer.from_config()
+    password_helper = app.state.auth.password_helper
+    instrumentation.metrics.add_gauge(
+        "engine_password_hash_queue_depth",
+        "Password hash calls waiting for a free slot.",
+        lambda: password_helper.queue_depth,
+    )
+    async with read_session_maker() as session:
+        await app.state.auth.auth_sync.load(session)
+
+    startup.mark("registries")
 
+    # Load the hasher and JWT keys in the background instead of on the first login.
+    warm_up = asyncio.create_task(asyncio.to_thread(app.state.auth.warm_up))
+    startup.mark("ready")
+    startup.log_marks()
+    try:
+        yield
+    finally:
+        await warm_up
+        app.state.auth.shutdown()
+        await dispose_engines()
 
-HOST = "127.0.0.1"
-PORT = 7777
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
+auth_exceptions(app.add_exception_handler)
 app.include_router(auth_router)
+app.include_router(ws_router)
+instrumentation.install(app, engine, read_engine)
+startup.mark("app")
+
+
+@app.get("/ready")
+async def ready():
+    """Polled by the front end until the backend answers, with startup timings."""
+    return {"status": "ready", "startup": startup.marks}
 
 
 @app.get("/hello/{name}")
@@ -23,13 +70,3 @@ def open_explorer(model: api_model.PathModel):
     os.startfile(model.path)
 
     return f"Opening {model.path}"
-
-
-if __name__ == "__main__":
-    import asyncio
-    import uvicorn
-
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
-
-    loop.run_until_complete(uvicorn.run(app, host=HOST, port=PORT))
@@ -0,0 +1,152 @@
+import time
+import uuid
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from engine.config import AUTH_CHANGES_MAX_AGE
+from engine.db import read_session_maker
+from .models import AuthChangeORMModel, RoleORMModel
+from .ownership_cache import OwnershipCache
+from .permissions import permission_table
+from .role_registry import role_registry
+from .token_cache import UserTokenCache
+from .token_versions import token_versions
+
+USER_CHANGED = "user"
+ROLE_CHANGED = "role"
+LINK_CHANGED = "link"
+
+# Identifies the changes made by this process, it does not apply them twice.
+ORIGIN = uuid.uuid4().hex
+
+
+async def record_changes(
+    session: AsyncSession,
+    kind: str,
+    entity_ids: Iterable[int],
+    related_id: Optional[int] = None,
+) -> None:
+    """
+    Record changes to roles, users or camera links. Call it in the
+    transaction that makes them, other workers apply them after the commit.
+    """
+    now = int(time.time())
+    table = AuthChangeORMModel.__table__
+    await session.execute(
+        insert(table),
+        [
+            {
+                "kind": kind,
+                "entity_id": entity_id,
+                "related_id": related_id,
+                "origin": ORIGIN,
+                "changed_at": now,
+            }
+            for entity_id in entity_ids
+        ],
+    )
+    await session.execute(
+        delete(table).where(table.c.changed_at < now - AUTH_CHANGES_MAX_AGE)
+    )
+
+
+class AuthSync:
+    """
+    Keeps the auth state of this worker in line with the database.
+
+    The role registry, the permission table and the token versions are
+    loaded once, the token and ownership caches fill up on use. Every worker
+    logs its changes to ``auth_changes``, the others read the log at most
+    every ``interval`` seconds and update or invalidate only the changed
+    roles, users and links. ``interval=None`` turns the polling off, for a
+    single worker nothing else writes.
+    """
+
+    def __init__(
+        self,
+        token_cache: UserTokenCache,
+        ownership_cache: OwnershipCache,
+        interval: Optional[float],
+        origin: str = ORIGIN,
+    ) -> None:
+        self.token_cache = token_cache
+        self.ownership_cache = ownership_cache
+        self.interval = interval
+        self.origin = origin
+        self.last_change_id = 0
+        self._checked_at = 0.0
+
+    async def load(self, session: AsyncSession) -> None:
+        # Read first, a change committed during the reload is applied again.
+        last_change_id = await session.scalar(select(func.max(AuthChangeORMModel.id)))
+        await role_registry.load(session)
+        permission_table.compile(role_registry.roles)
+        await token_versions.load(session)
+        self.token_cache.clear()
+        self.ownership_cache.clear()
+        self.last_change_id = last_change_id or 0
+        self._checked_at = time.monotonic()
+
+    async def check(self) -> None:
+        if self.interval is None:
+            return
+
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return
+
+        # Older changes may have been deleted, everything is reloaded.
+        stale = now - self._checked_at > AUTH_CHANGES_MAX_AGE
+        # Set before awaiting, concurrent requests do not query too.
+        self._checked_at = now
+        async with read_session_maker() as session:
+            if stale:
+                await self.load(session)
+            else:
+                await self._apply_changes(session)
+
+    async def _apply_changes(self, session: AsyncSession) -> None:
+        res = await session.execute(
+            select(AuthChangeORMModel)
+            .where(AuthChangeORMModel.id > self.last_change_id)
+            .order_by(AuthChangeORMModel.id)
+        )
+        changes = res.scalars().all()
+        if not changes:
+            return
+
+        self.last_change_id = changes[-1].id
+        user_ids: set[int] = set()
+        role_ids: set[int] = set()
+        for change in changes:
+            if change.origin == self.origin:
+                continue
+            if change.kind == USER_CHANGED:
+                user_ids.add(change.entity_id)
+            elif change.kind == ROLE_CHANGED:
+                role_ids.add(change.entity_id)
+            elif change.kind == LINK_CHANGED:
+                self.ownership_cache.forget(change.entity_id, change.related_id)
+
+        if role_ids:
+            await self._reload_roles(session, role_ids)
+        if user_ids:
+            await token_versions.load_users(session, user_ids)
+            for user_id in user_ids:
+                self.token_cache.invalidate_user(user_id)
+
+    async def _reload_roles(self, session: AsyncSession, role_ids: set[int]) -> None:
+        res = await session.execute(
+            select(RoleORMModel).where(RoleORMModel.id.in_(role_ids))
+        )
+        roles = {role.id: role for role in res.scalars()}
+        for role_id in role_ids:
+            role = roles.get(role_id)
+            if role is None:
+                role_registry.remove(role_id)
+            else:
+                role_registry.intern(role.id, role.name)
+            self.token_cache.invalidate_role(role_id)
+        permission_table.compile(role_registry.roles)
@@ -0,0 +1,122 @@
+from engine.config import (
+    SECRET,
+    JWT_LIFETIME,
+    JWT_ALGORITHM,
+    JWT_KEYS_DIR,
+    JWT_ACTIVE_KID,
+    TOKEN_CACHE_SIZE,
+    TOKEN_CACHE_TTL,
+    OWNERSHIP_CACHE_SIZE,
+    OWNERSHIP_CACHE_TTL,
+    AUTH_SYNC_INTERVAL,
+    SERVER_WORKERS,
+    LOGIN_RATE_LIMIT_USERNAME,
+    LOGIN_RATE_LIMIT_IP,
+    LOGIN_RATE_LIMIT_WINDOW,
+    RATE_LIMIT_MAX_KEYS,
+    RATE_LIMIT_BACKEND,
+    PASSWORD_HASH_EXECUTOR,
+    PASSWORD_HASH_WORKERS,
+    PASSWORD_HASH_MAX_CONCURRENCY,
+)
+from engine.db import write_session_maker
+from engine.ratelimit import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitBackend,
+    RateLimiter,
+)
+from engine.utils import PasswordHelper, create_hash_executor
+from .auth_sync import AuthSync
+from .keys import create_key_set
+from .ownership_cache import OwnershipCache
+from .services.auth_service import AuthService
+from .token_cache import UserTokenCache
+
+
+class AuthContainer:
+    """
+    Stateless auth components shared by all requests.
+
+    Created once by the app lifespan and kept in ``app.state.auth``,
+    per-request repositories and services only reference them.
+    """
+
+    def __init__(
+        self,
+        password_helper: PasswordHelper,
+        auth_service: AuthService,
+        token_cache: UserTokenCache,
+        ownership_cache: OwnershipCache,
+        auth_sync: AuthSync,
+        username_limiter: RateLimiter,
+        ip_limiter: RateLimiter,
+    ) -> None:
+        self.password_helper = password_helper
+        self.auth_service = auth_service
+        self.token_cache = token_cache
+        self.ownership_cache = ownership_cache
+        self.auth_sync = auth_sync
+        self.username_limiter = username_limiter
+        self.ip_limiter = ip_limiter
+
+    @classmethod
+    def from_config(cls) -> "AuthContainer":
+        token_cache = UserTokenCache(TOKEN_CACHE_SIZE, TOKEN_CACHE_TTL)
+        password_helper = PasswordHelper(
+            executor=create_hash_executor(
+                PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS
+            ),
+            max_concurrency=PASSWORD_HASH_MAX_CONCURRENCY,
+        )
+        auth_service = AuthService(
+            SECRET,
+            JWT_LIFETIME,
+            token_cache=token_cache,
+            keys=create_key_set(JWT_ALGORITHM, SECRET, JWT_KEYS_DIR, JWT_ACTIVE_KID),
+        )
+        ownership_cache = OwnershipCache(OWNERSHIP_CACHE_SIZE, OWNERSHIP_CACHE_TTL)
+        rate_limits: RateLimitBackend
+        if RATE_LIMIT_BACKEND == "database":
+            rate_limits = DatabaseRateLimitBackend(
+                write_session_maker, LOGIN_RATE_LIMIT_WINDOW
+            )
+        else:
+            rate_limits = MemoryRateLimitBackend(RATE_LIMIT_MAX_KEYS)
+        return cls(
+            password_helper,
+            auth_service,
+            token_cache,
+            ownership_cache,
+            AuthSync(
+                token_cache,
+                ownership_cache,
+                # A single worker makes every change itself.
+                AUTH_SYNC_INTERVAL if SERVER_WORKERS > 1 else None,
+            ),
+            username_limiter=RateLimiter(
+                rate_limits,
+                LOGIN_RATE_LIMIT_USERNAME,
+                LOGIN_RATE_LIMIT_WINDOW,
+                prefix="login:user:",
+            ),
+            ip_limiter=RateLimiter(
+                rate_limits,
+                LOGIN_RATE_LIMIT_IP,
+                LOGIN_RATE_LIMIT_WINDOW,
+                prefix="login:ip:",
+            ),
+        )
+
+    def warm_up(self) -> None:
+        """
+        Import the hasher and parse the JWT keys, which are otherwise
+        loaded by the first request that needs them. Blocking.
+        """
+        self.password_helper.password_hash
+        self.auth_service.keys.prepare()
+
+    def shutdown(self) -> None:
+        self.password_helper.shutdown()
+        self.token_cache.clear()
+        self.ownership_cache.clear()
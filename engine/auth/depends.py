@@ -1,27 +1,99 @@
-from typing import Annotated
+import math
+from functools import cache
+from typing import Annotated, Any, Callable, Coroutine
 
-from fastapi import Depends, HTTPException
-from fastapi.security import OAuth2PasswordBearer
+from fastapi import Depends, HTTPException, Request
+from fastapi.security import OAuth2PasswordBearer, OAuth2PasswordRequestForm
 
-from engine.config import SECRET, JWT_LIFETIME
-from engine.utils import PasswordHelper
-from .domain import User
+from engine.config import (
+    STATELESS_AUTH,
+    REFRESH_TOKEN_LIFETIME,
+    REFRESH_TOKEN_REUSE_GRACE,
+)
+from .container import AuthContainer
+from .domain import User, Principal
+from .permissions import Permission, permission_table
+from .repos.camera_owner_repo import (
+    CameraOwnerRepository,
+    get_camera_owner_repository,
+)
+from .repos.refresh_tokens_repo import (
+    RefreshTokenRepository,
+    get_refresh_token_repository,
+)
 from .repos.roles_repo import RoleRepository, get_role_repository
 from .repos.user_repo import UserRepository, get_user_repository
 from .services.auth_service import AuthService
+from .services.camera_owner_service import CameraOwnerService
+from .services.refresh_service import RefreshTokenService
 from .services.role_service import RoleService
 from .services.user_manager import UserManager
 
+oauth2_scheme = OAuth2PasswordBearer(tokenUrl="login")
 
-def get_user_manager(
+
+# Dependencies are async: FastAPI runs plain functions in a thread pool.
+async def get_auth_container(request: Request) -> AuthContainer:
+    container = request.app.state.auth
+    # Picks up roles, users and links changed by other workers.
+    await container.auth_sync.check()
+    return container
+
+
+async def limit_login_attempts(
+    request: Request,
+    credentials: Annotated[OAuth2PasswordRequestForm, Depends()],
+    container: Annotated[AuthContainer, Depends(get_auth_container)],
+) -> None:
+    """
+    Reject a login attempt over the per address or per username limit
+    before its password is hashed.
+    """
+    address = request.client.host if request.client is not None else ""
+    retry_after = await container.ip_limiter.hit(address)
+    if not retry_after:
+        retry_after = await container.username_limiter.hit(credentials.username.lower())
+
+    if retry_after:
+        raise HTTPException(
+            status_code=429,
+            detail="LOGIN_TOO_MANY_ATTEMPTS",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+async def get_user_manager(
     user_repo: Annotated[UserRepository, Depends(get_user_repository)],
     role_repo: Annotated[RoleRepository, Depends(get_role_repository)],
+    refresh_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
+    container: Annotated[AuthContainer, Depends(get_auth_container)],
 ) -> UserManager:
-    return UserManager(user_repo, role_repo, PasswordHelper())
+    return UserManager(
+        user_repo,
+        role_repo,
+        container.password_helper,
+        container.token_cache,
+        refresh_repo,
+    )
+
+
+async def get_refresh_service(
+    refresh_repo: Annotated[
+        RefreshTokenRepository, Depends(get_refresh_token_repository)
+    ],
+    user_manager: Annotated[UserManager, Depends(get_user_manager)],
+) -> RefreshTokenService:
+    return RefreshTokenService(
+        refresh_repo, user_manager, REFRESH_TOKEN_LIFETIME, REFRESH_TOKEN_REUSE_GRACE
+    )
 
 
-def get_auth_service() -> AuthService:
-    return AuthService(SECRET, JWT_LIFETIME)
+async def get_auth_service(
+    container: Annotated[AuthContainer, Depends(get_auth_container)],
+) -> AuthService:
+    return container.auth_service
 
 
 # Можно заюзать фабричный метод,
@@ -29,7 +101,7 @@ def get_auth_service() -> AuthService:
 # активен пользователь,
 # является ли он суперпользователем и тд
 async def get_current_user(
-    token: Annotated[str, Depends(OAuth2PasswordBearer(tokenUrl="login"))],
+    token: Annotated[str, Depends(oauth2_scheme)],
     user_manager: Annotated[UserManager, Depends(get_user_manager)],
     auth_service: Annotated[AuthService, Depends(get_auth_service)],
 ) -> User:
@@ -40,8 +112,78 @@ async def get_current_user(
     return user
 
 
-def get_role_service(
+async def _get_principal_from_user(
+    user: Annotated[User, Depends(get_current_user)],
+) -> Principal:
+    return Principal(id=user.id, role=user.role, token_version=user.token_version)
+
+
+async def _get_principal_from_claims(
+    token: Annotated[str, Depends(oauth2_scheme)],
+    auth_service: Annotated[AuthService, Depends(get_auth_service)],
+) -> Principal:
+    principal = auth_service.read_principal(token)
+    if principal is None:
+        raise HTTPException(status_code=401, detail="Unauthorized")
+
+    return principal
+
+
+# Caller identity for authorization checks.
+# In the stateless mode it is taken from the token alone, with no database access.
+get_current_principal = (
+    _get_principal_from_claims if STATELESS_AUTH else _get_principal_from_user
+)
+
+
+@cache
+def require_permissions(
+    required: Permission,
+) -> Callable[..., Coroutine[Any, Any, Principal]]:
+    """
+    Dependency returning the current principal if it has all of ``required``.
+
+    Created once per permission set, so FastAPI resolves it once per request
+    however many dependencies of the route ask for it.
+    """
+
+    async def check_permissions(
+        curr_user: Annotated[Principal, Depends(get_current_principal)],
+    ) -> Principal:
+        permission_table.check(curr_user, required)
+        return curr_user
+
+    return check_permissions
+
+
+async def get_role_service(
     role_repo: Annotated[RoleRepository, Depends(get_role_repository)],
-    curr_user: Annotated[User, Depends(get_current_user)],
+    curr_user: Annotated[Principal, Depends(get_current_principal)],
+    container: Annotated[AuthContainer, Depends(get_auth_container)],
 ) -> RoleService:
-    return RoleService(role_repo, curr_user)
+    return RoleService(role_repo, curr_user, container.token_cache)
+
+
+async def get_camera_owner_service(
+    camera_owner_repo: Annotated[
+        CameraOwnerRepository, Depends(get_camera_owner_repository)
+    ],
+    curr_user: Annotated[Principal, Depends(get_current_principal)],
+    container: Annotated[AuthContainer, Depends(get_auth_container)],
+) -> CameraOwnerService:
+    return CameraOwnerService(camera_owner_repo, curr_user, container.ownership_cache)
+
+
+async def get_owned_camera_id(
+    camera_id: int,
+    curr_user: Annotated[Principal, Depends(get_current_principal)],
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+) -> int:
+    """
+    ``camera_id`` path parameter of a camera owned by the current user.
+    Repeated checks are served from the ownership cache without a query.
+    """
+    if not await service.is_owner(curr_user.id, camera_id):
+        raise HTTPException(status_code=403, detail="NOT_CAMERA_OWNER")
+
+    return camera_id
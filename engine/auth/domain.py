@@ -1,3 +1,5 @@
+from typing import Optional
+
 from pydantic import BaseModel
 
 
@@ -8,6 +10,7 @@ class User(BaseModel):
     is_active: bool = True
     is_superuser: bool = True
     is_verified: bool = True
+    token_version: int = 0
 
     role: "Role"
 
@@ -23,6 +26,16 @@ class Role(BaseModel):
         from_attributes = True
 
 
+class Principal(BaseModel):
+    """
+    Authenticated caller, enough to make authorization decisions.
+    """
+
+    id: int
+    role: Role
+    token_version: int = 0
+
+
 class CameraOwner(BaseModel):
     id: int
     owner_id: int
@@ -30,3 +43,16 @@ class CameraOwner(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class RefreshToken(BaseModel):
+    id: int
+    user_id: int
+    family_id: str
+    token_version: int
+    expires_at: int
+    revoked: bool
+    revoked_at: Optional[int] = None
+
+    class Config:
+        from_attributes = True
@@ -1,7 +1,11 @@
+from engine.exceptions import InvalidCursor, PermissionDenied
 from engine.utils import create_handler
 from engine.utils import ExceptionRegistry
 
 register = ExceptionRegistry()
+# Engine exceptions raised by the auth services and routes.
+register.register(PermissionDenied, create_handler(403))
+register.register(InvalidCursor, create_handler(400))
 
 
 @register.exception(create_handler(400))
@@ -33,3 +37,38 @@ class RoleAlreadyExists(RoleError):
 
     def __str__(self) -> str:
         return f"Role with name '{self.role_name}' already exists."
+
+
+@register.exception(create_handler(401))
+class InvalidRefreshToken(Exception):
+    def __str__(self) -> str:
+        return "Refresh token is invalid, expired or revoked."
+
+
+@register.exception(create_handler(400))
+class CameraOwnerError(Exception):
+    def __init__(self, owner_id: int, camera_id: int) -> None:
+        self.owner_id = owner_id
+        self.camera_id = camera_id
+
+
+@register.exception(create_handler(404))
+class CameraOwnerDoesNotExist(CameraOwnerError):
+    def __str__(self) -> str:
+        return f"User '{self.owner_id}' does not own camera '{self.camera_id}'."
+
+
+@register.exception(create_handler(409))
+class CameraOwnerAlreadyExists(CameraOwnerError):
+    def __str__(self) -> str:
+        return f"User '{self.owner_id}' already owns camera '{self.camera_id}'."
+
+
+@register.exception(create_handler(404))
+class CameraOwnerUserDoesNotExist(CameraOwnerError):
+    def __init__(self, owner_id: int, camera_id: int, user_id: int) -> None:
+        super().__init__(owner_id, camera_id)
+        self.user_id = user_id
+
+    def __str__(self) -> str:
+        return f"User '{self.user_id}' does not exist."
@@ -0,0 +1,187 @@
+import functools
+import json
+from pathlib import Path
+from typing import Any, Iterable, Optional, Union
+
+KeyMaterial = Union[str, bytes]
+
+
+class JWTKey:
+    """
+    Key material for one JWT algorithm, parsed once.
+
+    Asymmetric keys are turned into ``cryptography`` key objects on first use
+    (or by ``prepare``), so signing and verification skip PEM parsing.
+
+    :param algorithm: JWT ``alg``, e.g. ``HS256``, ``RS256``, ``ES256`` or ``EdDSA``.
+    :param private_key: secret or PEM private key, required for signing.
+    :param public_key: PEM public key, derived from ``private_key`` if omitted.
+    :param kid: key id written to the token header.
+    """
+
+    def __init__(
+        self,
+        algorithm: str,
+        private_key: Optional[KeyMaterial] = None,
+        public_key: Optional[KeyMaterial] = None,
+        kid: Optional[str] = None,
+    ) -> None:
+        if private_key is None and public_key is None:
+            raise ValueError("Either private_key or public_key is required.")
+
+        self.algorithm = algorithm
+        self.kid = kid
+        self._private_key = private_key
+        self._public_key = public_key
+
+    @functools.cached_property
+    def signing_key(self) -> Any:
+        if self._private_key is None:
+            return None
+
+        return self._algorithm_obj.prepare_key(self._private_key)
+
+    @functools.cached_property
+    def verifying_key(self) -> Any:
+        if self._public_key is not None:
+            return self._algorithm_obj.prepare_key(self._public_key)
+
+        if hasattr(self.signing_key, "public_key"):
+            return self.signing_key.public_key()
+
+        return self.signing_key
+
+    @property
+    def can_sign(self) -> bool:
+        return self._private_key is not None
+
+    def prepare(self) -> None:
+        """Parse the key material now rather than on first use."""
+        self.signing_key, self.verifying_key
+
+    @functools.cached_property
+    def _algorithm_obj(self) -> Any:
+        # jwt (and cryptography with it) is only imported once a key is used.
+        from jwt.algorithms import get_default_algorithms
+
+        try:
+            return get_default_algorithms()[self.algorithm]
+        except KeyError:
+            raise ValueError(
+                f"Unsupported JWT algorithm '{self.algorithm}',"
+                " asymmetric algorithms need 'pyjwt[crypto]'."
+            ) from None
+
+    @property
+    def headers(self) -> Optional[dict[str, str]]:
+        return {"kid": self.kid} if self.kid is not None else None
+
+
+class KeySet:
+    """
+    Active JWT keys, addressed by ``kid``.
+
+    New tokens are signed with the active key. Tokens are verified with the key
+    named in their header, so keys can be rotated while older tokens stay valid.
+    Tokens without ``kid`` are verified with the active key.
+    """
+
+    def __init__(self, keys: Iterable[JWTKey], active_kid: Optional[str] = None):
+        self._keys: dict[Optional[str], JWTKey] = {key.kid: key for key in keys}
+        if not self._keys:
+            raise ValueError("KeySet needs at least one key.")
+
+        if active_kid is None:
+            signing = [key.kid for key in self._keys.values() if key.can_sign]
+            active_kid = max(signing, key=lambda kid: kid or "") if signing else None
+        self.activate(active_kid)
+
+    @property
+    def active(self) -> JWTKey:
+        return self._keys[self._active_kid]
+
+    def activate(self, kid: Optional[str]) -> None:
+        key = self._keys.get(kid)
+        if key is None or not key.can_sign:
+            raise ValueError(f"No signing key with kid '{kid}'.")
+
+        self._active_kid = kid
+
+    def add(self, key: JWTKey) -> None:
+        self._keys[key.kid] = key
+
+    def remove(self, kid: Optional[str]) -> None:
+        if kid == self._active_kid:
+            raise ValueError("The active key can not be removed.")
+
+        self._keys.pop(kid, None)
+
+    def get(self, kid: Optional[str]) -> Optional[JWTKey]:
+        if kid is None:
+            return self.active
+
+        return self._keys.get(kid)
+
+    def prepare(self) -> None:
+        for key in self._keys.values():
+            key.prepare()
+
+    def for_token(self, token: str) -> Optional[JWTKey]:
+        # With a single key the signature check alone decides, skip the header.
+        if len(self._keys) == 1:
+            return self.active
+
+        from jwt.utils import base64url_decode
+
+        try:
+            header = json.loads(base64url_decode(token.partition(".")[0]))
+        except ValueError:
+            return None
+
+        if not isinstance(header, dict):
+            return None
+
+        return self.get(header.get("kid"))
+
+    @classmethod
+    def from_secret(cls, secret: KeyMaterial, algorithm: str = "HS256") -> "KeySet":
+        return cls([JWTKey(algorithm, private_key=secret)])
+
+    @classmethod
+    def from_directory(
+        cls, path: Union[str, Path], algorithm: str, active_kid: Optional[str] = None
+    ) -> "KeySet":
+        """
+        Load ``<kid>.pem`` files from ``path``.
+
+        Private keys can sign, public keys only verify (e.g. retired keys).
+        Without ``active_kid`` the private key with the greatest kid is active,
+        so date based kids rotate naturally.
+        """
+        keys = []
+        for file in sorted(Path(path).glob("*.pem")):
+            pem = file.read_bytes()
+            if b"PRIVATE KEY" in pem:
+                keys.append(JWTKey(algorithm, private_key=pem, kid=file.stem))
+            else:
+                keys.append(JWTKey(algorithm, public_key=pem, kid=file.stem))
+
+        key_set = cls(keys, active_kid)
+        # Configuration errors in key files are reported at startup.
+        key_set.prepare()
+        return key_set
+
+
+def create_key_set(
+    algorithm: str,
+    secret: Optional[KeyMaterial] = None,
+    keys_dir: Optional[Union[str, Path]] = None,
+    active_kid: Optional[str] = None,
+) -> KeySet:
+    if keys_dir is not None:
+        return KeySet.from_directory(keys_dir, algorithm, active_kid)
+
+    if not algorithm.startswith("HS"):
+        raise ValueError(f"{algorithm} needs a keys directory.")
+
+    return KeySet.from_secret(secret, algorithm)
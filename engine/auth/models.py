@@ -1,4 +1,6 @@
-from sqlalchemy import String, Integer, ForeignKey
+from typing import Optional
+
+from sqlalchemy import String, Integer, ForeignKey, Boolean, Index, UniqueConstraint
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from engine.db import Base
@@ -6,13 +8,20 @@ from engine.db import Base
 
 class UserORMModel(Base):
     __tablename__ = "users"
+    # Ids of deleted users are not handed out again, their tombstones would
+    # reject the tokens of a new user issued in the second of the deletion.
+    __table_args__ = {"sqlite_autoincrement": True}
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=True)
     username: Mapped[str] = mapped_column(
         String(length=320), unique=True, index=True, nullable=False
     )
     hashed_password: Mapped[str] = mapped_column(String(length=1024), nullable=False)
     role_id: Mapped[int] = mapped_column(
-        Integer, ForeignKey("roles.id"), nullable=False
+        Integer, ForeignKey("roles.id"), index=True, nullable=False
+    )
+    token_version: Mapped[int] = mapped_column(
+        Integer, nullable=False, default=0, server_default="0"
     )
 
     role: Mapped["RoleORMModel"] = relationship("RoleORMModel", lazy="joined")
@@ -31,6 +40,11 @@ class RoleORMModel(Base):
 
 class CameraOwnerORMModel(Base):
     __tablename__ = "camera_owner"
+    # The unique constraint's index serves lookups by owner, the second one by camera.
+    __table_args__ = (
+        UniqueConstraint("owner_id", "camera_id", name="uq_camera_owner_owner_camera"),
+        Index("ix_camera_owner_camera_owner", "camera_id", "owner_id"),
+    )
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
     owner_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=False
@@ -38,3 +52,43 @@ class CameraOwnerORMModel(Base):
     camera_id: Mapped[int] = mapped_column(
         Integer, ForeignKey("users.id"), nullable=False
     )
+
+
+class RefreshTokenORMModel(Base):
+    __tablename__ = "refresh_tokens"
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    # sha256 of the token, raw tokens are never stored
+    token_hash: Mapped[str] = mapped_column(
+        String(length=64), unique=True, index=True, nullable=False
+    )
+    user_id: Mapped[int] = mapped_column(
+        Integer, ForeignKey("users.id"), index=True, nullable=False
+    )
+    family_id: Mapped[str] = mapped_column(
+        String(length=32), index=True, nullable=False
+    )
+    token_version: Mapped[int] = mapped_column(Integer, nullable=False)
+    expires_at: Mapped[int] = mapped_column(Integer, nullable=False)
+    revoked: Mapped[bool] = mapped_column(Boolean, nullable=False, default=False)
+    revoked_at: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+
+
+class DeletedUserORMModel(Base):
+    __tablename__ = "deleted_users"
+    # No foreign key, the user row is gone. Tokens issued up to deleted_at are
+    # rejected, also after a restart and if a new user gets the same id.
+    user_id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+    deleted_at: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class AuthChangeORMModel(Base):
+    __tablename__ = "auth_changes"
+    # Log of role, user and camera link changes, read by the other workers.
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    kind: Mapped[str] = mapped_column(String(length=16), nullable=False)
+    entity_id: Mapped[int] = mapped_column(Integer, nullable=False)
+    # The camera of a link, the owner is entity_id.
+    related_id: Mapped[Optional[int]] = mapped_column(Integer, nullable=True)
+    # Process that made the change, it already updated its own state.
+    origin: Mapped[str] = mapped_column(String(length=32), nullable=False)
+    changed_at: Mapped[int] = mapped_column(Integer, index=True, nullable=False)
@@ -0,0 +1,35 @@
+from typing import Optional
+
+from engine.cache import TTLCache
+
+
+class OwnershipCache:
+    """
+    Cache of camera ownership checks, negative answers included.
+
+    ``generation`` changes whenever a link is added or removed, holders of
+    data derived from the links (the peers of a websocket connection)
+    compare it to know when to reload.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[tuple[int, int], bool] = TTLCache(maxsize, ttl)
+        self.ttl = ttl
+        self.generation = 0
+
+    def get(self, owner_id: int, camera_id: int) -> Optional[bool]:
+        return self._cache.get((owner_id, camera_id))
+
+    def set(self, owner_id: int, camera_id: int, is_owner: bool) -> None:
+        self._cache.set((owner_id, camera_id), is_owner)
+
+    def forget(self, owner_id: int, camera_id: int) -> None:
+        self._cache.pop((owner_id, camera_id))
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._cache)
@@ -0,0 +1,75 @@
+from enum import IntFlag
+from typing import Iterable, Mapping
+
+from engine.exceptions import PermissionDenied
+from .domain import Principal, Role
+
+
+class Permission(IntFlag):
+    NONE = 0
+    READ_ROLES = 1 << 0
+    MANAGE_ROLES = 1 << 1
+    READ_USERS = 1 << 2
+    MANAGE_USERS = 1 << 3
+    EXPORT_USERS = 1 << 4
+    READ_OWN_CAMERAS = 1 << 5
+    READ_CAMERAS = 1 << 6
+    MANAGE_CAMERAS = 1 << 7
+
+    ALL = (1 << 8) - 1
+
+
+# Roles created at runtime, e.g. through POST /roles, are not listed below.
+# Like before permissions existed, every role may read roles.
+DEFAULT_PERMISSIONS = Permission.READ_ROLES | Permission.READ_OWN_CAMERAS
+
+# Permissions of every role by name, roles not listed here get the defaults.
+ROLE_PERMISSIONS: dict[str, Permission] = {
+    "admin": Permission.ALL,
+    "camera": DEFAULT_PERMISSIONS,
+    "client": DEFAULT_PERMISSIONS,
+}
+
+
+class PermissionTable:
+    """
+    Role to permission bitmask table.
+
+    Masks are compiled once per role, so a check is a dict lookup
+    and a bitwise and. Keys include the role name, a renamed role
+    gets the permissions of its new name.
+    """
+
+    def __init__(
+        self,
+        role_permissions: Mapping[str, Permission],
+        default: Permission = Permission.NONE,
+    ) -> None:
+        self.role_permissions = role_permissions
+        self.default = default
+        self._masks: dict[tuple[int, str], Permission] = {}
+
+    def compile(self, roles: Iterable[Role]) -> None:
+        self._masks = {
+            (role.id, role.name): self.role_permissions.get(role.name, self.default)
+            for role in roles
+        }
+
+    def get(self, role: Role) -> Permission:
+        key = (role.id, role.name)
+        mask = self._masks.get(key)
+        if mask is None:
+            mask = self.role_permissions.get(role.name, self.default)
+            self._masks[key] = mask
+
+        return mask
+
+    def has(self, role: Role, required: Permission) -> bool:
+        return self.get(role) & required == required
+
+    def check(self, principal: Principal, required: Permission) -> None:
+        if not self.has(principal.role, required):
+            raise PermissionDenied
+
+
+permission_table = PermissionTable(ROLE_PERMISSIONS, DEFAULT_PERMISSIONS)
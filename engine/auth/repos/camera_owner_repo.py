@@ -0,0 +1,107 @@
+from typing import Annotated, Optional, Sequence
+
+from fastapi import Depends
+from sqlalchemy import select, or_, exists, delete, bindparam, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..domain import CameraOwner
+from ..models import CameraOwnerORMModel, UserORMModel
+from engine.base import NewSQLAlchemyRepository, get_domain_mapper, commit_or_flush
+from engine.db import get_async_session
+
+
+class CameraOwnerRepository(
+    NewSQLAlchemyRepository[CameraOwner, CameraOwnerORMModel, int]
+):
+    """
+    Owner to camera links. Every query here is answered
+    by one of the composite indexes of ``camera_owner``.
+    """
+
+    def __init__(self, session: AsyncSession):
+        super().__init__(
+            CameraOwner,
+            CameraOwnerORMModel,
+            session,
+            get_domain_mapper(CameraOwner),
+        )
+
+    async def get_link(self, owner_id: int, camera_id: int) -> Optional[CameraOwner]:
+        stmt = select(self.table).where(
+            self.table.owner_id == owner_id, self.table.camera_id == camera_id
+        )
+        res = await self.session.execute(stmt)
+        link = res.scalar_one_or_none()
+
+        if link is None:
+            return None
+
+        return self._to_domain(link)
+
+    async def is_owner(self, owner_id: int, camera_id: int) -> bool:
+        stmt = self._statement("is_owner", self._build_is_owner_stmt)
+        params = {"owner_id": owner_id, "camera_id": camera_id}
+        return bool(await self.session.scalar(stmt, params))
+
+    def _build_is_owner_stmt(self) -> Select:
+        return select(
+            exists().where(
+                self.table.owner_id == bindparam("owner_id"),
+                self.table.camera_id == bindparam("camera_id"),
+            )
+        )
+
+    async def get_cameras(self, owner_ids: Sequence[int]) -> dict[int, list[int]]:
+        """Camera ids of every owner in ``owner_ids``, in one query."""
+        stmt = (
+            select(self.table.owner_id, self.table.camera_id)
+            .where(self.table.owner_id.in_(set(owner_ids)))
+            .order_by(self.table.owner_id, self.table.camera_id)
+        )
+        return await self._group(stmt, {owner_id: [] for owner_id in owner_ids})
+
+    async def get_owners(self, camera_ids: Sequence[int]) -> dict[int, list[int]]:
+        """Owner ids of every camera in ``camera_ids``, in one query."""
+        stmt = (
+            select(self.table.camera_id, self.table.owner_id)
+            .where(self.table.camera_id.in_(set(camera_ids)))
+            .order_by(self.table.camera_id, self.table.owner_id)
+        )
+        return await self._group(stmt, {camera_id: [] for camera_id in camera_ids})
+
+    async def get_peer_ids(self, user_id: int) -> set[int]:
+        """Owners of a camera and cameras of an owner."""
+        stmt = select(self.table.owner_id, self.table.camera_id).where(
+            or_(self.table.owner_id == user_id, self.table.camera_id == user_id)
+        )
+        res = await self.session.execute(stmt)
+        return {
+            camera_id if owner_id == user_id else owner_id
+            for owner_id, camera_id in res.tuples()
+        }
+
+    async def get_missing_users(self, user_ids: Sequence[int]) -> set[int]:
+        """Ids in ``user_ids`` without a user, links to them can not be made."""
+        stmt = select(UserORMModel.id).where(UserORMModel.id.in_(set(user_ids)))
+        return set(user_ids) - set(await self.session.scalars(stmt))
+
+    async def delete_link(self, owner_id: int, camera_id: int) -> bool:
+        stmt = delete(self.table).where(
+            self.table.owner_id == owner_id, self.table.camera_id == camera_id
+        )
+        res = await self.session.execute(stmt)
+        await commit_or_flush(self.session)
+        return res.rowcount == 1
+
+    async def _group(self, stmt, groups: dict[int, list[int]]) -> dict[int, list[int]]:
+        res = await self.session.execute(stmt)
+        for key, value in res.tuples():
+            groups[key].append(value)
+
+        return groups
+
+
+async def get_camera_owner_repository(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> CameraOwnerRepository:
+    return CameraOwnerRepository(session)
@@ -0,0 +1,89 @@
+from typing import Optional, Annotated, Sequence
+
+from fastapi import Depends
+from sqlalchemy import select, update, delete, bindparam, Select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..domain import RefreshToken
+from ..models import RefreshTokenORMModel
+from engine.base import NewSQLAlchemyRepository, get_domain_mapper
+from engine.db import get_async_session
+
+
+class RefreshTokenRepository(
+    NewSQLAlchemyRepository[RefreshToken, RefreshTokenORMModel, int]
+):
+    def __init__(self, session: AsyncSession):
+        super().__init__(
+            RefreshToken,
+            RefreshTokenORMModel,
+            session,
+            get_domain_mapper(RefreshToken),
+        )
+
+    async def get_by_hash(self, token_hash: str) -> Optional[RefreshToken]:
+        stmt = self._statement("get_by_hash", self._build_hash_stmt)
+        res = await self.session.execute(stmt, {"token_hash": token_hash})
+        token = res.scalar_one_or_none()
+
+        if token is None:
+            return None
+
+        return self._to_domain(token)
+
+    def _build_hash_stmt(self) -> Select:
+        return select(self.table).where(
+            self.table.token_hash == bindparam("token_hash")
+        )
+
+    async def revoke(self, id_: int, now: int) -> bool:
+        """
+        Revoke a live token. Returns ``False`` if it was already revoked,
+        so of two concurrent rotations of the same token only one succeeds.
+        """
+        stmt = (
+            update(self.table)
+            .where(self.table.id == id_, self.table.revoked.is_(False))
+            .values(revoked=True, revoked_at=now)
+        )
+        res = await self.session.execute(stmt)
+        return res.rowcount == 1
+
+    async def revoke_family(self, family_id: str, now: int) -> None:
+        stmt = (
+            update(self.table)
+            .where(self.table.family_id == family_id, self.table.revoked.is_(False))
+            .values(revoked=True, revoked_at=now)
+        )
+        await self.session.execute(stmt)
+
+    async def revoke_user(self, user_id: int, now: int) -> None:
+        await self.revoke_users([user_id], now)
+
+    async def revoke_users(self, user_ids: Sequence[int], now: int) -> None:
+        stmt = (
+            update(self.table)
+            .where(self.table.user_id.in_(user_ids), self.table.revoked.is_(False))
+            .values(revoked=True, revoked_at=now)
+        )
+        await self.session.execute(stmt)
+
+    async def delete_user_tokens(self, user_id: int) -> None:
+        await self.delete_users_tokens([user_id])
+
+    async def delete_users_tokens(self, user_ids: Sequence[int]) -> None:
+        await self.session.execute(
+            delete(self.table).where(self.table.user_id.in_(user_ids))
+        )
+
+    async def delete_expired(self, user_id: int, now: int) -> None:
+        stmt = delete(self.table).where(
+            self.table.user_id == user_id, self.table.expires_at <= now
+        )
+        await self.session.execute(stmt)
+
+
+async def get_refresh_token_repository(
+    session: Annotated[AsyncSession, Depends(get_async_session)],
+) -> RefreshTokenRepository:
+    return RefreshTokenRepository(session)
@@ -1,31 +1,71 @@
-from typing import Optional, Annotated
+from typing import Optional, Annotated, AsyncIterator, Any
 
 from fastapi import Depends
-from sqlalchemy import select
+from sqlalchemy import select, bindparam, Select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from ..domain import Role
 from ..models import RoleORMModel
-from engine.base import NewSQLAlchemyRepository
-from engine.db import get_async_session
+from ..role_registry import role_registry
+from engine.base import NewSQLAlchemyRepository, get_domain_mapper
+from engine.db import get_async_session, read_session_maker
 
 
 class RoleRepository(NewSQLAlchemyRepository[Role, RoleORMModel, int]):
+    """
+    Role reads are served from the role registry and fall back to the database
+    for roles it does not know yet. Writes do not touch the registry,
+    ``RoleService`` publishes them once committed.
+    """
+
     def __init__(self, session: AsyncSession):
-        super().__init__(Role, RoleORMModel, session)
+        super().__init__(Role, RoleORMModel, session, get_domain_mapper(Role))
+
+    async def get(self, id_obj: int) -> Optional[Role]:
+        role = role_registry.get(id_obj)
+        if role is not None:
+            return role
+
+        role = await super().get(id_obj)
+        if role is None:
+            return None
+
+        return role_registry.intern(role.id, role.name)
+
+    async def get_all(self, **filters: Any) -> list[Role]:
+        roles = await super().get_all(**filters)
+        if not filters:
+            role_registry.replace(roles)
+
+        return [role_registry.intern(role.id, role.name) for role in roles]
 
     async def get_by_name(self, name: str) -> Optional[Role]:
-        stmt = select(RoleORMModel).where(RoleORMModel.name == name)
+        role = role_registry.get_by_name(name)
+        if role is not None:
+            return role
+
+        stmt = self._statement("get_by_name", self._build_name_stmt)
 
-        res = (await self.session.execute(stmt)).scalar_one_or_none()
+        res = (await self.session.execute(stmt, {"name": name})).scalar_one_or_none()
 
         if res is None:
             return None
 
-        return self.domain_obj.model_validate(res)
+        return role_registry.intern(res.id, res.name)
+
+    def _build_name_stmt(self) -> Select:
+        return select(self.table).where(self.table.name == bindparam("name"))
 
 
 async def get_role_repository(
     session: Annotated[AsyncSession, Depends(get_async_session)],
 ) -> RoleRepository:
     return RoleRepository(session)
+
+
+async def stream_roles(chunk_size: int = 1000) -> AsyncIterator[list[Role]]:
+    # Request scoped sessions are closed before a streaming response is sent,
+    # so the export owns its session.
+    async with read_session_maker() as session:
+        async for chunk in RoleRepository(session).stream_all(chunk_size):
+            yield chunk
@@ -1,13 +1,26 @@
-from typing import Optional, cast, Annotated
+from typing import Any, Optional, cast, Annotated, AsyncIterator, Sequence
 
 from fastapi import Depends
-from sqlalchemy import ColumnElement, select, Select
+from sqlalchemy import ColumnElement, select, Select, update, bindparam
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from engine.base import NewSQLAlchemyRepository
-from engine.db import get_async_session
-from ..domain import User
-from ..models import UserORMModel
+from engine.base import NewSQLAlchemyRepository, DomainMapper, load_unloaded
+from engine.db import get_async_session, read_session_maker
+from engine.schema import dialect_insert
+from ..domain import User, Role
+from ..models import UserORMModel, DeletedUserORMModel
+from ..role_registry import role_registry
+
+
+def _get_role(user: UserORMModel) -> Optional[Role]:
+    orm_role = user.__dict__.get("role")
+    if orm_role is None:
+        return role_registry.get(user.role_id)
+
+    return role_registry.intern(orm_role.id, orm_role.name)
+
+
+user_mapper = DomainMapper(User, factories={"role": _get_role})
 
 
 class UserRepository(NewSQLAlchemyRepository[User, UserORMModel, int]):
@@ -21,25 +34,75 @@ class UserRepository(NewSQLAlchemyRepository[User, UserORMModel, int]):
         self,
         session: AsyncSession,
     ):
-        super().__init__(User, UserORMModel, session)
+        super().__init__(User, UserORMModel, session, user_mapper)
 
     async def get_by_username(self, username: str) -> Optional[User]:
-        statement = select(self.table).where(
-            cast(ColumnElement[bool], self.table.username == username)
+        statement = self._statement("get_by_username", self._build_username_stmt)
+        return await self._get_user(statement, {"username": username})
+
+    async def bump_token_version(self, user_id: int) -> int:
+        """Increment the user's token version, invalidating all issued tokens."""
+        stmt = (
+            update(self.table)
+            .where(self.table.id == user_id)
+            .values(token_version=self.table.token_version + 1)
+            .returning(self.table.token_version)
+        )
+        res = await self.session.execute(stmt)
+        return res.scalar_one()
+
+    async def bump_token_versions(self, user_ids: Sequence[int]) -> dict[int, int]:
+        """``bump_token_version`` of several users, returns the new versions."""
+        stmt = (
+            update(self.table)
+            .where(self.table.id.in_(user_ids))
+            .values(token_version=self.table.token_version + 1)
+            .returning(self.table.id, self.table.token_version)
         )
-        return await self._get_user(statement)
+        res = await self.session.execute(stmt)
+        return dict(res.tuples().all())
 
-    async def _get_user(self, statement: Select) -> Optional[User]:
-        results = await self.session.execute(statement)
+    async def record_deleted(self, ids: Sequence[int], deleted_at: int) -> None:
+        """Keep tombstones of deleted users, see ``TokenVersions``."""
+        stmt = dialect_insert(self.session.get_bind(), DeletedUserORMModel.__table__)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["user_id"], set_={"deleted_at": stmt.excluded.deleted_at}
+        )
+        await self.session.execute(
+            stmt, [{"user_id": id_, "deleted_at": deleted_at} for id_ in ids]
+        )
+
+    async def _load_unloaded(self, obj: UserORMModel) -> None:
+        # Known roles are taken from the role registry, no need to load them.
+        exclude = ("role",) if role_registry.get(obj.role_id) is not None else ()
+        await load_unloaded(self.session, obj, exclude)
+
+    def _build_username_stmt(self) -> Select:
+        return select(self.table).where(
+            cast(ColumnElement[bool], self.table.username == bindparam("username"))
+        )
+
+    async def _get_user(
+        self, statement: Select, params: Optional[dict[str, Any]] = None
+    ) -> Optional[User]:
+        results = await self.session.execute(statement, params)
         user = results.unique().scalar_one_or_none()
 
         if user is None:
             return None
 
-        return self.domain_obj.model_validate(user)
+        return self._to_domain(user)
 
 
 async def get_user_repository(
     session: Annotated[AsyncSession, Depends(get_async_session)],
 ):
     return UserRepository(session)
+
+
+async def stream_users(chunk_size: int = 1000) -> AsyncIterator[list[User]]:
+    # Request scoped sessions are closed before a streaming response is sent,
+    # so the export owns its session.
+    async with read_session_maker() as session:
+        async for chunk in UserRepository(session).stream_all(chunk_size):
+            yield chunk
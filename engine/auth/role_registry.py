@@ -0,0 +1,68 @@
+from typing import Optional, Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .domain import Role
+from .models import RoleORMModel
+
+
+class RoleRegistry:
+    """
+    In-process table of roles with O(1) lookup by id and by name.
+
+    Roles are interned: every reader gets the same ``Role`` instance for a role
+    until the role changes, so users loaded from the database share it.
+    """
+
+    def __init__(self) -> None:
+        self._by_id: dict[int, Role] = {}
+        self._by_name: dict[str, Role] = {}
+        self.loaded = False
+
+    async def load(self, session: AsyncSession) -> None:
+        res = await session.execute(select(RoleORMModel))
+        self.replace(Role(id=role.id, name=role.name) for role in res.scalars())
+        self.loaded = True
+
+    def replace(self, roles: Iterable[Role]) -> None:
+        roles = {role.id: role for role in roles}
+        for id_ in self._by_id.keys() - roles.keys():
+            self.remove(id_)
+
+        for role in roles.values():
+            existing = self._by_id.get(role.id)
+            if existing is None or existing.name != role.name:
+                self.put(role)
+
+    def get(self, id_: int) -> Optional[Role]:
+        return self._by_id.get(id_)
+
+    def get_by_name(self, name: str) -> Optional[Role]:
+        return self._by_name.get(name)
+
+    def intern(self, id_: int, name: str) -> Role:
+        existing = self._by_id.get(id_)
+        if existing is not None and existing.name == name:
+            return existing
+
+        role = Role(id=id_, name=name)
+        self.put(role)
+        return role
+
+    def put(self, role: Role) -> None:
+        self.remove(role.id)
+        self._by_id[role.id] = role
+        self._by_name[role.name] = role
+
+    def remove(self, id_: int) -> None:
+        role = self._by_id.pop(id_, None)
+        if role is not None and self._by_name.get(role.name) is role:
+            del self._by_name[role.name]
+
+    @property
+    def roles(self) -> list[Role]:
+        return list(self._by_id.values())
+
+
+role_registry = RoleRegistry()
@@ -1,24 +1,46 @@
-from typing import Annotated
+from typing import Annotated, AsyncIterator, Iterable, Literal
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from fastapi.security import OAuth2PasswordRequestForm
 from starlette import status
 
-from engine.exceptions import PermissionDenied
-from ..depends import get_user_manager, get_auth_service, get_current_user
+from engine.base import Page
+from engine.utils import create_export_response
+from ..container import AuthContainer
+from ..depends import (
+    get_auth_container,
+    limit_login_attempts,
+    get_user_manager,
+    get_auth_service,
+    get_refresh_service,
+    require_permissions,
+)
 from ..domain import User
-from ..schemas.schemes import UserGenerate, UserUnHashedPass
+from ..permissions import Permission
+from ..repos.user_repo import stream_users
+from ..schemas.schemes import (
+    UserGenerate,
+    UserGenerateMany,
+    UserUnHashedPass,
+    UserExport,
+    UserFilters,
+    RefreshTokenRequest,
+)
 from ..services.auth_service import AuthService
+from ..services.refresh_service import RefreshTokenService
 from ..services.user_manager import UserManager
 
 router = APIRouter()
 
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(limit_login_attempts)])
 async def login(
     credentials: OAuth2PasswordRequestForm = Depends(),
     user_manager: UserManager = Depends(get_user_manager),
     auth_service: AuthService = Depends(get_auth_service),
+    refresh_service: RefreshTokenService = Depends(get_refresh_service),
+    container: AuthContainer = Depends(get_auth_container),
 ):
     user = await user_manager.authenticate(credentials)
 
@@ -27,31 +49,84 @@ async def login(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="LOGIN_BAD_CREDENTIALS",
         )
-    response = await auth_service.login(user)
+    await container.username_limiter.reset(credentials.username.lower())
+    refresh_token = await refresh_service.issue(user)
+    response = await auth_service.login(user, refresh_token)
 
     return response
 
 
-@router.post("/generate_user")
+@router.post("/refresh")
+async def refresh(
+    refresh_request: RefreshTokenRequest,
+    auth_service: AuthService = Depends(get_auth_service),
+    refresh_service: RefreshTokenService = Depends(get_refresh_service),
+):
+    """
+    Exchange a refresh token for a new token pair.
+    Unlike /login it needs no password hashing, only an indexed lookup.
+    """
+    user, refresh_token = await refresh_service.refresh(refresh_request.refresh_token)
+    return await auth_service.login(user, refresh_token)
+
+
+@router.post(
+    "/generate_user",
+    dependencies=[Depends(require_permissions(Permission.MANAGE_USERS))],
+)
 async def generate_user(
     user_generate: UserGenerate,
-    curr_user: Annotated[User, Depends(get_current_user)],
     user_manager: UserManager = Depends(get_user_manager),
 ) -> UserUnHashedPass:
-    if curr_user.role.name != "admin":
-        raise PermissionDenied
-
     return await user_manager.generate_user(user_generate)
 
 
-@router.get("/users")
+@router.post(
+    "/generate_users",
+    dependencies=[Depends(require_permissions(Permission.MANAGE_USERS))],
+)
+async def generate_users(
+    user_generate: UserGenerateMany,
+    user_manager: UserManager = Depends(get_user_manager),
+) -> list[UserUnHashedPass]:
+    return await user_manager.generate_users(user_generate)
+
+
+@router.get(
+    "/users", dependencies=[Depends(require_permissions(Permission.READ_USERS))]
+)
 async def get_users(
-    curr_user: Annotated[User, Depends(get_current_user)],
+    filters: Annotated[UserFilters, Query()],
     user_manager: UserManager = Depends(get_user_manager),
-):
-    if curr_user.role.name != "admin":
-        raise PermissionDenied
+) -> Page[UserExport]:
+    page = await user_manager.get_page(filters)
+    return Page[UserExport](
+        items=_user_exports(page.items), next_cursor=page.next_cursor
+    )
+
+
+@router.get(
+    "/users/export",
+    dependencies=[Depends(require_permissions(Permission.EXPORT_USERS))],
+)
+async def export_users(
+    export_format: Annotated[
+        Literal["ndjson", "json"], Query(alias="format")
+    ] = "ndjson",
+) -> StreamingResponse:
+    return create_export_response(_exported_users(stream_users()), export_format)
+
+
+async def _exported_users(
+    chunks: AsyncIterator[list[User]],
+) -> AsyncIterator[list[UserExport]]:
+    async for chunk in chunks:
+        yield _user_exports(chunk)
 
-    users = await user_manager.get_all()
 
-    return users
+def _user_exports(users: Iterable[User]) -> list[UserExport]:
+    # Read from our own database, no need to validate again.
+    return [
+        UserExport.model_construct(id=user.id, username=user.username, role=user.role)
+        for user in users
+    ]
@@ -0,0 +1,62 @@
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Query
+
+from ..depends import get_camera_owner_service, get_owned_camera_id
+from ..domain import CameraOwner
+from ..schemas.schemes import CameraOwnerCreate
+from ..services.camera_owner_service import CameraOwnerService
+
+router = APIRouter(prefix="/cameras")
+
+
+@router.get("", response_model=list[int])
+async def get_my_cameras(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+):
+    return await service.get_my_cameras()
+
+
+@router.get("/owners", response_model=list[int])
+async def get_my_owners(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+):
+    return await service.get_my_owners()
+
+
+@router.get("/by_owners", response_model=dict[int, list[int]])
+async def get_cameras_by_owners(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+    owner_id: Annotated[list[int], Query()],
+):
+    return await service.get_cameras(owner_id)
+
+
+@router.get("/by_cameras", response_model=dict[int, list[int]])
+async def get_owners_by_cameras(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+    camera_id: Annotated[list[int], Query()],
+):
+    return await service.get_owners(camera_id)
+
+
+@router.post("", response_model=CameraOwner)
+async def link_camera(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+    link: CameraOwnerCreate,
+):
+    return await service.link(link)
+
+
+@router.get("/{camera_id}/owned", response_model=bool)
+async def check_owned(camera_id: Annotated[int, Depends(get_owned_camera_id)]):
+    return True
+
+
+@router.delete("/{camera_id}/owners/{owner_id}", status_code=204)
+async def unlink_camera(
+    service: Annotated[CameraOwnerService, Depends(get_camera_owner_service)],
+    camera_id: int,
+    owner_id: int,
+):
+    await service.unlink(owner_id, camera_id)
@@ -1,7 +1,9 @@
-from typing import Annotated
+from typing import Annotated, Literal
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import StreamingResponse
 
+from engine.utils import create_export_response
 from ..depends import get_role_service
 from ..domain import Role
 from ..schemas.schemes import CreateRole, UpdateRole
@@ -29,6 +31,16 @@ async def get_my_role(roles_service: Annotated[RoleService, Depends(get_role_ser
     return await roles_service.get_my_role()
 
 
+@router.get("/export")
+async def export_roles(
+    roles_service: Annotated[RoleService, Depends(get_role_service)],
+    export_format: Annotated[
+        Literal["ndjson", "json"], Query(alias="format")
+    ] = "ndjson",
+) -> StreamingResponse:
+    return create_export_response(roles_service.stream_all(), export_format)
+
+
 @router.get("/{role_id}", response_model=Role)
 async def get_role(
     roles_service: Annotated[RoleService, Depends(get_role_service)], role_id: int
@@ -1,6 +1,9 @@
 from typing import Optional
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
+
+from engine.config import MAX_PAGE_SIZE
+from ..domain import Role
 
 
 class UserRead(BaseModel):
@@ -8,6 +11,14 @@ class UserRead(BaseModel):
     role_id: int
 
 
+class UserExport(BaseModel):
+    """User as returned by ``/users`` and its export, without the password hash."""
+
+    id: int
+    username: str
+    role: Role
+
+
 class UserCreate(BaseModel):
     username: str
     password: str
@@ -30,6 +41,11 @@ class UserGenerate(BaseModel):
     role_id: int
 
 
+class UserGenerateMany(BaseModel):
+    role_id: int
+    count: int = Field(gt=0, le=1000)
+
+
 class UserUnHashedPass(BaseModel):
     user_id: int
     username: str
@@ -39,8 +55,17 @@ class UserUnHashedPass(BaseModel):
 
 class UserFilters(BaseModel):
     role_id: Optional[int] = None
-    offset: Optional[int] = None
-    limit: Optional[int] = None
+    cursor: Optional[str] = None
+    limit: int = Field(default=MAX_PAGE_SIZE, gt=0, le=MAX_PAGE_SIZE)
+
+
+class RefreshTokenRequest(BaseModel):
+    refresh_token: str
+
+
+class CameraOwnerCreate(BaseModel):
+    owner_id: int
+    camera_id: int
 
 
 class CreateRole(BaseModel):
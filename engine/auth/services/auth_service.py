@@ -1,20 +1,25 @@
+import time
 from abc import ABC, abstractmethod
 from typing import Optional, Any
 
 from fastapi import Response
 from fastapi.responses import JSONResponse
-from jwt.exceptions import PyJWTError
 from pydantic import BaseModel
 
 from engine.utils import generate_jwt, decode_jwt
 from .. import exceptions
-from ..domain import User
+from ..domain import User, Principal, Role
+from ..keys import KeySet, JWTKey
+from ..role_registry import role_registry
 from ..services.user_manager import UserManager
+from ..token_cache import UserTokenCache
+from ..token_versions import token_versions
 
 
 class BearerResponse(BaseModel):
     access_token: str
     token_type: str
+    refresh_token: Optional[str] = None
 
 
 class BaseIdParser[ID](ABC):
@@ -36,34 +41,51 @@ class AuthService:
         algorithm: str = "HS256",
         public_key: Optional[str] = None,
         id_parser: Optional[BaseIdParser] = None,
+        token_cache: Optional[UserTokenCache] = None,
+        keys: Optional[KeySet] = None,
     ) -> None:
-        self._secret = secret
         self._lifetime_seconds = lifetime_seconds
         self._token_audience = token_audience or ["cam:auth"]
-        self._algorithm = algorithm
-        self._public_key = public_key
         self._id_parser = id_parser or IntParser()
+        self._token_cache = token_cache
+        self._keys = keys or KeySet(
+            [JWTKey(algorithm, private_key=secret, public_key=public_key)]
+        )
+
+    @property
+    def keys(self) -> KeySet:
+        return self._keys
 
     @property
-    def encode_key(self) -> str:
-        return self._secret
+    def encode_key(self) -> Any:
+        return self._keys.active.signing_key
 
     @property
-    def decode_key(self) -> str:
-        return self._public_key or self._secret
+    def decode_key(self) -> Any:
+        return self._keys.active.verifying_key
 
-    async def login(self, user: User) -> Response:
+    async def login(self, user: User, refresh_token: Optional[str] = None) -> Response:
         token = await self.write_token(user)
-        response_model = BearerResponse(access_token=token, token_type="bearer")
-        return JSONResponse(response_model.model_dump())
+        response_model = BearerResponse(
+            access_token=token, token_type="bearer", refresh_token=refresh_token
+        )
+        return JSONResponse(response_model.model_dump(exclude_none=True))
 
     async def write_token(self, user: User) -> str:
-        data = {"sub": str(user.id), "aud": self._token_audience}
+        data = {
+            "sub": str(user.id),
+            "aud": self._token_audience,
+            "role_id": user.role.id,
+            "role_name": user.role.name,
+            "ver": user.token_version,
+        }
+        key = self._keys.active
         return generate_jwt(
             data,
-            self.encode_key,
+            key.signing_key,
             lifetime_seconds=self._lifetime_seconds,
-            algorithm=self._algorithm,
+            algorithm=key.algorithm,
+            headers=key.headers,
         )
 
     async def read_token(
@@ -72,20 +94,108 @@ class AuthService:
         if token is None:
             return None
 
+        if self._token_cache is not None:
+            user = self._token_cache.get(token)
+            if user is not None:
+                return user
+
+        data = self._decode(token)
+        if data is None:
+            return None
+
         try:
-            data = decode_jwt(
-                token,
-                self.decode_key,
-                self._token_audience,
-                algorithms=[self._algorithm],
-            )
             user_id = self._id_parser.parse(data.get("sub"))
             if user_id is None:
                 return None
-        except PyJWTError:
+        except (TypeError, ValueError):
             return None
 
+        # Taken before the lookup, a user invalidated meanwhile is not cached.
+        generation = (
+            self._token_cache.generation() if self._token_cache is not None else None
+        )
         try:
-            return await user_manager.get(user_id)
+            user = await user_manager.get(user_id)
         except exceptions.UserNotExists:
             return None
+
+        if data.get("ver", 0) != user.token_version:
+            return None
+
+        # The id may belong to a new user by now.
+        if token_versions.issued_before_deletion(user_id, data.get("iat", 0)):
+            return None
+
+        if self._token_cache is not None:
+            self._token_cache.set(token, user, self._get_token_ttl(data), generation)
+
+        return user
+
+    def get_expiry(self, token: str) -> Optional[float]:
+        """``exp`` of a valid token, ``None`` if it has none or is invalid."""
+        data = self._decode(token)
+        if data is None:
+            return None
+
+        return data.get("exp")
+
+    def read_principal(self, token: Optional[str]) -> Optional[Principal]:
+        """
+        Stateless counterpart of ``read_token``: the principal is built
+        from the token claims, the role registry and the token versions.
+        Tokens without ``iat`` predate the deleted users tombstones and
+        are rejected.
+        """
+        if token is None:
+            return None
+
+        data = self._decode(token)
+        if data is None:
+            return None
+
+        try:
+            user_id = self._id_parser.parse(data.get("sub"))
+            role_id = int(data["role_id"])
+            version = int(data.get("ver", 0))
+            issued_at = int(data["iat"])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        if not token_versions.is_current(user_id, version, issued_at):
+            return None
+
+        role = role_registry.get(role_id)
+        if role is None:
+            if role_registry.loaded or "role_name" not in data:
+                return None
+            role = Role(id=role_id, name=data["role_name"])
+
+        return Principal(id=user_id, role=role, token_version=version)
+
+    def _decode(self, token: str) -> Optional[dict[str, Any]]:
+        key = self._keys.for_token(token)
+        if key is None:
+            return None
+
+        try:
+            return decode_jwt(
+                token,
+                key.verifying_key,
+                self._token_audience,
+                algorithms=[key.algorithm],
+            )
+        except Exception as exc:
+            # jwt is imported on first use, see engine.utils.
+            from jwt.exceptions import PyJWTError
+
+            if isinstance(exc, PyJWTError):
+                return None
+            raise
+
+    @staticmethod
+    def _get_token_ttl(data: dict[str, Any]) -> Optional[float]:
+        expire = data.get("exp")
+        if expire is None:
+            return None
+
+        return expire - time.time()
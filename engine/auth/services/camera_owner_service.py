@@ -0,0 +1,111 @@
+from typing import Optional
+
+from sqlalchemy.exc import IntegrityError
+
+from ..auth_sync import LINK_CHANGED, record_changes
+from ..domain import CameraOwner, Principal
+from ..exceptions import (
+    CameraOwnerAlreadyExists,
+    CameraOwnerDoesNotExist,
+    CameraOwnerUserDoesNotExist,
+)
+from ..ownership_cache import OwnershipCache
+from ..permissions import Permission, permission_table
+from ..repos.camera_owner_repo import CameraOwnerRepository
+from ..schemas.schemes import CameraOwnerCreate
+from engine.base import UnitOfWork
+
+
+class CameraOwnerService:
+    def __init__(
+        self,
+        camera_owner_repo: CameraOwnerRepository,
+        curr_user: Principal,
+        ownership_cache: Optional[OwnershipCache] = None,
+    ):
+        self.camera_owner_repo = camera_owner_repo
+        self.current_user = curr_user
+        self.ownership_cache = ownership_cache
+
+    async def is_owner(self, owner_id: int, camera_id: int) -> bool:
+        """Ownership check served from the cache, negative answers included."""
+        if self.ownership_cache is not None:
+            cached = self.ownership_cache.get(owner_id, camera_id)
+            if cached is not None:
+                return cached
+
+        is_owner = await self.camera_owner_repo.is_owner(owner_id, camera_id)
+        if self.ownership_cache is not None:
+            self.ownership_cache.set(owner_id, camera_id, is_owner)
+
+        return is_owner
+
+    async def get_my_cameras(self) -> list[int]:
+        self._check_perm(Permission.READ_OWN_CAMERAS)
+
+        cameras = await self.camera_owner_repo.get_cameras([self.current_user.id])
+        return cameras[self.current_user.id]
+
+    async def get_my_owners(self) -> list[int]:
+        self._check_perm(Permission.READ_OWN_CAMERAS)
+
+        owners = await self.camera_owner_repo.get_owners([self.current_user.id])
+        return owners[self.current_user.id]
+
+    async def get_cameras(self, owner_ids: list[int]) -> dict[int, list[int]]:
+        self._check_perm(Permission.READ_CAMERAS)
+
+        return await self.camera_owner_repo.get_cameras(owner_ids)
+
+    async def get_owners(self, camera_ids: list[int]) -> dict[int, list[int]]:
+        self._check_perm(Permission.READ_CAMERAS)
+
+        return await self.camera_owner_repo.get_owners(camera_ids)
+
+    async def link(self, link: CameraOwnerCreate) -> CameraOwner:
+        self._check_perm(Permission.MANAGE_CAMERAS)
+
+        try:
+            async with UnitOfWork(self.camera_owner_repo.session):
+                # SQLite does not enforce foreign keys, and the unique link is
+                # then the only constraint left to violate.
+                missing = await self.camera_owner_repo.get_missing_users(
+                    [link.owner_id, link.camera_id]
+                )
+                for user_id in (link.owner_id, link.camera_id):
+                    if user_id in missing:
+                        raise CameraOwnerUserDoesNotExist(
+                            link.owner_id, link.camera_id, user_id
+                        )
+                created = await self.camera_owner_repo.create(link.model_dump())
+                await record_changes(
+                    self.camera_owner_repo.session,
+                    LINK_CHANGED,
+                    [link.owner_id],
+                    link.camera_id,
+                )
+        except IntegrityError:
+            raise CameraOwnerAlreadyExists(link.owner_id, link.camera_id)
+
+        self._forget(link.owner_id, link.camera_id)
+        return created
+
+    async def unlink(self, owner_id: int, camera_id: int) -> None:
+        self._check_perm(Permission.MANAGE_CAMERAS)
+
+        async with UnitOfWork(self.camera_owner_repo.session):
+            deleted = await self.camera_owner_repo.delete_link(owner_id, camera_id)
+            if not deleted:
+                raise CameraOwnerDoesNotExist(owner_id, camera_id)
+            await record_changes(
+                self.camera_owner_repo.session, LINK_CHANGED, [owner_id], camera_id
+            )
+
+        self._forget(owner_id, camera_id)
+
+    def _check_perm(self, required: Permission) -> None:
+        permission_table.check(self.current_user, required)
+
+    def _forget(self, owner_id: int, camera_id: int) -> None:
+        if self.ownership_cache is not None:
+            self.ownership_cache.forget(owner_id, camera_id)
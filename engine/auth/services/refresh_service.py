@@ -0,0 +1,108 @@
+import hashlib
+import secrets
+import time
+
+from .user_manager import UserManager
+from ..domain import User, RefreshToken
+from ..exceptions import InvalidRefreshToken, UserNotExists
+from ..repos.refresh_tokens_repo import RefreshTokenRepository
+from engine.base import UnitOfWork
+
+
+class RefreshTokenService:
+    """
+    Opaque, rotating refresh tokens.
+
+    Every refresh revokes the presented token and issues a new one in the same
+    family. Presenting a token revoked more than ``reuse_grace`` seconds ago
+    means it leaked, so the whole family is revoked. A token revoked within
+    the grace window, or by a concurrent refresh of the same token, is only
+    rejected: that is a client retry, and the winner keeps its new token.
+    Tokens are random, so a sha256 lookup is enough to keep them hashed at rest.
+    """
+
+    def __init__(
+        self,
+        refresh_repo: RefreshTokenRepository,
+        user_manager: UserManager,
+        lifetime_seconds: int,
+        reuse_grace: int = 0,
+    ) -> None:
+        self.refresh_repo = refresh_repo
+        self.user_manager = user_manager
+        self.lifetime_seconds = lifetime_seconds
+        self.reuse_grace = reuse_grace
+
+    async def issue(self, user: User) -> str:
+        async with UnitOfWork(self.refresh_repo.session):
+            return await self._issue(user, secrets.token_hex(16))
+
+    async def refresh(self, token: str) -> tuple[User, str]:
+        """
+        Exchange a refresh token for its user and a new refresh token.
+
+        :raises InvalidRefreshToken: token is unknown, expired, reused or stale.
+        """
+        now = int(time.time())
+        async with UnitOfWork(self.refresh_repo.session):
+            stored = await self.refresh_repo.get_by_hash(self._hash(token))
+            if stored is None or stored.expires_at <= now:
+                raise InvalidRefreshToken
+
+            reused = stored.revoked and not self._in_grace(stored, now)
+            if reused:
+                await self.refresh_repo.revoke_family(stored.family_id, now)
+            elif not stored.revoked and await self.refresh_repo.revoke(stored.id, now):
+                user = await self._get_user(stored)
+                new_token = await self._issue(user, stored.family_id)
+            else:
+                # Lost to a concurrent refresh of the same token.
+                raise InvalidRefreshToken
+
+        if reused:
+            raise InvalidRefreshToken
+
+        return user, new_token
+
+    async def revoke_user(self, user_id: int) -> None:
+        async with UnitOfWork(self.refresh_repo.session):
+            await self.refresh_repo.revoke_user(user_id, int(time.time()))
+
+    def _in_grace(self, stored: RefreshToken, now: int) -> bool:
+        return (
+            stored.revoked_at is not None
+            and now - stored.revoked_at < self.reuse_grace
+        )
+
+    async def _get_user(self, stored: RefreshToken) -> User:
+        try:
+            user = await self.user_manager.get(stored.user_id)
+        except UserNotExists:
+            raise InvalidRefreshToken
+
+        # Password and role changes bump the version and end the session.
+        if user.token_version != stored.token_version:
+            raise InvalidRefreshToken
+
+        return user
+
+    async def _issue(self, user: User, family_id: str) -> str:
+        now = int(time.time())
+        token = secrets.token_urlsafe(32)
+
+        await self.refresh_repo.delete_expired(user.id, now)
+        await self.refresh_repo.create(
+            {
+                "token_hash": self._hash(token),
+                "user_id": user.id,
+                "family_id": family_id,
+                "token_version": user.token_version,
+                "expires_at": now + self.lifetime_seconds,
+                "revoked": False,
+            }
+        )
+        return token
+
+    @staticmethod
+    def _hash(token: str) -> str:
+        return hashlib.sha256(token.encode()).hexdigest()
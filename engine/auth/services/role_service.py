@@ -1,29 +1,41 @@
-from typing import Literal
+from typing import Literal, Optional, AsyncIterator
 
-from ..domain import User, Role
+from ..auth_sync import ROLE_CHANGED, record_changes
+from ..domain import Principal, Role
 from ..exceptions import RoleDoesNotExist, RoleAlreadyExists
-from ..repos.roles_repo import RoleRepository
+from ..repos.roles_repo import RoleRepository, stream_roles
+from ..permissions import Permission, permission_table
+from ..role_registry import role_registry
 from ..schemas.schemes import CreateRole, UpdateRole
-from engine.exceptions import PermissionDenied
+from ..token_cache import UserTokenCache
+from engine.base import UnitOfWork
 
 
 class RoleService:
     def __init__(
         self,
         role_repo: RoleRepository,
-        curr_user: User,
+        curr_user: Principal,
+        token_cache: Optional[UserTokenCache] = None,
     ):
         self.role_repo = role_repo
         self.current_user = curr_user
+        self.token_cache = token_cache
 
     async def create(self, role_create: CreateRole) -> Role:
         self._check_perm("create")
 
-        role = await self.role_repo.get_by_name(role_create.name)
-        if role is not None:
-            raise RoleAlreadyExists(role_create.name)
+        async with UnitOfWork(self.role_repo.session):
+            role = await self.role_repo.get_by_name(role_create.name)
+            if role is not None:
+                raise RoleAlreadyExists(role_create.name)
 
-        created_role = await self.role_repo.create(role_create.model_dump())
+            created_role = await self.role_repo.create(role_create.model_dump())
+            await record_changes(
+                self.role_repo.session, ROLE_CHANGED, [created_role.id]
+            )
+
+        role_registry.put(created_role)
         return created_role
 
     async def get(self, id_: int) -> Role:
@@ -45,27 +57,48 @@ class RoleService:
         roles = await self.role_repo.get_all()
         return roles
 
+    def stream_all(self) -> AsyncIterator[list[Role]]:
+        self._check_perm("get")
+
+        return stream_roles()
+
     async def update(self, id_: int, update_role: UpdateRole):
         self._check_perm("update")
 
-        role = await self.role_repo.get(id_)
-        if role is None:
-            raise RoleDoesNotExist(id_)
-        updated_role = await self.role_repo.update(role.id, update_role.model_dump())
+        async with UnitOfWork(self.role_repo.session):
+            role = await self.role_repo.get(id_)
+            if role is None:
+                raise RoleDoesNotExist(id_)
+            updated_role = await self.role_repo.update(
+                role.id, update_role.model_dump()
+            )
+            await record_changes(self.role_repo.session, ROLE_CHANGED, [role.id])
+
+        role_registry.put(updated_role)
+        self._invalidate_tokens(role.id)
 
         return updated_role
 
     async def delete(self, id_: int) -> Role:
         self._check_perm("delete")
 
-        role = await self.role_repo.get(id_)
+        async with UnitOfWork(self.role_repo.session):
+            role = await self.role_repo.get(id_)
 
-        if role is None:
-            raise RoleDoesNotExist(id_)
+            if role is None:
+                raise RoleDoesNotExist(id_)
+
+            await self.role_repo.delete(role.id)
+            await record_changes(self.role_repo.session, ROLE_CHANGED, [role.id])
 
-        await self.role_repo.delete(role.id)
+        role_registry.remove(role.id)
+        self._invalidate_tokens(role.id)
         return role
 
     def _check_perm(self, action: Literal["get", "update", "create", "delete"]):
-        if self.current_user.role.name != "admin" and action != "get":
-            raise PermissionDenied
+        required = Permission.READ_ROLES if action == "get" else Permission.MANAGE_ROLES
+        permission_table.check(self.current_user, required)
+
+    def _invalidate_tokens(self, role_id: int) -> None:
+        if self.token_cache is not None:
+            self.token_cache.invalidate_role(role_id)
@@ -1,16 +1,28 @@
+import asyncio
+import time
+from typing import Optional, Sequence
+
 from fastapi.security import OAuth2PasswordRequestForm
 
 from .. import exceptions
+from ..auth_sync import USER_CHANGED, record_changes
 from ..domain import User
 from ..exceptions import UserNotExists, RoleDoesNotExist
+from ..repos.refresh_tokens_repo import RefreshTokenRepository
 from ..repos.roles_repo import RoleRepository
 from ..repos.user_repo import UserRepository
 from ..schemas.schemes import (
     UserCreate,
     UserGenerate,
+    UserGenerateMany,
     UserUnHashedPass,
     UserUpdate,
+    UserFilters,
 )
+from ..token_cache import UserTokenCache
+from ..token_versions import token_versions
+from engine.base import UnitOfWork, Page
+from engine.exceptions import ObjectDoesNotExist
 from engine.utils import generate_alphanum_crypt_string
 from engine.utils import BasePasswordHelper
 
@@ -21,10 +33,14 @@ class UserManager:
         user_repo: UserRepository,
         role_repo: RoleRepository,
         password_helper: BasePasswordHelper,
+        token_cache: Optional[UserTokenCache] = None,
+        refresh_repo: Optional[RefreshTokenRepository] = None,
     ):
         self.user_repo = user_repo
         self.role_repo = role_repo
         self.password_helper = password_helper
+        self.token_cache = token_cache
+        self.refresh_repo = refresh_repo
 
     async def get(self, user_id: int) -> User:
         user = await self.user_repo.get(user_id)
@@ -37,6 +53,13 @@ class UserManager:
         users = await self.user_repo.get_all()
         return users
 
+    async def get_page(self, filters: UserFilters) -> Page[User]:
+        return await self.user_repo.get_page(
+            filters.limit,
+            filters.cursor,
+            **filters.model_dump(exclude_none=True, exclude={"limit", "cursor"}),
+        )
+
     async def get_by_username(self, username: str):
         user = await self.user_repo.get_by_username(username)
 
@@ -46,40 +69,124 @@ class UserManager:
         return user
 
     async def create(self, user: UserCreate) -> User:
-        role = await self.role_repo.get(user.role_id)
-        if role is None:
-            raise RoleDoesNotExist(user.role_id)
+        async with UnitOfWork(self.user_repo.session):
+            role = await self.role_repo.get(user.role_id)
+            if role is None:
+                raise RoleDoesNotExist(user.role_id)
 
-        existing_user = await self.user_repo.get_by_username(user.username)
+            existing_user = await self.user_repo.get_by_username(user.username)
 
-        if existing_user is not None:
-            raise exceptions.UserAlreadyExists
+            if existing_user is not None:
+                raise exceptions.UserAlreadyExists
 
-        user_dict = user.model_dump()
-        password = user_dict.pop("password")
-        user_dict["hashed_password"] = self.password_helper.hash(password)
+            user_dict = user.model_dump()
+            password = user_dict.pop("password")
+            user_dict["hashed_password"] = await self.password_helper.hash_async(
+                password
+            )
 
-        created_user = await self.user_repo.create(user_dict)
+            created_user = await self.user_repo.create(user_dict)
 
+        token_versions.set(created_user.id, created_user.token_version)
         return created_user
 
     async def update(self, user_id: int, user: UserUpdate) -> User:
-        existing_user = await self.user_repo.get(user_id)
-        if existing_user is None:
-            raise UserNotExists
+        async with UnitOfWork(self.user_repo.session):
+            update_dict = user.model_dump(exclude_none=True)
+            password = update_dict.pop("password", None)
+            if password is not None:
+                update_dict["hashed_password"] = await self.password_helper.hash_async(
+                    password
+                )
 
-        updated_user = await self.user_repo.update(
-            user_id, user.model_dump(exclude_none=True)
-        )
+            try:
+                updated_user = await self.user_repo.update(user_id, update_dict)
+            except ObjectDoesNotExist:
+                raise UserNotExists
+
+            # Issued tokens carry the password era and the role in their claims.
+            version = None
+            if update_dict.keys() & {"hashed_password", "role_id"}:
+                version = await self.user_repo.bump_token_version(user_id)
+                await self._revoke_refresh_tokens(user_id)
+                updated_user = updated_user.model_copy(
+                    update={"token_version": version}
+                )
+            await record_changes(self.user_repo.session, USER_CHANGED, [user_id])
+
+        if version is not None:
+            token_versions.set(user_id, version)
+        self._invalidate_tokens(user_id)
 
         return updated_user
 
     async def delete(self, username: int) -> None:
-        existing_user = await self.user_repo.get(username)
-        if existing_user is None:
-            raise UserNotExists
+        deleted_at = int(time.time())
+        async with UnitOfWork(self.user_repo.session):
+            if self.refresh_repo is not None:
+                await self.refresh_repo.delete_user_tokens(username)
+            try:
+                await self.user_repo.delete(username)
+            except ObjectDoesNotExist:
+                raise UserNotExists
+            await self.user_repo.record_deleted([username], deleted_at)
+            await record_changes(self.user_repo.session, USER_CHANGED, [username])
+
+        token_versions.delete(username, deleted_at)
+        self._invalidate_tokens(username)
+
+    async def update_many(
+        self, user_ids: Sequence[int], user: UserUpdate
+    ) -> list[User]:
+        """Apply the same update to all users, e.g. move them to another role."""
+        async with UnitOfWork(self.user_repo.session):
+            update_dict = user.model_dump(exclude_none=True)
+            password = update_dict.pop("password", None)
+            if password is not None:
+                update_dict["hashed_password"] = await self.password_helper.hash_async(
+                    password
+                )
+
+            try:
+                updated_users = await self.user_repo.update_many(user_ids, update_dict)
+            except ObjectDoesNotExist:
+                raise UserNotExists
+
+            versions: dict[int, int] = {}
+            if update_dict.keys() & {"hashed_password", "role_id"}:
+                versions = await self.user_repo.bump_token_versions(user_ids)
+                if self.refresh_repo is not None:
+                    await self.refresh_repo.revoke_users(user_ids, int(time.time()))
+                updated_users = [
+                    updated_user.model_copy(
+                        update={"token_version": versions[updated_user.id]}
+                    )
+                    for updated_user in updated_users
+                ]
+            await record_changes(self.user_repo.session, USER_CHANGED, user_ids)
 
-        await self.user_repo.delete(existing_user.id)
+        for user_id, version in versions.items():
+            token_versions.set(user_id, version)
+        for updated_user in updated_users:
+            self._invalidate_tokens(updated_user.id)
+
+        return updated_users
+
+    async def delete_many(self, user_ids: Sequence[int]) -> None:
+        deleted_at = int(time.time())
+        async with UnitOfWork(self.user_repo.session):
+            if self.refresh_repo is not None:
+                await self.refresh_repo.delete_users_tokens(user_ids)
+            try:
+                await self.user_repo.delete_many(user_ids)
+            except ObjectDoesNotExist:
+                raise UserNotExists
+            await self.user_repo.record_deleted(user_ids, deleted_at)
+            await record_changes(self.user_repo.session, USER_CHANGED, user_ids)
+
+        for user_id in user_ids:
+            token_versions.delete(user_id, deleted_at)
+            self._invalidate_tokens(user_id)
 
     async def reset_password(self, username: str) -> UserUnHashedPass:
         user = await self.get_by_username(username)
@@ -112,17 +219,57 @@ class UserManager:
 
         return generated_user
 
+    async def generate_users(
+        self, generate_scheme: UserGenerateMany
+    ) -> list[UserUnHashedPass]:
+        role = await self.role_repo.get(generate_scheme.role_id)
+        if role is None:
+            raise RoleDoesNotExist(generate_scheme.role_id)
+
+        credentials = [
+            (generate_alphanum_crypt_string(16), generate_alphanum_crypt_string(16))
+            for _ in range(generate_scheme.count)
+        ]
+        hashed_passwords = await asyncio.gather(
+            *(self.password_helper.hash_async(password) for _, password in credentials)
+        )
+
+        created_users = await self.user_repo.create_many(
+            [
+                {
+                    "username": username,
+                    "hashed_password": hashed_password,
+                    "role_id": role.id,
+                }
+                for (username, _), hashed_password in zip(credentials, hashed_passwords)
+            ]
+        )
+        for created_user in created_users:
+            token_versions.set(created_user.id, created_user.token_version)
+
+        return [
+            UserUnHashedPass(
+                user_id=created_user.id,
+                username=username,
+                password=password,
+                role=role.name,
+            )
+            for created_user, (username, password) in zip(created_users, credentials)
+        ]
+
     async def authenticate(self, credentials: OAuth2PasswordRequestForm):
         try:
             user = await self.get_by_username(credentials.username)
         except exceptions.UserNotExists:
             # Run the hasher to mitigate timing attack
             # Inspired from Django: https://code.djangoproject.com/ticket/20760
-            self.password_helper.hash(credentials.password)
+            await self.password_helper.hash_async(credentials.password)
             return None
 
-        verified, updated_password_hash = self.password_helper.verify_and_update(
-            credentials.password, user.hashed_password
+        verified, updated_password_hash = (
+            await self.password_helper.verify_and_update_async(
+                credentials.password, user.hashed_password
+            )
         )
         if not verified:
             return None
@@ -131,5 +278,14 @@ class UserManager:
             await self.user_repo.update(
                 user.id, {"hashed_password": updated_password_hash}
             )
+            self._invalidate_tokens(user.id)
 
         return user
+
+    async def _revoke_refresh_tokens(self, user_id: int) -> None:
+        if self.refresh_repo is not None:
+            await self.refresh_repo.revoke_user(user_id, int(time.time()))
+
+    def _invalidate_tokens(self, user_id: int) -> None:
+        if self.token_cache is not None:
+            self.token_cache.invalidate_user(user_id)
@@ -0,0 +1,99 @@
+import hashlib
+from typing import Optional
+
+from engine.cache import TTLCache
+from .domain import User
+
+
+class UserTokenCache:
+    """
+    Cache of already verified access tokens and the users they belong to.
+
+    Entries are keyed by a token fingerprint, so raw tokens are not kept in memory.
+    Every entry lives no longer than the token itself.
+
+    A user loaded while it is invalidated may be stale. Readers take
+    ``generation()`` before loading it and pass it to ``set``, which skips
+    users invalidated since then.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self._cache: TTLCache[bytes, User] = TTLCache(
+            maxsize, ttl, on_evict=self._forget
+        )
+        self._keys_by_user: dict[int, set[bytes]] = {}
+        # Generation of the last invalidation of each user. Forgotten ones
+        # raise the floor, which then applies to every user.
+        self._invalidated: TTLCache[int, int] = TTLCache(
+            maxsize, ttl, on_evict=self._forget_invalidation
+        )
+        self._generation = 0
+        self._floor = 0
+
+    def get(self, token: str) -> Optional[User]:
+        return self._cache.get(self._fingerprint(token))
+
+    def generation(self) -> int:
+        return self._generation
+
+    def set(
+        self,
+        token: str,
+        user: User,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        if generation is not None and self._invalidated_since(user.id, generation):
+            return
+
+        key = self._fingerprint(token)
+        self._cache.set(key, user, ttl)
+        if key in self._cache:
+            self._keys_by_user.setdefault(user.id, set()).add(key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._generation += 1
+        self._invalidated.set(user_id, self._generation)
+        for key in list(self._keys_by_user.get(user_id, ())):
+            self._cache.pop(key)
+
+    def invalidate_role(self, role_id: int) -> None:
+        user_ids = {
+            user.id for user in self._cache.values() if user.role.id == role_id
+        }
+        for user_id in user_ids:
+            self.invalidate_user(user_id)
+        # Users of the role that are being loaded are not known, skip them all.
+        self._generation += 1
+        self._raise_floor(self._generation)
+
+    def clear(self) -> None:
+        self._cache.clear()
+        self._generation += 1
+        self._raise_floor(self._generation)
+
+    def __len__(self) -> int:
+        return len(self._cache)
+
+    def _forget(self, key: bytes, user: User) -> None:
+        keys = self._keys_by_user.get(user.id)
+        if keys is None:
+            return
+
+        keys.discard(key)
+        if not keys:
+            del self._keys_by_user[user.id]
+
+    def _invalidated_since(self, user_id: int, generation: int) -> bool:
+        invalidated = self._invalidated.get(user_id)
+        return max(invalidated or 0, self._floor) > generation
+
+    def _forget_invalidation(self, user_id: int, generation: int) -> None:
+        self._raise_floor(generation)
+
+    def _raise_floor(self, generation: int) -> None:
+        self._floor = max(self._floor, generation)
+
+    @staticmethod
+    def _fingerprint(token: str) -> bytes:
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
@@ -0,0 +1,82 @@
+from typing import Iterable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from .models import UserORMModel, DeletedUserORMModel
+
+
+class TokenVersions:
+    """
+    In-process copy of ``users.token_version`` and of the deleted users.
+
+    Only users whose tokens were revoked at least once are kept, everyone else
+    is at version 0. A token is valid only while its ``ver`` claim matches and
+    if it was issued after the last deletion of its user id.
+    """
+
+    def __init__(self) -> None:
+        self._versions: dict[int, int] = {}
+        self._deleted: dict[int, int] = {}
+        self.loaded = False
+
+    async def load(self, session: AsyncSession) -> None:
+        res = await session.execute(
+            select(UserORMModel.id, UserORMModel.token_version).where(
+                UserORMModel.token_version != 0
+            )
+        )
+        versions = dict(res.tuples().all())
+        res = await session.execute(
+            select(DeletedUserORMModel.user_id, DeletedUserORMModel.deleted_at)
+        )
+        self._deleted = dict(res.tuples().all())
+        self._versions = versions
+        self.loaded = True
+
+    async def load_users(self, session: AsyncSession, user_ids: Iterable[int]) -> None:
+        """Reload only ``user_ids``, after another process changed them."""
+        user_ids = set(user_ids)
+        res = await session.execute(
+            select(UserORMModel.id, UserORMModel.token_version).where(
+                UserORMModel.id.in_(user_ids)
+            )
+        )
+        versions = dict(res.tuples().all())
+        res = await session.execute(
+            select(DeletedUserORMModel.user_id, DeletedUserORMModel.deleted_at).where(
+                DeletedUserORMModel.user_id.in_(user_ids)
+            )
+        )
+        deleted = dict(res.tuples().all())
+        for user_id in user_ids:
+            self.set(user_id, versions.get(user_id, 0))
+            if user_id in deleted:
+                self._deleted[user_id] = deleted[user_id]
+
+    def get(self, user_id: int) -> int:
+        return self._versions.get(user_id, 0)
+
+    def set(self, user_id: int, version: int) -> None:
+        if version == 0:
+            self._versions.pop(user_id, None)
+        else:
+            self._versions[user_id] = version
+
+    def delete(self, user_id: int, deleted_at: int) -> None:
+        # A new user may get the same id, it starts at version 0.
+        self._versions.pop(user_id, None)
+        self._deleted[user_id] = deleted_at
+
+    def issued_before_deletion(self, user_id: int, issued_at: int) -> bool:
+        deleted_at = self._deleted.get(user_id)
+        return deleted_at is not None and issued_at <= deleted_at
+
+    def is_current(self, user_id: int, version: int, issued_at: int) -> bool:
+        if self.issued_before_deletion(user_id, issued_at):
+            return False
+
+        return self._versions.get(user_id, 0) == version
+
+
+token_versions = TokenVersions()
@@ -1,11 +1,372 @@
+import base64
+import functools
+import json
+import operator
+import types
+import typing
 from abc import ABC, abstractmethod
-from typing import Any, Type, Iterable, Callable, Optional
-
-from pydantic import BaseModel
-from sqlalchemy import select, Select
+from typing import (
+    Any,
+    Hashable,
+    Type,
+    Iterable,
+    Callable,
+    Optional,
+    Sequence,
+    AsyncIterator,
+)
+
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import (
+    select,
+    Select,
+    insert,
+    update,
+    delete,
+    inspect,
+    and_,
+    or_,
+    bindparam,
+    Executable,
+    Column,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from .exceptions import ObjectDoesNotExist
+from .config import MAX_PAGE_SIZE
+from .exceptions import ObjectDoesNotExist, InvalidCursor
+
+
+class Page[Obj](BaseModel):
+    items: list[Obj]
+    next_cursor: Optional[str] = None
+
+
+PAGE_ORDER_TYPES = (int, float, str)
+
+
+def _python_type(column: Column) -> Optional[type]:
+    try:
+        return column.type.python_type
+    except NotImplementedError:
+        return None
+
+
+def encode_cursor(values: list[Any]) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise InvalidCursor(cursor)
+
+    # Values end up as query parameters, only scalars are accepted.
+    if not isinstance(values, list) or not all(
+        value is None or type(value) in (str, int, float) for value in values
+    ):
+        raise InvalidCursor(cursor)
+
+    return values
+
+
+class DomainMapper[DomainObj: BaseModel]:
+    """
+    Builds domain objects from ORM rows without running validation.
+
+    Only use it for rows read from our own database. Plain fields are read with
+    a precompiled getter per ORM class, nested models (``Model``,
+    ``Optional[Model]`` and ``list[Model]``) are built once per distinct
+    related row within a ``map_many`` call. Other fields holding models, e.g.
+    ``dict[str, Model]``, are validated. ``factories`` build single fields
+    from the whole ORM object instead.
+    """
+
+    def __init__(
+        self,
+        domain_obj: Type[DomainObj],
+        factories: Optional[dict[str, Callable[[Any], Any]]] = None,
+    ) -> None:
+        if not domain_obj.__pydantic_complete__:
+            domain_obj.model_rebuild()
+
+        self.domain_obj = domain_obj
+        self._factories = dict(factories or {})
+        self._nested: dict[str, DomainMapper] = {}
+        self._nested_lists: dict[str, DomainMapper] = {}
+        self._validated: dict[str, TypeAdapter] = {}
+        plain = []
+        for name, field in domain_obj.model_fields.items():
+            if name in self._factories:
+                continue
+            model, is_list = _nested_model(field.annotation)
+            if model is not None:
+                nested = self._nested_lists if is_list else self._nested
+                nested[name] = get_domain_mapper(model)
+            elif _holds_model(field.annotation):
+                self._validated[name] = TypeAdapter(field.annotation)
+            else:
+                plain.append(name)
+
+        self._plain = tuple(plain)
+        self._plans: dict[type, tuple[Callable, Callable, tuple[str, ...]]] = {}
+        # Models with private attributes need model_construct to set them up.
+        self._fast = not domain_obj.__private_attributes__
+
+    def map(self, orm_obj: Any, memo: Optional[dict[int, Any]] = None) -> DomainObj:
+        read, read_attrs, missing = self._plan(type(orm_obj))
+        try:
+            values = read(orm_obj)
+        except KeyError:
+            # Expired or deferred columns are not in __dict__, let the ORM load them.
+            values = read_attrs(orm_obj)
+
+        for name, mapper in self._nested.items():
+            value = getattr(orm_obj, name)
+            if value is not None:
+                value = mapper._map_related(value, memo)
+            values[name] = value
+
+        for name, mapper in self._nested_lists.items():
+            value = getattr(orm_obj, name)
+            if value is not None:
+                value = [mapper._map_related(item, memo) for item in value]
+            values[name] = value
+
+        for name, adapter in self._validated.items():
+            values[name] = adapter.validate_python(
+                getattr(orm_obj, name), from_attributes=True
+            )
+
+        for name, factory in self._factories.items():
+            values[name] = factory(orm_obj)
+
+        if missing or not self._fast:
+            return self.domain_obj.model_construct(**values)
+
+        obj = self.domain_obj.__new__(self.domain_obj)
+        object.__setattr__(obj, "__dict__", values)
+        object.__setattr__(obj, "__pydantic_fields_set__", set(values))
+        object.__setattr__(obj, "__pydantic_extra__", None)
+        object.__setattr__(obj, "__pydantic_private__", None)
+        return obj
+
+    def map_many(self, orm_objs: Iterable[Any]) -> list[DomainObj]:
+        memo = {}
+        return [self.map(orm_obj, memo) for orm_obj in orm_objs]
+
+    def _map_related(self, orm_obj: Any, memo: Optional[dict[int, Any]]) -> DomainObj:
+        if memo is None:
+            return self.map(orm_obj)
+
+        key = id(orm_obj)
+        if key not in memo:
+            memo[key] = self.map(orm_obj, memo)
+        return memo[key]
+
+    def _plan(self, orm_class: type) -> tuple[Callable, Callable, tuple[str, ...]]:
+        plan = self._plans.get(orm_class)
+        if plan is None:
+            plan = self._plans[orm_class] = self._compile(orm_class)
+
+        return plan
+
+    def _compile(self, orm_class: type) -> tuple[Callable, Callable, tuple[str, ...]]:
+        """
+        Build a reader that copies loaded columns straight from the instance
+        ``__dict__``, bypassing attribute instrumentation.
+        """
+        orm_mapper = inspect(orm_class, raiseerr=False)
+        columns = set(orm_mapper.column_attrs.keys()) if orm_mapper else set()
+
+        names = [name for name in self._plain if hasattr(orm_class, name)]
+        # Fields missing on the ORM class are left to model defaults.
+        missing = tuple(name for name in self._plain if name not in names)
+
+        column_names = tuple(name for name in names if name in columns)
+        other_names = tuple(name for name in names if name not in columns)
+        get_columns = _tuple_getter(operator.itemgetter, column_names)
+        get_others = _tuple_getter(operator.attrgetter, other_names)
+        keys = column_names + other_names
+
+        def read(obj: Any) -> dict[str, Any]:
+            return dict(zip(keys, get_columns(obj.__dict__) + get_others(obj)))
+
+        def read_attrs(obj: Any) -> dict[str, Any]:
+            return {name: getattr(obj, name) for name in names}
+
+        return read, read_attrs, missing
+
+
+def _nested_model(annotation: Any) -> tuple[Optional[Type[BaseModel]], bool]:
+    """Model of a ``Model``, ``Optional[Model]`` or ``list[Model]`` field."""
+    if typing.get_origin(annotation) in (typing.Union, types.UnionType):
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if len(args) != 1:
+            return None, False
+        annotation = args[0]
+
+    is_list = typing.get_origin(annotation) is list
+    if is_list:
+        (annotation,) = typing.get_args(annotation) or (Any,)
+
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return annotation, is_list
+
+    return None, False
+
+
+def _holds_model(annotation: Any) -> bool:
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return True
+
+    return any(_holds_model(arg) for arg in typing.get_args(annotation))
+
+
+def _tuple_getter(
+    getter: Callable[..., Callable[[Any], Any]], names: tuple[str, ...]
+) -> Callable[[Any], tuple]:
+    """``itemgetter``/``attrgetter`` of ``names`` that always returns a tuple."""
+    if not names:
+        return lambda obj: ()
+
+    if len(names) == 1:
+        get_one = getter(names[0])
+        return lambda obj: (get_one(obj),)
+
+    return getter(*names)
+
+
+@functools.cache
+def get_domain_mapper(domain_obj: Type[BaseModel]) -> DomainMapper:
+    return DomainMapper(domain_obj)
+
+
+class StatementCache:
+    """
+    Statements built once and shared by all repository instances.
+
+    A statement object memoizes its SQLAlchemy cache key, so reusing it skips
+    both building the statement and computing the key on every call. Values
+    are passed as bound parameters, and the compiled SQL comes from the
+    engine's compiled cache (see ``DATABASE_QUERY_CACHE_SIZE``).
+    """
+
+    def __init__(self) -> None:
+        self._statements: dict[Hashable, Executable] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, build: Callable[[], Executable]) -> Executable:
+        statement = self._statements.get(key)
+        if statement is None:
+            self.misses += 1
+            statement = self._statements[key] = build()
+        else:
+            self.hits += 1
+
+        return statement
+
+    def stats(self) -> dict[str, int]:
+        return {"size": len(self._statements), "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        self._statements.clear()
+        self.hits = 0
+        self.misses = 0
+
+
+statement_cache = StatementCache()
+
+
+class UnitOfWork:
+    """
+    Groups repository writes made on one session into a single transaction.
+
+    Inside the block repositories only flush their changes. The outermost
+    block commits on success and rolls back on error, so blocks can be nested.
+    Objects loaded inside the block are kept in the identity map until it ends,
+    so later relationship loads can be served from memory.
+    """
+
+    _DEPTH_KEY = "unit_of_work_depth"
+    _OBJECTS_KEY = "unit_of_work_objects"
+
+    def __init__(self, session: AsyncSession) -> None:
+        self.session = session
+
+    async def __aenter__(self) -> "UnitOfWork":
+        self.session.info[self._DEPTH_KEY] = (
+            self.session.info.get(self._DEPTH_KEY, 0) + 1
+        )
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        depth = self.session.info[self._DEPTH_KEY] - 1
+        self.session.info[self._DEPTH_KEY] = depth
+        if depth:
+            return
+
+        self.session.info.pop(self._OBJECTS_KEY, None)
+        if exc_type is None:
+            await self.session.commit()
+        else:
+            await self.session.rollback()
+
+    @classmethod
+    def is_active(cls, session: AsyncSession) -> bool:
+        return session.info.get(cls._DEPTH_KEY, 0) > 0
+
+    @classmethod
+    def keep(cls, session: AsyncSession, obj: Any) -> None:
+        if obj is not None and cls.is_active(session):
+            session.info.setdefault(cls._OBJECTS_KEY, []).append(obj)
+
+
+async def commit_or_flush(session: AsyncSession) -> None:
+    if UnitOfWork.is_active(session):
+        await session.flush()
+    else:
+        await session.commit()
+
+
+async def load_unloaded(
+    session: AsyncSession, obj: Any, exclude: Iterable[str] = ()
+) -> None:
+    """
+    Load only attributes missing from ``obj`` instead of a full refresh.
+
+    Many-to-one relationships are resolved through the identity map when the
+    related object is already in the session, which costs no query.
+    """
+    state = inspect(obj)
+    unloaded = state.unloaded.difference(exclude)
+    if not unloaded:
+        return
+
+    relationships = state.mapper.relationships
+    columns = [key for key in unloaded if key not in relationships]
+    if columns:
+        await session.refresh(obj, attribute_names=columns)
+
+    for key in unloaded:
+        if key in relationships:
+            await getattr(obj.awaitable_attrs, key)
+
+
+def expire_stale_relationships(
+    session: AsyncSession, obj: Any, changed: Iterable[str]
+) -> None:
+    changed = set(changed)
+    stale = [
+        relationship.key
+        for relationship in inspect(obj).mapper.relationships
+        if any(column.key in changed for column in relationship.local_columns)
+    ]
+    if stale:
+        session.expire(obj, stale)
 
 
 class RepositoryProtocol[Obj, ID](ABC):
@@ -46,21 +407,22 @@ class SQLAlchemyRepository[ORMObj, ID](RepositoryProtocol[ORMObj, ID]):
     async def create(self, create_dict: dict[str, Any]) -> ORMObj:
         user = self.table(**create_dict)
         self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
+        await commit_or_flush(self.session)
+        await load_unloaded(self.session, user)
         return user
 
     async def delete(self, obj: ORMObj) -> ORMObj:
         await self.session.delete(obj)
-        await self.session.commit()
+        await commit_or_flush(self.session)
         return obj
 
     async def update(self, obj: ORMObj, new_values: dict[str, Any]) -> ORMObj:
         for key, value in new_values.items():
             setattr(obj, key, value)
         self.session.add(obj)
-        await self.session.commit()
-        await self.session.refresh(obj)
+        await commit_or_flush(self.session)
+        expire_stale_relationships(self.session, obj, new_values)
+        await load_unloaded(self.session, obj)
         return obj
 
     def _create_get_all_stmt(
@@ -78,15 +440,19 @@ class SQLAlchemyRepository[ORMObj, ID](RepositoryProtocol[ORMObj, ID]):
 class NewSQLAlchemyRepository[DomainObj: BaseModel, ORMObj, ID](
     RepositoryProtocol[ORMObj, ID]
 ):
+    max_page_size: int = MAX_PAGE_SIZE
+
     def __init__(
         self,
         domain_obj: Type[DomainObj] = BaseModel,
         table: Type[ORMObj] = None,
         session: AsyncSession = None,
+        mapper: Optional[DomainMapper[DomainObj]] = None,
     ) -> None:
         self.domain_obj = domain_obj
         self.table = table
         self.session = session
+        self.mapper = mapper
 
     async def get(self, id_obj: ID) -> Optional[DomainObj]:
         res = await self._get_orm_model(id_obj)
@@ -94,34 +460,81 @@ class NewSQLAlchemyRepository[DomainObj: BaseModel, ORMObj, ID](
         if res is None:
             return None
 
-        return self.domain_obj.model_validate(res)
+        return self._to_domain(res)
 
     async def get_all(self, **filters: Any) -> list[DomainObj]:
         stmt = self._create_get_all_stmt(**filters)
         res = await self.session.execute(stmt)
 
-        return [self.domain_obj.model_validate(scalar) for scalar in res.scalars()]
+        return self._to_domain_many(res.scalars())
+
+    async def stream_all(
+        self, chunk_size: int = 1000, **filters: Any
+    ) -> AsyncIterator[list[DomainObj]]:
+        """
+        Yield all matching objects ordered by id, ``chunk_size`` at a time.
+
+        Rows are fetched through a server side cursor, so memory use does not
+        depend on the table size.
+        """
+        stmt = (
+            self._create_get_all_stmt(**filters)
+            .order_by(self.table.id)
+            .execution_options(yield_per=chunk_size)
+        )
+        res = await self.session.stream_scalars(stmt)
+
+        async for partition in res.partitions():
+            yield self._to_domain_many(partition)
+
+    async def get_page(
+        self,
+        limit: int,
+        cursor: Optional[str] = None,
+        order_by: str = "id",
+        **filters: Any,
+    ) -> Page[DomainObj]:
+        """
+        Keyset pagination ordered by ``order_by`` and then by id.
+
+        ``cursor`` is the opaque ``next_cursor`` of the previous page.
+        ``limit`` is capped by ``max_page_size``.
+        """
+        limit = max(1, min(limit, self.max_page_size))
+        stmt = self._create_page_stmt(limit + 1, cursor, order_by, **filters)
+        res = await self.session.execute(stmt)
+        objs = list(res.unique().scalars())
+
+        next_cursor = None
+        if len(objs) > limit:
+            objs = objs[:limit]
+            last = objs[-1]
+            next_cursor = encode_cursor([order_by, getattr(last, order_by), last.id])
+
+        return Page(
+            items=self._to_domain_many(objs),
+            next_cursor=next_cursor,
+        )
 
     async def create(self, create_dict: dict[str, Any]) -> DomainObj:
         obj = await self._create(create_dict)
 
-        await self.session.commit()
-        await self.session.refresh(obj)
+        await commit_or_flush(self.session)
+        await self._load_unloaded(obj)
 
-        return self.domain_obj.model_validate(obj)
+        return self._to_domain(obj)
 
     async def delete(self, id_: ID) -> DomainObj:
         obj_to_del = await self._get_orm_model(id_)
         if obj_to_del:
             await self.session.delete(obj_to_del)
-            await self.session.commit()
-            return self.domain_obj.model_validate(obj_to_del)
+            await commit_or_flush(self.session)
+            return self._to_domain(obj_to_del)
 
         raise ObjectDoesNotExist(self.domain_obj.__name__, id_)
 
     async def update(self, id_: ID, new_values: dict[str, Any]) -> DomainObj:
         obj = await self._get_orm_model(id_)
-        print(obj)
         if obj is None:
             raise ObjectDoesNotExist(self.domain_obj.__name__, id_)
 
@@ -129,20 +542,168 @@ class NewSQLAlchemyRepository[DomainObj: BaseModel, ORMObj, ID](
             setattr(obj, key, value)
         self.session.add(obj)
 
-        await self.session.commit()
-        await self.session.refresh(obj)
+        await commit_or_flush(self.session)
+        expire_stale_relationships(self.session, obj, new_values)
+        await self._load_unloaded(obj)
+
+        return self._to_domain(obj)
+
+    async def create_many(self, create_dicts: list[dict[str, Any]]) -> list[DomainObj]:
+        """Insert all rows with one executemany statement and a single commit."""
+        if not create_dicts:
+            return []
 
-        return self.domain_obj.model_validate(obj)
+        ids = await self._insert_many(create_dicts)
+        await commit_or_flush(self.session)
+
+        return await self._get_many(ids)
+
+    async def update_many(
+        self, ids: Sequence[ID], new_values: dict[str, Any]
+    ) -> list[DomainObj]:
+        """Apply the same values to all objects with ``UPDATE ... WHERE id IN (...)``."""
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+        if not new_values:
+            # Nothing to set, an UPDATE without values is invalid SQL.
+            return await self._get_existing_many(ids)
+
+        stmt = update(self.table).where(self.table.id.in_(ids)).values(**new_values)
+        res = await self.session.execute(stmt)
+        if res.rowcount != len(ids):
+            if not UnitOfWork.is_active(self.session):
+                await self.session.rollback()
+            raise ObjectDoesNotExist(
+                object_id=ids, object_class_name=self.domain_obj.__name__
+            )
+
+        await commit_or_flush(self.session)
+
+        return await self._get_many(ids)
+
+    async def delete_many(self, ids: Sequence[ID]) -> list[DomainObj]:
+        ids = list(dict.fromkeys(ids))
+        if not ids:
+            return []
+
+        objs = await self._get_existing_many(ids)
+        await self.session.execute(delete(self.table).where(self.table.id.in_(ids)))
+        await commit_or_flush(self.session)
+
+        return objs
 
     async def _create(self, create_dict: dict[str, Any]):
         obj = self.table(**create_dict)
         self.session.add(obj)
         return obj
 
+    async def _insert_many(self, create_dicts: list[dict[str, Any]]) -> list[ID]:
+        stmt = insert(self.table)
+        # The engine the insert runs on, a session may have several binds.
+        dialect = self.session.get_bind(clause=stmt).dialect
+        if dialect.insert_executemany_returning_sort_by_parameter_order:
+            stmt = stmt.returning(self.table.id, sort_by_parameter_order=True)
+            res = await self.session.execute(stmt, create_dicts)
+            return list(res.scalars())
+
+        objs = [self.table(**create_dict) for create_dict in create_dicts]
+        self.session.add_all(objs)
+        await self.session.flush()
+        return [obj.id for obj in objs]
+
+    async def _get_many(self, ids: Sequence[ID]) -> list[DomainObj]:
+        stmt = (
+            select(self.table)
+            .where(self.table.id.in_(ids))
+            .execution_options(populate_existing=True)
+        )
+        res = await self.session.execute(stmt)
+        objs = {obj.id: obj for obj in res.unique().scalars()}
+
+        return self._to_domain_many(objs[id_] for id_ in ids if id_ in objs)
+
+    async def _load_unloaded(self, obj: ORMObj) -> None:
+        await load_unloaded(self.session, obj)
+
+    def _to_domain(self, orm_obj: ORMObj) -> DomainObj:
+        if self.mapper is not None:
+            return self.mapper.map(orm_obj)
+
+        return self.domain_obj.model_validate(orm_obj)
+
+    async def _get_existing_many(self, ids: list[ID]) -> list[DomainObj]:
+        objs = await self._get_many(ids)
+        if len(objs) != len(ids):
+            missing = set(ids) - {obj.id for obj in objs}
+            raise ObjectDoesNotExist(
+                object_id=sorted(missing), object_class_name=self.domain_obj.__name__
+            )
+
+        return objs
+
+    def _to_domain_many(self, orm_objs: Iterable[ORMObj]) -> list[DomainObj]:
+        if self.mapper is not None:
+            return self.mapper.map_many(orm_objs)
+
+        return [self.domain_obj.model_validate(orm_obj) for orm_obj in orm_objs]
+
+    def _create_page_stmt(
+        self, limit: int, cursor: Optional[str], order_by: str, **filters: Any
+    ) -> Select:
+        column = self.table.__table__.columns.get(order_by)
+        # Cursors hold the last value as JSON and compare it with ">",
+        # NULLs and other types would skip or repeat rows.
+        if (
+            column is None
+            or column.nullable
+            or _python_type(column) not in PAGE_ORDER_TYPES
+        ):
+            raise ValueError(f"Can not order {self.table.__name__} by '{order_by}'.")
+
+        id_column = self.table.id
+        column = getattr(self.table, order_by)
+        stmt = select(self.table).filter_by(**filters)
+
+        if cursor is not None:
+            values = decode_cursor(cursor)
+            if len(values) != 3 or values[0] != order_by or values[2] is None:
+                raise InvalidCursor(cursor)
+            _, last_value, last_id = values
+
+            if order_by == "id":
+                stmt = stmt.where(id_column > last_id)
+            else:
+                stmt = stmt.where(
+                    or_(
+                        column > last_value,
+                        and_(column == last_value, id_column > last_id),
+                    )
+                )
+
+        if order_by == "id":
+            stmt = stmt.order_by(id_column)
+        else:
+            stmt = stmt.order_by(column, id_column)
+
+        return stmt.limit(limit)
+
     async def _get_orm_model(self, id_obj: ID) -> ORMObj:
-        statement = select(self.table).where(self.table.id == id_obj)
-        res = await self.session.execute(statement)
-        return res.scalar_one_or_none()
+        statement = self._statement("get", self._build_get_stmt)
+        res = await self.session.execute(statement, {"id": id_obj})
+        obj = res.scalar_one_or_none()
+        UnitOfWork.keep(self.session, obj)
+        return obj
+
+    def _build_get_stmt(self) -> Select:
+        return select(self.table).where(self.table.id == bindparam("id"))
+
+    def _statement(self, name: str, build: Callable[[], Executable]) -> Executable:
+        """
+        Statement ``name`` of this table, built by ``build`` on first use only.
+        Values must be bound parameters, passed when the statement is executed.
+        """
+        return statement_cache.get((self.table, name), build)
 
     def _create_get_all_stmt(
         self, offset: int = None, limit: int = None, **filters: Any
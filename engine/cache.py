@@ -0,0 +1,76 @@
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+
+class TTLCache[K, V]:
+    """
+    Bounded in-process cache with per-entry expiry and LRU eviction.
+
+    :param maxsize: maximum number of entries kept, the least recently used one is evicted first.
+    :param ttl: default entry lifetime in seconds.
+    :param on_evict: called with key and value whenever an entry leaves the cache.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        on_evict: Optional[Callable[[K, V], None]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._on_evict = on_evict
+        self._timer = timer
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+
+    def get(self, key: K) -> Optional[V]:
+        item = self._data.get(key)
+        if item is None:
+            return None
+
+        expires_at, value = item
+        if expires_at <= self._timer():
+            self.pop(key)
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: K, value: V, ttl: Optional[float] = None) -> None:
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0 or self.maxsize <= 0:
+            return
+
+        self._data[key] = (self._timer() + ttl, value)
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            old_key, (_, old_value) = self._data.popitem(last=False)
+            self._evicted(old_key, old_value)
+
+    def pop(self, key: K) -> Optional[V]:
+        item = self._data.pop(key, None)
+        if item is None:
+            return None
+
+        self._evicted(key, item[1])
+        return item[1]
+
+    def values(self) -> list[V]:
+        return [value for _, value in self._data.values()]
+
+    def clear(self) -> None:
+        for key in list(self._data):
+            self.pop(key)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: K) -> bool:
+        return self.get(key) is not None
+
+    def _evicted(self, key: K, value: V) -> None:
+        if self._on_evict is not None:
+            self._on_evict(key, value)
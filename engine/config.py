@@ -1,2 +1,87 @@
+import os
+
+
+def _getenv_bool(name: str, default: bool = False) -> bool:
+    return os.getenv(name, str(default)).lower() in ("1", "true", "yes")
+
+
 SECRET = "SECRET"
 JWT_LIFETIME = "10000"
+REFRESH_TOKEN_LIFETIME = int(os.getenv("REFRESH_TOKEN_LIFETIME", str(30 * 24 * 3600)))
+# A rotated refresh token presented again within this many seconds is a client
+# retry or a concurrent refresh, not a leak, and does not revoke its family.
+REFRESH_TOKEN_REUSE_GRACE = int(os.getenv("REFRESH_TOKEN_REUSE_GRACE", "10"))
+JWT_ALGORITHM = os.getenv("JWT_ALGORITHM", "HS256")
+# Directory of <kid>.pem keys, needed by asymmetric algorithms (RS256, ES256, EdDSA).
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID")
+# Authenticate requests from token claims only, without loading the user.
+STATELESS_AUTH = _getenv_bool("STATELESS_AUTH")
+
+TOKEN_CACHE_SIZE = 10000
+TOKEN_CACHE_TTL = 60
+
+OWNERSHIP_CACHE_SIZE = 10000
+OWNERSHIP_CACHE_TTL = 60
+
+# Seconds between checks for role, user and camera link changes made by other
+# workers, only the changed entries are reloaded. Not checked with one worker.
+AUTH_SYNC_INTERVAL = float(os.getenv("AUTH_SYNC_INTERVAL", "1"))
+# Seconds the changes are kept for the other workers. One that did not check
+# for longer reloads everything.
+AUTH_CHANGES_MAX_AGE = 3600
+
+# /login attempts allowed per window, checked before any password hashing.
+LOGIN_RATE_LIMIT_USERNAME = int(os.getenv("LOGIN_RATE_LIMIT_USERNAME", "5"))
+LOGIN_RATE_LIMIT_IP = int(os.getenv("LOGIN_RATE_LIMIT_IP", "20"))
+LOGIN_RATE_LIMIT_WINDOW = int(os.getenv("LOGIN_RATE_LIMIT_WINDOW", "60"))
+RATE_LIMIT_MAX_KEYS = 100000
+
+# "thread" or "process" pool for Argon2 hashing.
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(
+    os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 1))
+)
+PASSWORD_HASH_MAX_CONCURRENCY = int(
+    os.getenv("PASSWORD_HASH_MAX_CONCURRENCY", str(os.cpu_count() or 1))
+)
+
+DATABASE_URL = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///mydatabase.db")
+DATABASE_ECHO = _getenv_bool("DATABASE_ECHO")
+DATABASE_POOL_SIZE = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+DATABASE_MAX_OVERFLOW = int(os.getenv("DATABASE_MAX_OVERFLOW", "10"))
+DATABASE_POOL_RECYCLE = int(os.getenv("DATABASE_POOL_RECYCLE", "1800"))
+# Compiled SQL kept per engine, 0 disables the cache.
+DATABASE_QUERY_CACHE_SIZE = int(os.getenv("DATABASE_QUERY_CACHE_SIZE", "500"))
+# Replica for reads. Without it a SQLite file in WAL mode gets a second,
+# read-only pool on the same file, other databases read from the primary.
+DATABASE_READ_URL = os.getenv("DATABASE_READ_URL")
+DATABASE_READ_POOL_SIZE = int(os.getenv("DATABASE_READ_POOL_SIZE", "5"))
+
+SQLITE_PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous": "NORMAL",
+    "mmap_size": 256 * 1024 * 1024,
+    "cache_size": -64 * 1024,
+    "busy_timeout": 5000,
+}
+
+MAX_PAGE_SIZE = 100
+
+WS_QUEUE_SIZE = 100
+WS_AUTH_TIMEOUT = 10
+# Seconds between checks that the token of an idle websocket is still valid.
+WS_TOKEN_CHECK_INTERVAL = 1
+
+SERVER_HOST = os.getenv("SERVER_HOST", "127.0.0.1")
+SERVER_PORT = int(os.getenv("SERVER_PORT", "7777"))
+SERVER_WORKERS = int(os.getenv("SERVER_WORKERS", "1"))
+# Where login attempts are counted: "memory" of each worker or the "database",
+# shared by all workers.
+RATE_LIMIT_BACKEND = os.getenv(
+    "RATE_LIMIT_BACKEND", "database" if SERVER_WORKERS > 1 else "memory"
+)
+# Unix domain socket to listen on instead of host and port.
+SERVER_UDS = os.getenv("SERVER_UDS")
+
+INSTRUMENTATION_ENABLED = _getenv_bool("INSTRUMENTATION_ENABLED")
@@ -1,19 +1,195 @@
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Any, Optional
 
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker, AsyncAttrs
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import Engine, TextClause, UpdateBase, event, make_url
+from sqlalchemy.ext.asyncio import (
+    create_async_engine,
+    AsyncSession,
+    async_sessionmaker,
+    AsyncAttrs,
+    AsyncEngine,
+)
+from sqlalchemy.orm import DeclarativeBase, Session
+from sqlalchemy.pool import StaticPool
 
-DATABASE_URL = "sqlite+aiosqlite:///mydatabase.db"
+from engine.config import (
+    DATABASE_URL,
+    DATABASE_ECHO,
+    DATABASE_POOL_SIZE,
+    DATABASE_MAX_OVERFLOW,
+    DATABASE_POOL_RECYCLE,
+    DATABASE_QUERY_CACHE_SIZE,
+    DATABASE_READ_URL,
+    DATABASE_READ_POOL_SIZE,
+    SQLITE_PRAGMAS,
+)
 
 
 class Base(DeclarativeBase, AsyncAttrs):
     pass
 
 
-engine = create_async_engine(DATABASE_URL, echo=True)
-async_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+def create_db_engine(
+    url: str = DATABASE_URL,
+    echo: bool = DATABASE_ECHO,
+    pool_size: int = DATABASE_POOL_SIZE,
+    max_overflow: int = DATABASE_MAX_OVERFLOW,
+    pool_recycle: int = DATABASE_POOL_RECYCLE,
+    query_cache_size: int = DATABASE_QUERY_CACHE_SIZE,
+    sqlite_pragmas: Optional[dict[str, Any]] = None,
+) -> AsyncEngine:
+    """
+    Create an async engine for the configured database.
+
+    SQLite connections get ``sqlite_pragmas`` (``SQLITE_PRAGMAS`` by default)
+    applied on connect. Any other backend, e.g. ``postgresql+asyncpg://``,
+    gets a regular connection pool with pre-ping.
+    """
+    url = make_url(url)
+
+    if url.get_backend_name() != "sqlite":
+        return create_async_engine(
+            url,
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            pool_pre_ping=True,
+            query_cache_size=query_cache_size,
+        )
+
+    if url.database in (None, "", ":memory:"):
+        db_engine = create_async_engine(
+            url, echo=echo, poolclass=StaticPool, query_cache_size=query_cache_size
+        )
+    else:
+        db_engine = create_async_engine(
+            url,
+            echo=echo,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            pool_recycle=pool_recycle,
+            query_cache_size=query_cache_size,
+        )
+
+    pragmas = SQLITE_PRAGMAS if sqlite_pragmas is None else sqlite_pragmas
+    event.listen(db_engine.sync_engine, "connect", _sqlite_pragmas_setter(pragmas))
+
+    return db_engine
+
+
+def _sqlite_pragmas_setter(pragmas: dict[str, Any]):
+    def set_pragmas(dbapi_connection, connection_record) -> None:
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+    return set_pragmas
+
+
+def create_read_engine(
+    writer: AsyncEngine,
+    url: Optional[str] = DATABASE_READ_URL,
+    pool_size: int = DATABASE_READ_POOL_SIZE,
+) -> AsyncEngine:
+    """
+    Create the engine of read-only sessions.
+
+    ``url`` points to a replica. Without one, a SQLite file in WAL mode gets
+    a second pool of ``query_only`` connections on the same file, WAL readers
+    do not wait for the writer. Any other database is read through ``writer``.
+    """
+    if url is not None:
+        return create_db_engine(url, pool_size=pool_size)
+
+    writer_url = writer.url
+    if (
+        writer_url.get_backend_name() != "sqlite"
+        or writer_url.database in (None, "", ":memory:")
+        or str(SQLITE_PRAGMAS.get("journal_mode")).upper() != "WAL"
+    ):
+        return writer
+
+    # The journal mode is the writer's to set, switching it is a write.
+    pragmas = {k: v for k, v in SQLITE_PRAGMAS.items() if k != "journal_mode"}
+    pragmas["query_only"] = "ON"
+    return create_db_engine(
+        writer_url.render_as_string(hide_password=False),
+        pool_size=pool_size,
+        sqlite_pragmas=pragmas,
+    )
+
+
+class RoutingSession(Session):
+    """
+    Session that reads from ``reader`` until it writes.
+
+    Flushes, ``INSERT``/``UPDATE``/``DELETE`` and raw ``text()`` SQL go to
+    ``writer``, and so does everything after them, so the session reads its
+    own writes. Locking reads (``SELECT ... FOR UPDATE``) are not detected,
+    run them in a session of ``get_write_session``. ``bind`` is ``writer``,
+    code that only needs the dialect can keep using ``session.bind``.
+
+    :param writer: primary engine.
+    :param reader: replica or read-only engine.
+    """
+
+    def __init__(self, writer: Engine, reader: Engine, **kwargs: Any) -> None:
+        kwargs["bind"] = kwargs.get("bind") or writer
+        super().__init__(**kwargs)
+        self.writer = writer
+        self.reader = reader
+        self.uses_writer = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs: Any) -> Engine:
+        if not self.uses_writer and isinstance(clause, (UpdateBase, TextClause)):
+            self.uses_writer = True
+
+        return self.writer if self.uses_writer else self.reader
+
+
+@event.listens_for(RoutingSession, "before_flush")
+def _flush_to_writer(session: RoutingSession, flush_context, instances) -> None:
+    # Binds are looked up per mapper during the flush, without a statement.
+    session.uses_writer = True
+
+
+engine = create_db_engine()
+read_engine = create_read_engine(engine)
+
+write_session_maker = async_sessionmaker(engine, expire_on_commit=False)
+read_session_maker = async_sessionmaker(read_engine, expire_on_commit=False)
+if read_engine is engine:
+    async_session_maker = write_session_maker
+else:
+    async_session_maker = async_sessionmaker(
+        engine,
+        sync_session_class=RoutingSession,
+        writer=engine.sync_engine,
+        reader=read_engine.sync_engine,
+        expire_on_commit=False,
+    )
+
+
+async def dispose_engines() -> None:
+    await engine.dispose()
+    if read_engine is not engine:
+        await read_engine.dispose()
 
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session routed by operation, for repositories that read and write."""
     async with async_session_maker() as session:
         yield session
+
+
+async def get_read_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the read engine, writes fail on a replica or SQLite reader."""
+    async with read_session_maker() as session:
+        yield session
+
+
+async def get_write_session() -> AsyncGenerator[AsyncSession, None]:
+    """Session on the primary, for reads that must see the latest writes."""
+    async with write_session_maker() as session:
+        yield session
@@ -1,49 +1,115 @@
 import asyncio
+import hashlib
+import json
+from typing import Any
 
-from sqlalchemy.exc import PendingRollbackError, IntegrityError
+from sqlalchemy import Connection, select
 
 from engine.auth.models import *
-from engine.auth.repos.roles_repo import RoleRepository
-from engine.auth.repos.user_repo import UserRepository
-from engine.auth.schemas.schemes import UserCreate
-from engine.auth.services.user_manager import UserManager
-from engine.db import async_session_maker, engine
+from engine.db import engine
+from engine.migrations import migrate
+from engine.schema import SCHEMA_VERSION, dialect_insert, read_meta, write_meta
 from engine.utils import PasswordHelper
 
+# Seed data. Rows that already exist (by name / username) are left untouched,
+# users reference their role by name.
+FIXTURES: dict[str, list[dict[str, Any]]] = {
+    "roles": [{"name": "admin"}, {"name": "camera"}, {"name": "client"}],
+    "users": [{"username": "ondrei", "password": "a1024lagno", "role": "admin"}],
+}
+
+
+def fixtures_checksum(fixtures: dict[str, list[dict[str, Any]]] = FIXTURES) -> str:
+    raw = json.dumps(fixtures, sort_keys=True, separators=(",", ":")).encode()
+    return hashlib.sha256(raw).hexdigest()
+
 
 async def init_models():
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
 
 
-async def add_role(session, role_name: str):
-    try:
-        role_repo = RoleRepository(session)
-        await role_repo.create({"name": role_name})
-    except PendingRollbackError:
-        pass
-    except IntegrityError:
-        pass
+def _missing_usernames(conn: Connection, usernames: list[str]) -> set[str]:
+    stmt = select(UserORMModel.username).where(UserORMModel.username.in_(usernames))
+    return set(usernames) - set(conn.scalars(stmt))
+
+
+def _apply_fixtures(
+    conn: Connection,
+    fixtures: dict[str, list[dict[str, Any]]],
+    hashed_passwords: dict[str, str],
+    checksum: str,
+) -> None:
+    roles = RoleORMModel.__table__
+    users = UserORMModel.__table__
+
+    if fixtures["roles"]:
+        conn.execute(
+            dialect_insert(conn, roles).on_conflict_do_nothing(index_elements=["name"]),
+            fixtures["roles"],
+        )
+
+    new_users = [
+        user for user in fixtures["users"] if user["username"] in hashed_passwords
+    ]
+    if new_users:
+        res = conn.execute(select(roles.c.name, roles.c.id))
+        role_ids = {name: id_ for name, id_ in res}
+        conn.execute(
+            dialect_insert(conn, users).on_conflict_do_nothing(
+                index_elements=["username"]
+            ),
+            [
+                {
+                    "username": user["username"],
+                    "hashed_password": hashed_passwords[user["username"]],
+                    "role_id": role_ids[user["role"]],
+                }
+                for user in new_users
+            ],
+        )
+
+    write_meta(conn, "fixtures_checksum", checksum)
+
+
+async def seed(fixtures: dict[str, list[dict[str, Any]]] = FIXTURES) -> None:
+    """
+    Insert ``fixtures`` in a single transaction with ``ON CONFLICT DO NOTHING``,
+    so concurrent or repeated runs neither fail nor duplicate rows.
+    Passwords are only hashed for users that do not exist yet.
+    """
+    usernames = [user["username"] for user in fixtures["users"]]
+    async with engine.connect() as conn:
+        missing = await conn.run_sync(_missing_usernames, usernames)
+
+    password_helper = PasswordHelper()
+    hashed_passwords = {
+        user["username"]: await password_helper.hash_async(user["password"])
+        for user in fixtures["users"]
+        if user["username"] in missing
+    }
+
+    async with engine.begin() as conn:
+        await conn.run_sync(
+            _apply_fixtures, fixtures, hashed_passwords, fixtures_checksum(fixtures)
+        )
 
 
 async def main():
-    await init_models()
-
-    async with async_session_maker() as session:
-        await add_role(session, "admin")
-        await add_role(session, "camera")
-        await add_role(session, "client")
-
-        try:
-            manager = UserManager(
-                UserRepository(session), RoleRepository(session), PasswordHelper()
-            )
-            user = UserCreate(username="ondrei", password="a1024lagno", role_id="1")
-            await manager.create(user)
-        except PendingRollbackError:
-            pass
-        except IntegrityError:
-            pass
+    """
+    Migrate the database to ``SCHEMA_VERSION`` and apply ``FIXTURES``.
+    Both steps are skipped when recorded as done, a regular start only
+    reads the ``schema_meta`` table.
+    """
+    async with engine.connect() as conn:
+        meta = await conn.run_sync(read_meta)
+
+    version = meta.get("version")
+    if version != str(SCHEMA_VERSION):
+        await migrate(engine, int(version) if version is not None else None)
+
+    if meta.get("fixtures_checksum") != fixtures_checksum():
+        await seed()
 
 
 def run():
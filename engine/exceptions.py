@@ -21,3 +21,11 @@ class ObjectDoesNotExist(Exception):
             return f"Object with id '{self.object_id}' does not exist."
         else:
             return "Object does not exist."
+
+
+class InvalidCursor(ValueError):
+    def __init__(self, cursor: str) -> None:
+        self.cursor = cursor
+
+    def __str__(self) -> str:
+        return f"Invalid page cursor '{self.cursor}'."
@@ -0,0 +1,358 @@
+import bisect
+import functools
+import inspect
+import logging
+import time
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+import fastapi
+from fastapi import APIRouter, FastAPI
+from fastapi.responses import PlainTextResponse
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from engine.base import statement_cache
+from engine.config import INSTRUMENTATION_ENABLED
+
+logger = logging.getLogger(__name__)
+
+enabled = INSTRUMENTATION_ENABLED
+
+# FastAPI versions, from inclusive to exclusive, whose private ``ModelField``
+# is known to validate and serialize through the wrapped methods.
+VALIDATION_FASTAPI_VERSIONS = ((0, 100), (0, 116))
+
+DURATION_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DURATION_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.count += 1
+        self.sum += value
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+
+    def render(self, name: str, labels: str = "") -> list[str]:
+        prefix = f"{labels}," if labels else ""
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{prefix}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{prefix}le="+Inf"}} {self.count}')
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{name}_sum{suffix} {self.sum}")
+        lines.append(f"{name}_count{suffix} {self.count}")
+        return lines
+
+
+class Metrics:
+    """
+    Process-wide aggregate of the recorded spans and request durations.
+    """
+
+    def __init__(self) -> None:
+        self.spans: dict[str, Histogram] = {}
+        self.requests = Histogram()
+        # SQLAlchemy compiled cache result ("cache_hit", "cache_miss", ...) -> count
+        self.compiled_cache: dict[str, int] = {}
+        # gauge name -> (help text, current value), read on every render
+        self.gauges: dict[str, tuple[str, Callable[[], float]]] = {}
+
+    def observe_span(self, name: str, seconds: float) -> None:
+        histogram = self.spans.get(name)
+        if histogram is None:
+            histogram = self.spans[name] = Histogram()
+        histogram.observe(seconds)
+
+    def observe_request(self, seconds: float) -> None:
+        self.requests.observe(seconds)
+
+    def observe_compiled_cache(self, result: str) -> None:
+        self.compiled_cache[result] = self.compiled_cache.get(result, 0) + 1
+
+    def add_gauge(self, name: str, help_text: str, read: Callable[[], float]) -> None:
+        """Report ``read()`` as the gauge ``name``, replacing one of the same name."""
+        self.gauges[name] = (help_text, read)
+
+    def render(self) -> str:
+        lines = [
+            "# HELP engine_span_duration_seconds Time spent in instrumented sections.",
+            "# TYPE engine_span_duration_seconds histogram",
+        ]
+        for name, histogram in sorted(self.spans.items()):
+            lines += histogram.render("engine_span_duration_seconds", f'span="{name}"')
+
+        lines += [
+            "# HELP engine_request_duration_seconds Time spent handling HTTP requests.",
+            "# TYPE engine_request_duration_seconds histogram",
+            *self.requests.render("engine_request_duration_seconds"),
+            "# HELP engine_compiled_cache_total Statement executions by SQL compilation cache result.",
+            "# TYPE engine_compiled_cache_total counter",
+        ]
+        for result, count in sorted(self.compiled_cache.items()):
+            lines.append(f'engine_compiled_cache_total{{result="{result}"}} {count}')
+
+        stats = statement_cache.stats()
+        lines += [
+            "# HELP engine_statement_cache_total Repository statement lookups.",
+            "# TYPE engine_statement_cache_total counter",
+            f'engine_statement_cache_total{{result="hit"}} {stats["hits"]}',
+            f'engine_statement_cache_total{{result="miss"}} {stats["misses"]}',
+            "# HELP engine_statement_cache_size Repository statements built.",
+            "# TYPE engine_statement_cache_size gauge",
+            f"engine_statement_cache_size {stats['size']}",
+        ]
+        for name, (help_text, read) in sorted(self.gauges.items()):
+            lines += [
+                f"# HELP {name} {help_text}",
+                f"# TYPE {name} gauge",
+                f"{name} {read()}",
+            ]
+        return "\n".join(lines) + "\n"
+
+    def clear(self) -> None:
+        self.spans.clear()
+        self.requests = Histogram()
+        self.compiled_cache.clear()
+
+
+metrics = Metrics()
+
+# span name -> [total seconds, calls] for the current request
+_request_spans: ContextVar[Optional[dict[str, list]]] = ContextVar(
+    "request_spans", default=None
+)
+
+
+def record(name: str, seconds: float) -> None:
+    metrics.observe_span(name, seconds)
+
+    spans = _request_spans.get()
+    if spans is None:
+        return
+
+    entry = spans.get(name)
+    if entry is None:
+        spans[name] = [seconds, 1]
+    else:
+        entry[0] += seconds
+        entry[1] += 1
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str) -> None:
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info) -> None:
+        record(self.name, time.perf_counter() - self.start)
+
+
+_null_span = nullcontext()
+
+
+def span(name: str):
+    """
+    Context manager timing the enclosed block as ``name``.
+    Returns a shared no-op context manager when instrumentation is disabled.
+    """
+    if not enabled:
+        return _null_span
+
+    return _Span(name)
+
+
+def timed(name: str) -> Callable[[Callable], Callable]:
+    """
+    Decorator timing every call of a sync or async function as ``name``.
+    Returns the function untouched when instrumentation is disabled.
+    """
+
+    def decorator(func: Callable) -> Callable:
+        if not enabled:
+            return func
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with _Span(name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with _Span(name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def instrument_engine(db_engine: AsyncEngine) -> None:
+    """
+    Time every statement sent to the database as the ``db`` span
+    and count its SQL compilation cache result.
+    """
+    sync_engine = db_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(sync_engine, "handle_error", _handle_error)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, many):
+    conn.info.setdefault("instrumentation_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, many):
+    record("db", time.perf_counter() - conn.info["instrumentation_start"].pop())
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit is not None:
+        metrics.observe_compiled_cache(cache_hit.name.lower())
+
+
+def _handle_error(exception_context) -> None:
+    conn = exception_context.connection
+    starts = conn.info.get("instrumentation_start") if conn is not None else None
+    if starts:
+        record("db", time.perf_counter() - starts.pop())
+
+
+def instrument_validation() -> None:
+    """
+    Time FastAPI request and response validation as the ``validation`` span.
+
+    FastAPI has no hook for this, so methods of its private ``ModelField``
+    are wrapped instead. Outside of ``VALIDATION_FASTAPI_VERSIONS`` or if
+    they are gone, there is no ``validation`` span, it is still part of
+    the request duration.
+    """
+    try:
+        version = tuple(int(part) for part in fastapi.__version__.split(".")[:2])
+    except ValueError:
+        version = ()
+    low, high = VALIDATION_FASTAPI_VERSIONS
+    try:
+        from fastapi._compat import ModelField
+    except ImportError:
+        ModelField = None
+
+    if (
+        not low <= version < high
+        or ModelField is None
+        or not callable(getattr(ModelField, "validate", None))
+        or not callable(getattr(ModelField, "serialize", None))
+    ):
+        logger.warning(
+            "Validation is not timed, FastAPI %s is not supported.",
+            fastapi.__version__,
+        )
+        return
+
+    if getattr(ModelField, "_instrumented", False):
+        return
+
+    ModelField.validate = timed("validation")(ModelField.validate)
+    ModelField.serialize = timed("validation")(ModelField.serialize)
+    ModelField._instrumented = True
+
+
+def format_server_timing(spans: dict[str, list], total: float) -> str:
+    entries = [
+        f'{name};dur={seconds * 1000:.3f};desc="{calls} calls"'
+        for name, (seconds, calls) in spans.items()
+    ]
+    entries.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(entries)
+
+
+class ServerTimingMiddleware:
+    """
+    Collects the spans recorded while handling a request
+    and reports them in the ``Server-Timing`` response header.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        spans: dict[str, list] = {}
+        token = _request_spans.set(spans)
+        start = time.perf_counter()
+
+        async def send_with_timing(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "Server-Timing",
+                    format_server_timing(spans, time.perf_counter() - start),
+                )
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            metrics.observe_request(time.perf_counter() - start)
+            _request_spans.reset(token)
+
+
+router = APIRouter()
+
+
+@router.get("/metrics", include_in_schema=False)
+async def get_metrics() -> PlainTextResponse:
+    return PlainTextResponse(
+        metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
+
+
+def install(app: FastAPI, *db_engines: AsyncEngine) -> None:
+    """
+    Wire instrumentation into the app if ``INSTRUMENTATION_ENABLED`` is set.
+
+    :param app: gets the ``Server-Timing`` middleware and the ``/metrics`` endpoint.
+    :param db_engines: engines whose statements are timed, each one once.
+    """
+    if not enabled:
+        return
+
+    for db_engine in dict.fromkeys(db_engines):
+        instrument_engine(db_engine)
+    instrument_validation()
+    app.add_middleware(ServerTimingMiddleware)
+    app.include_router(router)
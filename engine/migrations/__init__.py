@@ -0,0 +1,21 @@
+from .operations import (
+    AddColumn,
+    CreateIndex,
+    CreateTable,
+    DeleteDuplicates,
+    Migration,
+    Operation,
+)
+from .runner import migrate, plan
+from .versions import MIGRATIONS
+
+__all__ = [
+    "AddColumn",
+    "CreateIndex",
+    "CreateTable",
+    "Migration",
+    "Operation",
+    "MIGRATIONS",
+    "migrate",
+    "plan",
+]
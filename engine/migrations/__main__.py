@@ -0,0 +1,33 @@
+"""
+Apply pending migrations, or print what the models add to the database.
+
+    python -m engine.migrations
+    python -m engine.migrations --plan
+"""
+
+import argparse
+import asyncio
+
+from engine.db import engine
+from engine.schema import get_schema_version
+from .runner import migrate, plan
+
+
+async def main(show_plan: bool) -> None:
+    try:
+        if show_plan:
+            for operation in await plan(engine):
+                print(f"{operation!r},")
+            return
+
+        async with engine.connect() as conn:
+            version = await conn.run_sync(get_schema_version)
+        print(f"Schema version {await migrate(engine, version)}")
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--plan", action="store_true")
+    asyncio.run(main(parser.parse_args().plan))
@@ -0,0 +1,166 @@
+import logging
+from abc import ABC, abstractmethod
+from typing import Sequence
+
+from sqlalchemy import Column, Table, delete, func, inspect, select, text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+from sqlalchemy.schema import CreateColumn
+
+from engine.db import Base
+
+logger = logging.getLogger(__name__)
+
+
+class Operation(ABC):
+    """
+    Idempotent schema change: applying it to a database
+    that already has the change does nothing.
+    """
+
+    @abstractmethod
+    async def apply(self, db_engine: AsyncEngine) -> None: ...
+
+
+class Migration:
+    """
+    Operations that bring the schema to ``version``. Each one runs in its own
+    short transaction, so tables are never locked for the whole migration.
+    """
+
+    def __init__(
+        self, version: int, description: str, operations: Sequence[Operation]
+    ) -> None:
+        self.version = version
+        self.description = description
+        self.operations = list(operations)
+
+
+def _table(name: str) -> Table:
+    return Base.metadata.tables[name]
+
+
+class CreateTable(Operation):
+    """Create a table with its indexes as declared in the models."""
+
+    def __init__(self, table: str) -> None:
+        self.table = table
+
+    async def apply(self, db_engine: AsyncEngine) -> None:
+        async with db_engine.begin() as conn:
+            await conn.run_sync(_table(self.table).create, checkfirst=True)
+
+    def __repr__(self) -> str:
+        return f"CreateTable({self.table!r})"
+
+
+class AddColumn(Operation):
+    """
+    Add a column as declared in the models.
+
+    A new ``NOT NULL`` column needs a ``server_default``. With a constant
+    default neither SQLite nor PostgreSQL 11+ rewrite the table.
+    """
+
+    def __init__(self, table: str, column: str) -> None:
+        self.table = table
+        self.column = column
+
+    async def apply(self, db_engine: AsyncEngine) -> None:
+        column: Column = _table(self.table).c[self.column]
+        async with db_engine.begin() as conn:
+            columns = await conn.run_sync(
+                lambda sync_conn: inspect(sync_conn).get_columns(self.table)
+            )
+            if any(existing["name"] == self.column for existing in columns):
+                return
+
+            ddl = CreateColumn(column).compile(dialect=conn.dialect)
+            table = conn.dialect.identifier_preparer.quote(self.table)
+            await conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {ddl}"))
+
+    def __repr__(self) -> str:
+        return f"AddColumn({self.table!r}, {self.column!r})"
+
+
+class DeleteDuplicates(Operation):
+    """
+    Delete rows repeating the ``columns`` of another row, the one with the
+    lowest id is kept. Precedes a unique index the existing rows may violate.
+    """
+
+    def __init__(self, table: str, columns: Sequence[str]) -> None:
+        self.table = table
+        self.columns = list(columns)
+
+    async def apply(self, db_engine: AsyncEngine) -> None:
+        table = _table(self.table)
+        kept = select(func.min(table.c.id)).group_by(
+            *(table.c[column] for column in self.columns)
+        )
+        async with db_engine.begin() as conn:
+            res = await conn.execute(delete(table).where(table.c.id.not_in(kept)))
+
+        if res.rowcount:
+            logger.warning(
+                "Deleted %s rows of %s duplicating (%s).",
+                res.rowcount,
+                self.table,
+                ", ".join(self.columns),
+            )
+
+    def __repr__(self) -> str:
+        return f"DeleteDuplicates({self.table!r}, {self.columns!r})"
+
+
+class CreateIndex(Operation):
+    """
+    Create an index without blocking writes where the database allows it.
+
+    PostgreSQL builds it ``CONCURRENTLY`` outside of a transaction, and an
+    invalid index left by an interrupted build is dropped and built again.
+    SQLite has no online index build: the database is locked for writes
+    while the index is built, readers are not blocked in WAL mode.
+    """
+
+    def __init__(
+        self, table: str, name: str, columns: Sequence[str], unique: bool = False
+    ) -> None:
+        self.table = table
+        self.name = name
+        self.columns = list(columns)
+        self.unique = unique
+
+    async def apply(self, db_engine: AsyncEngine) -> None:
+        async with db_engine.connect() as conn:
+            if conn.dialect.name == "postgresql":
+                conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await self._drop_invalid(conn)
+                await conn.execute(text(self._ddl(conn, concurrently=True)))
+            else:
+                async with conn.begin():
+                    await conn.execute(text(self._ddl(conn)))
+
+    def _ddl(self, conn: AsyncConnection, concurrently: bool = False) -> str:
+        quote = conn.dialect.identifier_preparer.quote
+        return (
+            f"CREATE {'UNIQUE ' if self.unique else ''}INDEX"
+            f"{' CONCURRENTLY' if concurrently else ''} IF NOT EXISTS"
+            f" {quote(self.name)} ON {quote(self.table)}"
+            f" ({', '.join(quote(column) for column in self.columns)})"
+        )
+
+    async def _drop_invalid(self, conn: AsyncConnection) -> None:
+        valid = await conn.scalar(
+            text(
+                "SELECT i.indisvalid FROM pg_index i"
+                " JOIN pg_class c ON c.oid = i.indexrelid WHERE c.relname = :name"
+            ),
+            {"name": self.name},
+        )
+        if valid is False:
+            quote = conn.dialect.identifier_preparer.quote
+            await conn.execute(text(f"DROP INDEX CONCURRENTLY {quote(self.name)}"))
+
+    def __repr__(self) -> str:
+        unique = ", unique=True" if self.unique else ""
+        return f"CreateIndex({self.table!r}, {self.name!r}, {self.columns!r}{unique})"
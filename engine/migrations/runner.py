@@ -0,0 +1,110 @@
+import logging
+from typing import Optional
+
+from sqlalchemy import Connection, UniqueConstraint, inspect
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+import engine.auth.models  # noqa: F401, registers the tables on Base.metadata
+import engine.ratelimit  # noqa: F401
+from engine.db import Base
+from engine.schema import SCHEMA_VERSION, SchemaMetaORMModel, set_schema_version
+from .operations import AddColumn, CreateIndex, CreateTable, Operation
+from .versions import BASELINE_VERSION, MIGRATIONS
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate(db_engine: AsyncEngine, version: Optional[int]) -> int:
+    """
+    Bring the database from ``version`` to ``SCHEMA_VERSION``.
+
+    A new database is created from the models in one go. Otherwise every
+    pending migration is applied and recorded right away, so an interrupted
+    run resumes where it stopped.
+
+    :return: the version the database is at.
+    """
+    if MIGRATIONS[-1].version != SCHEMA_VERSION:
+        raise RuntimeError(
+            f"Last migration is {MIGRATIONS[-1].version},"
+            f" SCHEMA_VERSION is {SCHEMA_VERSION}."
+        )
+
+    async with db_engine.begin() as conn:
+        if version is None and not await conn.run_sync(_has_tables):
+            await conn.run_sync(Base.metadata.create_all)
+            await conn.run_sync(set_schema_version, SCHEMA_VERSION)
+            return SCHEMA_VERSION
+
+        # Databases older than the versioning have no place to record it yet.
+        await conn.run_sync(SchemaMetaORMModel.__table__.create, checkfirst=True)
+
+    version = version or BASELINE_VERSION
+    for migration in MIGRATIONS:
+        if migration.version <= version:
+            continue
+
+        logger.info("Migrating to %s: %s", migration.version, migration.description)
+        for operation in migration.operations:
+            await operation.apply(db_engine)
+
+        async with db_engine.begin() as conn:
+            await conn.run_sync(set_schema_version, migration.version)
+        version = migration.version
+
+    return version
+
+
+async def plan(db_engine: AsyncEngine) -> list[Operation]:
+    """
+    Operations that would bring the database in line with the models,
+    to be copied into a new migration.
+    """
+    async with db_engine.connect() as conn:
+        return await conn.run_sync(_diff)
+
+
+def _has_tables(conn: Connection) -> bool:
+    return bool(inspect(conn).get_table_names())
+
+
+def _diff(conn: Connection) -> list[Operation]:
+    inspector = inspect(conn)
+    existing_tables = set(inspector.get_table_names())
+    operations: list[Operation] = []
+
+    for table in Base.metadata.sorted_tables:
+        if table.name not in existing_tables:
+            operations.append(CreateTable(table.name))
+            continue
+
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        operations += [
+            AddColumn(table.name, column.name)
+            for column in table.columns
+            if column.name not in columns
+        ]
+
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        indexes |= {
+            constraint["name"]
+            for constraint in inspector.get_unique_constraints(table.name)
+        }
+        wanted = [
+            (index.name, [column.name for column in index.columns], index.unique)
+            for index in table.indexes
+        ]
+        # Named unique constraints are added as unique indexes,
+        # SQLite can not add constraints to an existing table.
+        wanted += [
+            (constraint.name, [column.name for column in constraint.columns], True)
+            for constraint in table.constraints
+            if isinstance(constraint, UniqueConstraint) and constraint.name
+        ]
+        operations += [
+            CreateIndex(table.name, name, columns, unique=bool(unique))
+            for name, columns, unique in wanted
+            if name not in indexes
+        ]
+
+    return operations
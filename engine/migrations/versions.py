@@ -0,0 +1,57 @@
+from .operations import (
+    AddColumn,
+    CreateIndex,
+    CreateTable,
+    DeleteDuplicates,
+    Migration,
+)
+
+# Version 1 is the schema created before migrations existed,
+# a database without a recorded version and with tables is at it.
+BASELINE_VERSION = 1
+
+# Append only. The last version must equal engine.schema.SCHEMA_VERSION.
+MIGRATIONS = [
+    Migration(
+        2,
+        "token versions, refresh tokens and camera owner lookups",
+        [
+            AddColumn("users", "token_version"),
+            CreateIndex("users", "ix_users_role_id", ["role_id"]),
+            CreateTable("refresh_tokens"),
+            # Links were not unique before, repeated ones are redundant.
+            DeleteDuplicates("camera_owner", ["owner_id", "camera_id"]),
+            CreateIndex(
+                "camera_owner",
+                "uq_camera_owner_owner_camera",
+                ["owner_id", "camera_id"],
+                unique=True,
+            ),
+            CreateIndex(
+                "camera_owner",
+                "ix_camera_owner_camera_owner",
+                ["camera_id", "owner_id"],
+            ),
+        ],
+    ),
+    Migration(
+        3,
+        "deleted user tombstones",
+        [CreateTable("deleted_users")],
+    ),
+    Migration(
+        4,
+        "refresh token revocation time",
+        [AddColumn("refresh_tokens", "revoked_at")],
+    ),
+    Migration(
+        5,
+        "login attempts shared by workers",
+        [CreateTable("rate_limit_hits")],
+    ),
+    Migration(
+        6,
+        "auth changes read by the other workers",
+        [CreateTable("auth_changes")],
+    ),
+]
@@ -0,0 +1,155 @@
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+from typing import Callable
+
+from sqlalchemy import Float, Index, Integer, String, delete, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Mapped, mapped_column
+
+from engine.db import Base
+
+
+class RateLimitBackend(ABC):
+    """
+    Storage of recent hits per key.
+
+    Implementations may be shared by several processes (e.g. Redis),
+    so the interface is async.
+    """
+
+    @abstractmethod
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        """
+        Record a hit of ``key`` unless it already had ``limit`` hits
+        in the last ``window`` seconds.
+
+        :return: ``0`` if the hit is allowed, otherwise seconds until it would be.
+        """
+
+    @abstractmethod
+    async def reset(self, key: str) -> None: ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Sliding window log kept in process memory.
+
+    Every key keeps at most ``limit`` timestamps, and at most ``maxsize`` keys
+    are tracked, the least recently hit one is dropped first. Memory is bounded
+    whatever the number of distinct usernames and addresses.
+    """
+
+    def __init__(
+        self, maxsize: int, timer: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.maxsize = maxsize
+        self._timer = timer
+        self._hits: OrderedDict[str, deque[float]] = OrderedDict()
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = self._timer()
+        hits = self._hits.get(key)
+        if hits is None or hits.maxlen != limit:
+            hits = deque(hits or (), maxlen=limit)
+            self._hits[key] = hits
+        self._hits.move_to_end(key)
+
+        # The oldest of the last ``limit`` hits decides, older ones were dropped.
+        if len(hits) == limit and hits[0] > now - window:
+            return hits[0] + window - now
+
+        hits.append(now)
+        while len(self._hits) > self.maxsize:
+            self._hits.popitem(last=False)
+
+        return 0
+
+    async def reset(self, key: str) -> None:
+        self._hits.pop(key, None)
+
+    def __len__(self) -> int:
+        return len(self._hits)
+
+
+class RateLimitHitORMModel(Base):
+    __tablename__ = "rate_limit_hits"
+    __table_args__ = (
+        Index("ix_rate_limit_hits_key_hit_at", "key", "hit_at"),
+        Index("ix_rate_limit_hits_hit_at", "hit_at"),
+    )
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    key: Mapped[str] = mapped_column(String(length=512), nullable=False)
+    hit_at: Mapped[float] = mapped_column(Float, nullable=False)
+
+
+class DatabaseRateLimitBackend(RateLimitBackend):
+    """
+    Sliding window log in the ``rate_limit_hits`` table, shared by all workers.
+
+    Every hit runs in one transaction that starts with a write, on SQLite
+    that serializes the workers. Other databases may let concurrent hits
+    of one key go slightly over the limit. Hits older than ``max_age``
+    seconds, the longest window in use, are deleted on the way.
+    """
+
+    def __init__(
+        self,
+        session_maker: async_sessionmaker[AsyncSession],
+        max_age: float,
+        timer: Callable[[], float] = time.time,
+    ) -> None:
+        self.max_age = max_age
+        self._session_maker = session_maker
+        self._timer = timer
+
+    async def hit(self, key: str, limit: int, window: float) -> float:
+        now = self._timer()
+        table = RateLimitHitORMModel.__table__
+        async with self._session_maker() as session, session.begin():
+            await session.execute(
+                delete(table).where(table.c.hit_at <= now - self.max_age)
+            )
+            res = await session.execute(
+                select(func.count(), func.min(table.c.hit_at)).where(
+                    table.c.key == key, table.c.hit_at > now - window
+                )
+            )
+            count, oldest = res.one()
+            if count >= limit:
+                return oldest + window - now
+
+            await session.execute(insert(table).values(key=key, hit_at=now))
+
+        return 0
+
+    async def reset(self, key: str) -> None:
+        table = RateLimitHitORMModel.__table__
+        async with self._session_maker() as session, session.begin():
+            await session.execute(delete(table).where(table.c.key == key))
+
+
+class RateLimiter:
+    """
+    At most ``limit`` hits per key in any ``window`` seconds.
+
+    :param backend: where hits are stored.
+    :param limit: hits allowed in a window.
+    :param window: window length in seconds.
+    :param prefix: namespace of the keys in a shared backend.
+    """
+
+    def __init__(
+        self, backend: RateLimitBackend, limit: int, window: float, prefix: str = ""
+    ) -> None:
+        self.backend = backend
+        self.limit = limit
+        self.window = window
+        self.prefix = prefix
+
+    async def hit(self, key: str) -> float:
+        """:return: ``0`` if allowed, otherwise seconds to wait."""
+        return await self.backend.hit(self.prefix + key, self.limit, self.window)
+
+    async def reset(self, key: str) -> None:
+        await self.backend.reset(self.prefix + key)
@@ -0,0 +1,60 @@
+from typing import Any, Optional
+
+from sqlalchemy import Connection, Engine, String, Table, inspect, select
+from sqlalchemy.orm import Mapped, mapped_column
+
+from engine.db import Base
+
+# Version of the latest migration in engine.migrations.
+SCHEMA_VERSION = 6
+
+
+class SchemaMetaORMModel(Base):
+    __tablename__ = "schema_meta"
+    key: Mapped[str] = mapped_column(String(length=64), primary_key=True)
+    value: Mapped[str] = mapped_column(String(length=256), nullable=False)
+
+
+def read_meta(conn: Connection) -> dict[str, str]:
+    """All recorded values, empty for a new or unversioned database."""
+    if not inspect(conn).has_table(SchemaMetaORMModel.__tablename__):
+        return {}
+
+    res = conn.execute(select(SchemaMetaORMModel.key, SchemaMetaORMModel.value))
+    return {key: value for key, value in res}
+
+
+def write_meta(conn: Connection, key: str, value: Any) -> None:
+    stmt = dialect_insert(conn, SchemaMetaORMModel.__table__).values(
+        key=key, value=str(value)
+    )
+    conn.execute(
+        stmt.on_conflict_do_update(
+            index_elements=["key"], set_={"value": stmt.excluded.value}
+        )
+    )
+
+
+def get_schema_version(conn: Connection) -> Optional[int]:
+    version = read_meta(conn).get("version")
+    return int(version) if version is not None else None
+
+
+def set_schema_version(conn: Connection, version: int) -> None:
+    write_meta(conn, "version", version)
+
+
+def dialect_insert(conn: Connection | Engine, table: Table):
+    """
+    ``INSERT`` of the connection's dialect, which supports
+    ``on_conflict_do_nothing`` and ``on_conflict_do_update``.
+    """
+    # Only needed when something is written, so not imported at startup.
+    if conn.dialect.name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif conn.dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise NotImplementedError(f"Upserts are not supported by {conn.dialect.name}.")
+
+    return insert(table)
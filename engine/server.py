@@ -0,0 +1,102 @@
+"""
+Production launcher for ``engine.api``.
+
+    python -m engine.server --workers 4
+    python -m engine.server --uds /tmp/engine.sock
+
+The database is created and seeded once, in this process, before any
+worker starts, so SQLite never sees concurrent DDL or seeding. Workers
+share nothing but the database: caches and the role registry are per
+worker and reloaded within ``AUTH_SYNC_INTERVAL`` of a change made by
+another one, login attempts are counted in the database, websocket
+connections are per worker. ``SIGHUP`` restarts the workers one after
+another without dropping the listening socket.
+"""
+
+# Imported first, startup times are measured from here.
+from engine import startup
+
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+from typing import Optional
+
+import uvicorn
+
+from engine.config import (
+    SERVER_HOST,
+    SERVER_PORT,
+    SERVER_WORKERS,
+    SERVER_UDS,
+)
+
+APP = "engine.api:app"
+
+logger = logging.getLogger(__name__)
+
+
+async def prepare_database() -> None:
+    from engine import db_preset
+    from engine.db import dispose_engines
+
+    try:
+        await db_preset.main()
+    finally:
+        # Workers open their own connections.
+        await dispose_engines()
+
+
+def parse_args(argv: Optional[list[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--host", default=SERVER_HOST)
+    parser.add_argument("--port", type=int, default=SERVER_PORT)
+    parser.add_argument("--uds", default=SERVER_UDS, help="bind to a unix socket")
+    parser.add_argument("--workers", type=int, default=SERVER_WORKERS)
+    parser.add_argument("--reload", action="store_true", help="development only")
+    parser.add_argument("--loop", choices=("auto", "asyncio", "uvloop"), default="auto")
+    parser.add_argument("--http", choices=("auto", "h11", "httptools"), default="auto")
+    parser.add_argument("--no-prepare", action="store_true", help="skip db seeding")
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[list[str]] = None) -> None:
+    # Workers are spawned, a frozen (PyInstaller) build has to handle that.
+    multiprocessing.freeze_support()
+    args = parse_args(argv)
+
+    if not args.no_prepare:
+        asyncio.run(prepare_database())
+        startup.mark("database")
+
+    if args.workers > 1 or args.reload:
+        # Imported by every worker, the config of each sees the worker count.
+        os.environ["SERVER_WORKERS"] = str(args.workers)
+        app = APP
+    else:
+        # Imported here, so that a PyInstaller build bundles the app.
+        from engine.api import app
+
+    if args.workers > 1 and os.getenv("RATE_LIMIT_BACKEND") == "memory":
+        logger.warning(
+            "Login attempts are counted per worker, with %s workers"
+            " the login rate limits are %s times higher.",
+            args.workers,
+            args.workers,
+        )
+
+    uvicorn.run(
+        app,
+        host=args.host,
+        port=args.port,
+        uds=args.uds,
+        workers=args.workers,
+        reload=args.reload,
+        loop=args.loop,
+        http=args.http,
+    )
+
+
+if __name__ == "__main__":
+    main()
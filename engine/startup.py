@@ -0,0 +1,25 @@
+"""
+Startup timeline of the process, reported by ``/ready``.
+
+Import this module first, times are measured from its import.
+"""
+
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+_origin = time.perf_counter()
+
+# step name -> milliseconds since startup began
+marks: dict[str, float] = {}
+
+
+def mark(name: str) -> None:
+    marks[name] = round((time.perf_counter() - _origin) * 1000, 1)
+
+
+def log_marks() -> None:
+    logger.info(
+        "Startup: %s", ", ".join(f"{name} {ms}ms" for name, ms in marks.items())
+    )
@@ -1,10 +1,15 @@
+import asyncio
+import functools
 import secrets
 import string
 from abc import ABC, abstractmethod
-from typing import Optional, Union
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Union, Literal, TYPE_CHECKING
 
-from pwdlib import PasswordHash
-from pwdlib.hashers.argon2 import Argon2Hasher
+from engine.instrumentation import timed
+
+if TYPE_CHECKING:
+    from pwdlib import PasswordHash
 
 
 class BasePasswordHelper(ABC):
@@ -17,13 +22,65 @@ class BasePasswordHelper(ABC):
     @abstractmethod
     def generate(self) -> str: ...
 
+    async def verify_and_update_async(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, Union[str, None]]:
+        return await asyncio.to_thread(
+            self.verify_and_update, plain_password, hashed_password
+        )
+
+    async def hash_async(self, password: str) -> str:
+        return await asyncio.to_thread(self.hash, password)
+
+
+def create_hash_executor(
+    kind: Literal["thread", "process"], max_workers: Optional[int] = None
+) -> Executor:
+    if kind == "process":
+        return ProcessPoolExecutor(max_workers)
+
+    return ThreadPoolExecutor(max_workers, thread_name_prefix="password-hash")
+
 
 class PasswordHelper(BasePasswordHelper):
-    def __init__(self, password_hash: Optional[PasswordHash] = None) -> None:
-        if password_hash is None:
-            self.password_hash = PasswordHash((Argon2Hasher(),))
-        else:
-            self.password_hash = password_hash  # pragma: no cover
+    """
+    Argon2 password helper.
+
+    Async variants run the hasher in ``executor`` (the loop default one if not set),
+    at most ``max_concurrency`` at a time. Calls waiting for a free slot are
+    reported by ``queue_depth``. The hasher is created on first use.
+    """
+
+    def __init__(
+        self,
+        password_hash: Optional["PasswordHash"] = None,
+        executor: Optional[Executor] = None,
+        max_concurrency: Optional[int] = None,
+    ) -> None:
+        self._password_hash = password_hash
+        self._executor = executor
+        self._max_concurrency = max_concurrency
+        self._semaphore: Optional[asyncio.Semaphore] = None
+        self._waiting = 0
+        self._running = 0
+
+    @property
+    def password_hash(self) -> "PasswordHash":
+        if self._password_hash is None:
+            from pwdlib import PasswordHash
+            from pwdlib.hashers.argon2 import Argon2Hasher
+
+            self._password_hash = PasswordHash((Argon2Hasher(),))
+
+        return self._password_hash
+
+    @property
+    def queue_depth(self) -> int:
+        return self._waiting
+
+    @property
+    def in_flight(self) -> int:
+        return self._running
 
     def verify_and_update(
         self, plain_password: str, hashed_password: str
@@ -36,32 +93,77 @@ class PasswordHelper(BasePasswordHelper):
     def generate(self) -> str:
         return secrets.token_urlsafe()
 
+    async def verify_and_update_async(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, Union[str, None]]:
+        return await self._run(
+            self.password_hash.verify_and_update, plain_password, hashed_password
+        )
+
+    async def hash_async(self, password: str) -> str:
+        return await self._run(self.password_hash.hash, password)
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    @timed("hash")
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        call = functools.partial(func, *args)
+
+        if self._max_concurrency is None:
+            return await loop.run_in_executor(self._executor, call)
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self._max_concurrency)
+
+        self._waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self._waiting -= 1
+
+        self._running += 1
+        try:
+            return await loop.run_in_executor(self._executor, call)
+        finally:
+            self._running -= 1
+            self._semaphore.release()
+
 
 from datetime import datetime, timezone, timedelta
 from typing import Optional, Any
 
-import jwt
+# jwt is imported by the functions below, it is not needed to start the app.
 
 
+@timed("jwt_encode")
 def generate_jwt(
     data: dict,
-    secret: str,
+    secret: Any,
     algorithm: str,
     lifetime_seconds: Optional[int] = None,
+    headers: Optional[dict[str, Any]] = None,
 ) -> str:
-    payload = data.copy()
+    import jwt
+
+    now = datetime.now(timezone.utc)
+    payload = {"iat": now, **data}
     if lifetime_seconds:
-        expire = datetime.now(timezone.utc) + timedelta(seconds=int(lifetime_seconds))
-        payload["exp"] = expire
-    return jwt.encode(payload, secret, algorithm=algorithm)
+        payload["exp"] = now + timedelta(seconds=int(lifetime_seconds))
+    return jwt.encode(payload, secret, algorithm=algorithm, headers=headers)
 
 
+@timed("jwt_decode")
 def decode_jwt(
     encoded_jwt: str,
-    secret: str,
+    secret: Any,
     audience: list[str],
     algorithms: list[str],
 ) -> dict[str, Any]:
+    import jwt
+
     return jwt.decode(
         encoded_jwt,
         secret,
@@ -70,11 +172,13 @@ def decode_jwt(
     )
 
 
+from collections.abc import AsyncIterable, AsyncIterator
 from typing import Callable
 
 from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, StreamingResponse
 
 
 def create_handler(code: int) -> Callable:
@@ -97,6 +201,33 @@ def create_handler(code: int) -> Callable:
     return json_resp_handler
 
 
+async def iter_ndjson(chunks: AsyncIterable[list[BaseModel]]) -> AsyncIterator[bytes]:
+    async for chunk in chunks:
+        if chunk:
+            yield b"".join(obj.model_dump_json().encode() + b"\n" for obj in chunk)
+
+
+async def iter_json_array(
+    chunks: AsyncIterable[list[BaseModel]],
+) -> AsyncIterator[bytes]:
+    separator = b"["
+    async for chunk in chunks:
+        if chunk:
+            yield separator + b",".join(obj.model_dump_json().encode() for obj in chunk)
+            separator = b","
+
+    yield b"[]" if separator == b"[" else b"]"
+
+
+def create_export_response(
+    chunks: AsyncIterable[list[BaseModel]], export_format: Literal["ndjson", "json"]
+) -> StreamingResponse:
+    if export_format == "json":
+        return StreamingResponse(iter_json_array(chunks), media_type="application/json")
+
+    return StreamingResponse(iter_ndjson(chunks), media_type="application/x-ndjson")
+
+
 from abc import ABC
 from copy import copy
 from typing import Any
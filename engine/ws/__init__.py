@@ -0,0 +1,3 @@
+from .router import router, hub
+
+__all__ = ["router", "hub"]
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Iterable
+
+
+class Subscription:
+    """
+    Outgoing messages of one connection.
+
+    The queue is bounded: when a client reads slower than messages arrive,
+    the oldest pending message is dropped instead of buffering without limit.
+    """
+
+    def __init__(self, user_id: int, maxsize: int) -> None:
+        self.user_id = user_id
+        self.queue: asyncio.Queue[str] = asyncio.Queue(maxsize)
+        self.dropped = 0
+
+    def push(self, message: str) -> None:
+        if self.queue.full():
+            self.queue.get_nowait()
+            self.dropped += 1
+        self.queue.put_nowait(message)
+
+    async def get(self) -> str:
+        return await self.queue.get()
+
+
+class Hub:
+    """
+    In-process pub/sub between connected users.
+
+    Messages are serialized once by the publisher and shared by all receivers.
+    Only connections of the same process are reachable.
+    """
+
+    def __init__(self, queue_size: int) -> None:
+        self.queue_size = queue_size
+        self._subscriptions: dict[int, set[Subscription]] = {}
+
+    def subscribe(self, user_id: int) -> Subscription:
+        subscription = Subscription(user_id, self.queue_size)
+        self._subscriptions.setdefault(user_id, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        subscriptions = self._subscriptions.get(subscription.user_id)
+        if subscriptions is None:
+            return
+
+        subscriptions.discard(subscription)
+        if not subscriptions:
+            del self._subscriptions[subscription.user_id]
+
+    def publish(self, user_ids: Iterable[int], message: str) -> int:
+        """Queue ``message`` for all connections of ``user_ids``, return how many."""
+        delivered = 0
+        for user_id in user_ids:
+            for subscription in self._subscriptions.get(user_id, ()):
+                subscription.push(message)
+                delivered += 1
+
+        return delivered
+
+    def is_connected(self, user_id: int) -> bool:
+        return user_id in self._subscriptions
+
+    @property
+    def connection_count(self) -> int:
+        return sum(len(subs) for subs in self._subscriptions.values())
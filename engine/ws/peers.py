@@ -0,0 +1,46 @@
+import time
+from typing import Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from engine.auth.ownership_cache import OwnershipCache
+from engine.auth.repos.camera_owner_repo import CameraOwnerRepository
+from engine.db import async_session_maker
+
+
+class Peers:
+    """
+    Peers of one connection: owners of a camera or cameras of an owner.
+
+    Reloaded on use once a link changed in this process, see
+    ``OwnershipCache.generation``, and at least every ``OwnershipCache.ttl``
+    seconds for links changed by other workers.
+    """
+
+    def __init__(self, user_id: int, ownership_cache: OwnershipCache) -> None:
+        self.user_id = user_id
+        self._ownership_cache = ownership_cache
+        self._ids: set[int] = set()
+        self._generation: Optional[int] = None
+        self._loaded_at = 0.0
+
+    async def load(self, session: AsyncSession) -> set[int]:
+        # Taken before the query, a change made while it runs triggers a reload.
+        generation = self._ownership_cache.generation
+        self._ids = await CameraOwnerRepository(session).get_peer_ids(self.user_id)
+        self._generation = generation
+        self._loaded_at = time.monotonic()
+        return self._ids
+
+    async def get(self) -> set[int]:
+        if self.is_stale():
+            async with async_session_maker() as session:
+                return await self.load(session)
+
+        return self._ids
+
+    def is_stale(self) -> bool:
+        return (
+            self._generation != self._ownership_cache.generation
+            or time.monotonic() - self._loaded_at >= self._ownership_cache.ttl
+        )
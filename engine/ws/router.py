@@ -0,0 +1,231 @@
+import asyncio
+import json
+import logging
+import time
+from typing import Optional, Awaitable
+
+import anyio
+import anyio.abc
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, status
+from pydantic import ValidationError
+from starlette.websockets import WebSocketState
+
+from engine.auth.auth_sync import AuthSync
+from engine.auth.container import AuthContainer
+from engine.auth.domain import User
+from engine.auth.repos import RoleRepository, UserRepository
+from engine.auth.schemas.ws_schemas import AuthDataSchema
+from engine.auth.services.user_manager import UserManager
+from engine.auth.token_versions import token_versions
+from engine.config import WS_AUTH_TIMEOUT, WS_QUEUE_SIZE, WS_TOKEN_CHECK_INTERVAL
+from engine.db import async_session_maker
+from .hub import Hub, Subscription
+from .peers import Peers
+from .schemas import ClientMessage
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+hub = Hub(WS_QUEUE_SIZE)
+
+
+async def receive_text(websocket: WebSocket) -> str:
+    """
+    Next text message. A binary one closes the connection with 1003,
+    both that and a disconnect raise ``WebSocketDisconnect``.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+
+    text = message.get("text")
+    if text is None:
+        await websocket.close(status.WS_1003_UNSUPPORTED_DATA)
+        raise WebSocketDisconnect(status.WS_1003_UNSUPPORTED_DATA)
+
+    return text
+
+
+class TokenWatch:
+    """
+    Validity of the token a connection authenticated with. It ends when the
+    token expires, when the user is deleted and when its tokens are revoked.
+    """
+
+    def __init__(
+        self,
+        user: User,
+        connected_at: int,
+        expires_at: Optional[float],
+        auth_sync: AuthSync,
+    ) -> None:
+        self.user = user
+        self.connected_at = connected_at
+        self.expires_at = expires_at
+        self.auth_sync = auth_sync
+
+    async def is_valid(self) -> bool:
+        await self.auth_sync.check()
+        if self.expires_at is not None and time.time() >= self.expires_at:
+            return False
+
+        return token_versions.is_current(
+            self.user.id, self.user.token_version, self.connected_at
+        )
+
+    def next_check_in(self) -> float:
+        if self.expires_at is None:
+            return WS_TOKEN_CHECK_INTERVAL
+
+        return max(0.0, min(WS_TOKEN_CHECK_INTERVAL, self.expires_at - time.time()))
+
+
+async def authenticate(
+    websocket: WebSocket, container: AuthContainer
+) -> Optional[tuple[User, Peers, Optional[float]]]:
+    """
+    Read ``AuthDataSchema`` as the first message and resolve its user, peers
+    and token expiry. Afterwards the database is only used to reload the
+    peers when links change.
+    """
+    try:
+        raw = await asyncio.wait_for(receive_text(websocket), WS_AUTH_TIMEOUT)
+        auth_data = AuthDataSchema.model_validate_json(raw)
+    except (asyncio.TimeoutError, ValidationError):
+        return None
+
+    await container.auth_sync.check()
+    async with async_session_maker() as session:
+        user_manager = UserManager(
+            UserRepository(session),
+            RoleRepository(session),
+            container.password_helper,
+            container.token_cache,
+        )
+        user = await container.auth_service.read_token(auth_data.token, user_manager)
+        if user is None:
+            return None
+
+        peers = Peers(user.id, container.ownership_cache)
+        await peers.load(session)
+        expires_at = container.auth_service.get_expiry(auth_data.token)
+        return user, peers, expires_at
+
+
+async def watch_token(websocket: WebSocket, watch: TokenWatch) -> None:
+    """Close connections that neither send nor receive once the token is invalid."""
+    while True:
+        await asyncio.sleep(watch.next_check_in())
+        if not await watch.is_valid():
+            await _close(websocket, status.WS_1008_POLICY_VIOLATION)
+            return
+
+
+async def send_messages(
+    websocket: WebSocket, subscription: Subscription, watch: TokenWatch
+) -> None:
+    while True:
+        text = await subscription.get()
+        if not await watch.is_valid():
+            await _close(websocket, status.WS_1008_POLICY_VIOLATION)
+            return
+
+        await websocket.send_text(text)
+
+
+async def receive_messages(
+    websocket: WebSocket,
+    subscription: Subscription,
+    user: User,
+    peers: Peers,
+    watch: TokenWatch,
+) -> None:
+    while True:
+        raw = await receive_text(websocket)
+        if not await watch.is_valid():
+            await _close(websocket, status.WS_1008_POLICY_VIOLATION)
+            return
+
+        try:
+            message = ClientMessage.model_validate_json(raw)
+        except ValidationError:
+            subscription.push(json.dumps({"error": "INVALID_MESSAGE"}))
+            continue
+
+        peer_ids = await peers.get()
+        if message.to is not None and message.to not in peer_ids:
+            subscription.push(json.dumps({"error": "NOT_A_PEER"}))
+            continue
+
+        targets = peer_ids if message.to is None else (message.to,)
+        hub.publish(targets, json.dumps({"from": user.id, "data": message.data}))
+
+
+@router.websocket("/ws")
+async def websocket_endpoint(websocket: WebSocket):
+    """
+    Long-lived channel between cameras and their owners.
+
+    The first message must be ``{"token": "<access token>"}``. After that
+    ``{"to": <user id>, "data": ...}`` is delivered to that peer, or to every
+    peer without ``to``, as ``{"from": <user id>, "data": ...}``.
+    """
+    await websocket.accept()
+
+    container: AuthContainer = websocket.app.state.auth
+    try:
+        authenticated = await authenticate(websocket, container)
+    except WebSocketDisconnect:
+        return
+    except Exception:
+        logger.exception("Websocket authentication failed")
+        await _close(websocket, status.WS_1011_INTERNAL_ERROR)
+        return
+
+    if authenticated is None:
+        await websocket.close(status.WS_1008_POLICY_VIOLATION)
+        return
+
+    user, peers, expires_at = authenticated
+    watch = TokenWatch(user, int(time.time()), expires_at, container.auth_sync)
+    subscription = hub.subscribe(user.id)
+    try:
+        async with anyio.create_task_group() as task_group:
+            task_group.start_soon(
+                _until_disconnect,
+                task_group,
+                send_messages(websocket, subscription, watch),
+            )
+            task_group.start_soon(
+                _until_disconnect,
+                task_group,
+                receive_messages(websocket, subscription, user, peers, watch),
+            )
+            task_group.start_soon(
+                _until_disconnect, task_group, watch_token(websocket, watch)
+            )
+    except Exception:
+        logger.exception("Websocket of user %s failed", user.id)
+        await _close(websocket, status.WS_1011_INTERNAL_ERROR)
+    finally:
+        hub.unsubscribe(subscription)
+
+
+async def _close(websocket: WebSocket, code: int) -> None:
+    if (
+        websocket.application_state == WebSocketState.CONNECTED
+        and websocket.client_state == WebSocketState.CONNECTED
+    ):
+        await websocket.close(code)
+
+
+async def _until_disconnect(
+    task_group: anyio.abc.TaskGroup, coroutine: Awaitable[None]
+) -> None:
+    # Either side ending closes the other one too.
+    try:
+        await coroutine
+    except WebSocketDisconnect:
+        pass
+    finally:
+        task_group.cancel_scope.cancel()
@@ -0,0 +1,9 @@
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class ClientMessage(BaseModel):
+    # Peer to deliver to, every peer if omitted.
+    to: Optional[int] = None
+    data: Any
@@ -9,7 +9,7 @@ const isDev = require("electron-is-dev")
 const execFile = require("child_process").execFile
 
 const API_PROD_PATH = path.join(process.resourcesPath, "../lib/api/api.exe")
-const API_DEV_PATH = path.join(__dirname, "../../../engine/api.py")
+const API_DEV_PATH = path.join(__dirname, "../../../engine/server.py")
 const INDEX_PATH = path.join(__dirname, '../../src/render/index.html')
 const app_instance = app.requestSingleInstanceLock()
 
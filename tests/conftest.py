@@ -0,0 +1,109 @@
+import os
+import tempfile
+import uuid
+
+# Settings are read on import, engine.db must not open the app database.
+_db_dir = tempfile.mkdtemp(prefix="engine-tests-")
+os.environ["DATABASE_URL"] = f"sqlite+aiosqlite:///{_db_dir}/engine.db"
+# Tests log in over and over from one address, tests of the limits set their own.
+os.environ["LOGIN_RATE_LIMIT_IP"] = str(2**31)
+os.environ["LOGIN_RATE_LIMIT_USERNAME"] = str(2**31)
+
+import httpx
+import pytest
+
+ADMIN_USERNAME = "ondrei"
+ADMIN_PASSWORD = "a1024lagno"
+
+
+@pytest.fixture(scope="session")
+def anyio_backend() -> str:
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+async def database():
+    from engine import db_preset
+    from engine.db import dispose_engines
+
+    await db_preset.main()
+    yield
+    await dispose_engines()
+
+
+@pytest.fixture
+async def app(database):
+    from engine.api import app
+
+    async with app.router.lifespan_context(app):
+        yield app
+
+
+@pytest.fixture
+async def client(app):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        yield client
+
+
+async def login(client: httpx.AsyncClient, username: str, password: str) -> dict:
+    response = await client.post(
+        "/login", data={"username": username, "password": password}
+    )
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def usernames(count: int) -> list[str]:
+    """Usernames no other test uses, the database is shared by the session."""
+    prefix = uuid.uuid4().hex
+    return [f"{prefix}-{i}" for i in range(count)]
+
+
+def bearer(access_token: str) -> dict[str, str]:
+    return {"Authorization": f"Bearer {access_token}"}
+
+
+@pytest.fixture
+async def admin_headers(client) -> dict[str, str]:
+    tokens = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+    return bearer(tokens["access_token"])
+
+
+@pytest.fixture
+async def create_users(database):
+    """Create users of a new role, pages filtered by it hold only them."""
+    from engine.auth.repos import RoleRepository, UserRepository
+    from engine.db import write_session_maker
+
+    async def create(usernames: list[str]):
+        async with write_session_maker() as session:
+            role = await RoleRepository(session).create(
+                {"name": f"test-{uuid.uuid4().hex}"}
+            )
+            return await UserRepository(session).create_many(
+                [
+                    {"username": username, "hashed_password": "-", "role_id": role.id}
+                    for username in usernames
+                ]
+            )
+
+    return create
+
+
+@pytest.fixture
+async def user_manager(app):
+    from engine.auth.repos import RoleRepository, UserRepository
+    from engine.auth.repos.refresh_tokens_repo import RefreshTokenRepository
+    from engine.auth.services.user_manager import UserManager
+    from engine.db import write_session_maker
+
+    container = app.state.auth
+    async with write_session_maker() as session:
+        yield UserManager(
+            UserRepository(session),
+            RoleRepository(session),
+            container.password_helper,
+            container.token_cache,
+            RefreshTokenRepository(session),
+        )
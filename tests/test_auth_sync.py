@@ -0,0 +1,136 @@
+import time
+
+import pytest
+from sqlalchemy import insert, select, update
+
+from engine.auth import auth_sync
+from engine.auth.auth_sync import (
+    LINK_CHANGED,
+    ORIGIN,
+    ROLE_CHANGED,
+    USER_CHANGED,
+    AuthSync,
+    record_changes,
+)
+from engine.auth.models import AuthChangeORMModel, RoleORMModel, UserORMModel
+from engine.auth.ownership_cache import OwnershipCache
+from engine.auth.role_registry import role_registry
+from engine.auth.token_cache import UserTokenCache
+from engine.auth.token_versions import token_versions
+from engine.config import AUTH_CHANGES_MAX_AGE
+from engine.db import read_session_maker, write_session_maker
+from .conftest import usernames
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def sync(database):
+    """State of another worker, which applies the changes of this process."""
+    sync = AuthSync(UserTokenCache(100, 60), OwnershipCache(100, 60), 0, origin="other")
+    async with read_session_maker() as session:
+        await sync.load(session)
+    return sync
+
+
+async def change(kind: str, entity_ids: list[int], related_id=None, values=None):
+    async with write_session_maker() as session, session.begin():
+        if values is not None:
+            await session.execute(values)
+        await record_changes(session, kind, entity_ids, related_id)
+
+
+async def test_single_worker_does_not_poll(monkeypatch):
+    def fail():
+        raise AssertionError("queried the database")
+
+    monkeypatch.setattr(auth_sync, "read_session_maker", fail)
+    sync = AuthSync(UserTokenCache(100, 60), OwnershipCache(100, 60), None)
+
+    await sync.check()
+
+
+async def test_user_change_invalidates_only_that_user(sync, create_users):
+    changed, other = await create_users(usernames(2))
+    sync.token_cache.set("changed", changed)
+    sync.token_cache.set("other", other)
+
+    await change(
+        USER_CHANGED,
+        [changed.id],
+        values=update(UserORMModel)
+        .where(UserORMModel.id == changed.id)
+        .values(token_version=3),
+    )
+    await sync.check()
+
+    assert sync.token_cache.get("changed") is None
+    assert sync.token_cache.get("other") == other
+    assert token_versions.get(changed.id) == 3
+
+
+async def test_link_change_forgets_only_that_link(sync):
+    sync.ownership_cache.set(1, 2, False)
+    sync.ownership_cache.set(1, 3, True)
+
+    await change(LINK_CHANGED, [1], 2)
+    await sync.check()
+
+    assert sync.ownership_cache.get(1, 2) is None
+    assert sync.ownership_cache.get(1, 3) is True
+
+
+async def test_role_change_reloads_that_role(sync, create_users):
+    user, other = await create_users(usernames(1)) + await create_users(usernames(1))
+    sync.token_cache.set("user", user)
+    sync.token_cache.set("other", other)
+    new_name = f"renamed-{user.role.id}"
+
+    await change(
+        ROLE_CHANGED,
+        [user.role.id],
+        values=update(RoleORMModel)
+        .where(RoleORMModel.id == user.role.id)
+        .values(name=new_name),
+    )
+    await sync.check()
+
+    assert role_registry.get(user.role.id).name == new_name
+    assert sync.token_cache.get("user") is None
+    assert sync.token_cache.get("other") == other
+
+
+async def test_own_changes_are_skipped(sync, create_users):
+    (user,) = await create_users(usernames(1))
+    sync.origin = ORIGIN
+    sync.token_cache.set("user", user)
+
+    await change(USER_CHANGED, [user.id])
+    await sync.check()
+
+    assert sync.token_cache.get("user") == user
+
+
+async def test_stale_worker_reloads_everything(sync, create_users):
+    (user,) = await create_users(usernames(1))
+    sync.token_cache.set("user", user)
+    sync._checked_at = time.monotonic() - AUTH_CHANGES_MAX_AGE - 1
+
+    await sync.check()
+
+    assert sync.token_cache.get("user") is None
+
+
+async def test_old_changes_are_deleted(database):
+    async with write_session_maker() as session, session.begin():
+        await session.execute(
+            insert(AuthChangeORMModel).values(
+                kind=USER_CHANGED, entity_id=1, origin="old", changed_at=0
+            )
+        )
+
+    await change(USER_CHANGED, [1])
+
+    async with read_session_maker() as session:
+        origins = await session.scalars(select(AuthChangeORMModel.origin))
+        assert "old" not in set(origins)
@@ -0,0 +1,163 @@
+from typing import Optional
+
+import pytest
+
+from engine.auth.domain import User
+from engine.auth.exceptions import UserNotExists
+from engine.auth.repos import UserRepository
+from engine.auth.schemas.schemes import UserGenerateMany, UserUpdate
+from engine.db import read_session_maker, write_session_maker
+from engine.exceptions import ObjectDoesNotExist
+from .conftest import bearer, login, usernames
+
+pytestmark = pytest.mark.anyio
+
+
+async def get_users(ids: list[int]) -> list[Optional[User]]:
+    async with read_session_maker() as session:
+        repo = UserRepository(session)
+        return [(await repo.get(id_)) for id_ in ids]
+
+
+@pytest.fixture
+async def roles(user_manager) -> dict[str, int]:
+    return {role.name: role.id for role in await user_manager.role_repo.get_all()}
+
+
+@pytest.fixture
+async def logged_in(client, user_manager, roles):
+    """Generated clients with their tokens."""
+    users = await user_manager.generate_users(
+        UserGenerateMany(role_id=roles["client"], count=3)
+    )
+    return [
+        (user.user_id, await login(client, user.username, user.password))
+        for user in users
+    ]
+
+
+async def my_role(client, tokens: dict):
+    return await client.get("/roles/my_role", headers=bearer(tokens["access_token"]))
+
+
+async def test_create_many_keeps_order(create_users):
+    names = usernames(5)
+
+    users = await create_users(names)
+
+    assert [user.username for user in users] == names
+    assert len({user.id for user in users}) == 5
+    assert len({user.role.id for user in users}) == 1
+
+
+async def test_update_many(create_users, roles):
+    users = await create_users(usernames(3))
+    ids = [user.id for user in users]
+
+    async with write_session_maker() as session:
+        updated = await UserRepository(session).update_many(
+            ids, {"role_id": roles["camera"]}
+        )
+
+    assert [user.id for user in updated] == ids
+    assert {user.role.name for user in await get_users(ids)} == {"camera"}
+
+
+async def test_update_many_with_missing_id_changes_nothing(create_users, roles):
+    users = await create_users(usernames(2))
+    ids = [user.id for user in users]
+
+    async with write_session_maker() as session:
+        with pytest.raises(ObjectDoesNotExist):
+            await UserRepository(session).update_many(
+                [*ids, 10**9], {"role_id": roles["camera"]}
+            )
+
+    assert [user.role.id for user in await get_users(ids)] == [users[0].role.id] * 2
+
+
+async def test_update_many_without_values(create_users, user_manager):
+    users = await create_users(usernames(2))
+    ids = [user.id for user in users]
+
+    async with write_session_maker() as session:
+        repo = UserRepository(session)
+        assert await repo.update_many(ids, {}) == users
+        with pytest.raises(ObjectDoesNotExist):
+            await repo.update_many([*ids, 10**9], {})
+
+    assert await user_manager.update_many(ids, UserUpdate()) == users
+
+
+async def test_delete_many_with_missing_id_deletes_nothing(create_users):
+    users = await create_users(usernames(2))
+    ids = [user.id for user in users]
+
+    async with write_session_maker() as session:
+        with pytest.raises(ObjectDoesNotExist):
+            await UserRepository(session).delete_many([*ids, 10**9])
+        assert await UserRepository(session).delete_many(ids) == users
+
+    assert await get_users(ids) == [None, None]
+
+
+async def test_update_many_role_invalidates_tokens(
+    client, user_manager, roles, logged_in
+):
+    for _, tokens in logged_in:
+        assert (await my_role(client, tokens)).json()["name"] == "client"
+
+    await user_manager.update_many(
+        [user_id for user_id, _ in logged_in], UserUpdate(role_id=roles["camera"])
+    )
+
+    for _, tokens in logged_in:
+        assert (await my_role(client, tokens)).status_code == 401
+        response = await client.post(
+            "/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+
+async def test_update_many_without_role_or_password_keeps_tokens(
+    client, user_manager, logged_in
+):
+    user_id, tokens = logged_in[0]
+
+    await user_manager.update_many([user_id], UserUpdate(username=usernames(1)[0]))
+
+    assert (await my_role(client, tokens)).status_code == 200
+
+
+async def test_delete_many_invalidates_tokens(client, user_manager, logged_in):
+    await user_manager.delete_many([user_id for user_id, _ in logged_in])
+
+    for _, tokens in logged_in:
+        assert (await my_role(client, tokens)).status_code == 401
+        response = await client.post(
+            "/refresh", json={"refresh_token": tokens["refresh_token"]}
+        )
+        assert response.status_code == 401
+
+
+async def test_delete_many_with_missing_id_keeps_tokens(
+    client, user_manager, logged_in
+):
+    with pytest.raises(UserNotExists):
+        await user_manager.delete_many([user_id for user_id, _ in logged_in] + [10**9])
+
+    for _, tokens in logged_in:
+        assert (await my_role(client, tokens)).status_code == 200
+
+
+async def test_deleted_ids_are_not_reused(client, user_manager, roles, logged_in):
+    deleted_ids = [user_id for user_id, _ in logged_in]
+    await user_manager.delete_many(deleted_ids)
+
+    (user,) = await user_manager.generate_users(
+        UserGenerateMany(role_id=roles["client"], count=1)
+    )
+    tokens = await login(client, user.username, user.password)
+
+    assert user.user_id > max(deleted_ids)
+    assert (await my_role(client, tokens)).status_code == 200
@@ -0,0 +1,65 @@
+import pytest
+
+from .conftest import usernames
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def owner_and_camera(create_users):
+    owner, camera = await create_users(usernames(2))
+    return owner.id, camera.id
+
+
+async def link(client, headers, owner_id: int, camera_id: int):
+    return await client.post(
+        "/cameras",
+        json={"owner_id": owner_id, "camera_id": camera_id},
+        headers=headers,
+    )
+
+
+async def test_link_and_unlink(client, admin_headers, owner_and_camera):
+    owner_id, camera_id = owner_and_camera
+
+    response = await link(client, admin_headers, owner_id, camera_id)
+    assert response.status_code == 200
+    assert response.json()["owner_id"] == owner_id
+
+    response = await client.delete(
+        f"/cameras/{camera_id}/owners/{owner_id}", headers=admin_headers
+    )
+    assert response.status_code == 204
+    response = await client.delete(
+        f"/cameras/{camera_id}/owners/{owner_id}", headers=admin_headers
+    )
+    assert response.status_code == 404
+
+
+async def test_repeated_link_conflicts(client, admin_headers, owner_and_camera):
+    await link(client, admin_headers, *owner_and_camera)
+
+    response = await link(client, admin_headers, *owner_and_camera)
+
+    assert response.status_code == 409
+    assert response.json()["detail"][0]["type"] == "CameraOwnerAlreadyExists"
+
+
+@pytest.mark.parametrize("missing", ["owner", "camera"])
+async def test_link_to_missing_user_is_not_found(
+    client, admin_headers, owner_and_camera, missing
+):
+    owner_id, camera_id = owner_and_camera
+    if missing == "owner":
+        owner_id = 10**9
+    else:
+        camera_id = 10**9
+
+    response = await link(client, admin_headers, owner_id, camera_id)
+
+    assert response.status_code == 404
+    assert response.json()["detail"][0] == {
+        "loc": ["body"],
+        "msg": f"User '{10**9}' does not exist.",
+        "type": "CameraOwnerUserDoesNotExist",
+    }
@@ -0,0 +1,72 @@
+import pytest
+from sqlalchemy import event, insert, select
+
+from engine import db
+from engine.auth.models import AuthChangeORMModel, RoleORMModel
+from engine.db import async_session_maker, engine, read_engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def executed(database):
+    """Statements run by each engine, "writer" or "reader"."""
+    if read_engine is engine:
+        pytest.skip("reads are not routed without a separate read engine")
+
+    executed = {"writer": [], "reader": []}
+    listeners = []
+    for name, db_engine in (("writer", engine), ("reader", read_engine)):
+
+        def record(conn, cursor, statement, *args, name=name) -> None:
+            executed[name].append(statement.split()[0].upper())
+
+        event.listen(db_engine.sync_engine, "before_cursor_execute", record)
+        listeners.append((db_engine.sync_engine, record))
+
+    yield executed
+    for sync_engine, record in listeners:
+        event.remove(sync_engine, "before_cursor_execute", record)
+
+
+def change_row() -> dict:
+    return {"kind": "test", "entity_id": 0, "origin": "test", "changed_at": 0}
+
+
+async def test_write_session_inserts_on_writer(executed):
+    async for session in db.get_write_session():
+        await session.execute(insert(AuthChangeORMModel).values(**change_row()))
+        await session.commit()
+
+    assert "INSERT" in executed["writer"]
+    assert executed["reader"] == []
+
+
+async def test_routed_session_reads_from_reader(executed):
+    async with async_session_maker() as session:
+        await session.scalars(select(RoleORMModel))
+
+    assert "SELECT" in executed["reader"]
+    assert executed["writer"] == []
+
+
+async def test_routed_session_flushes_on_writer(executed):
+    async with async_session_maker() as session:
+        session.add(AuthChangeORMModel(**change_row()))
+        await session.flush()
+        # The session then reads its own writes.
+        await session.scalars(select(AuthChangeORMModel))
+        await session.commit()
+
+    assert executed["writer"][:2] == ["INSERT", "SELECT"]
+    assert executed["reader"] == []
+
+
+async def test_routed_session_writes_statements_on_writer(executed):
+    async with async_session_maker() as session:
+        await session.scalars(select(RoleORMModel))
+        await session.execute(insert(AuthChangeORMModel).values(**change_row()))
+        await session.commit()
+
+    assert executed["reader"] == ["SELECT"]
+    assert executed["writer"] == ["INSERT"]
@@ -0,0 +1,105 @@
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import select
+
+from engine.auth.domain import User
+from engine.auth.models import UserORMModel
+from engine.base import DomainMapper
+from engine.db import read_session_maker
+
+
+class Child(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    name: str
+
+
+class Parent(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: int
+    note: Optional[str] = None
+    child: Child
+    maybe_child: Optional[Child] = None
+    children: list[Child] = []
+    maybe_children: Optional[list[Child]] = None
+    by_name: dict[str, Child] = {}
+
+
+class Row(SimpleNamespace):
+    """Stands in for an ORM class, the mapper reads attributes it declares."""
+
+    id = name = note = child = maybe_child = None
+    children = maybe_children = by_name = None
+
+
+def child(id_: int) -> Row:
+    return Row(id=id_, name=f"child-{id_}")
+
+
+@pytest.mark.parametrize(
+    "row",
+    [
+        Row(
+            id=1,
+            note="full",
+            child=child(1),
+            maybe_child=child(2),
+            children=[child(3), child(4)],
+            maybe_children=[child(5)],
+            by_name={"six": child(6)},
+        ),
+        Row(
+            id=2,
+            note=None,
+            child=child(1),
+            maybe_child=None,
+            children=[],
+            maybe_children=None,
+            by_name={},
+        ),
+    ],
+)
+def test_nested_fields_match_model_validate(row):
+    mapped = DomainMapper(Parent).map(row)
+
+    assert mapped == Parent.model_validate(row)
+    assert type(mapped.maybe_child) is type(Parent.model_validate(row).maybe_child)
+    assert all(type(item) is Child for item in mapped.children)
+    assert all(type(item) is Child for item in mapped.by_name.values())
+
+
+def test_related_rows_are_mapped_once():
+    shared = child(1)
+    rows = [
+        Row(
+            id=id_,
+            note=None,
+            child=shared,
+            maybe_child=shared,
+            children=[shared],
+            maybe_children=None,
+            by_name={},
+        )
+        for id_ in range(2)
+    ]
+
+    first, second = DomainMapper(Parent).map_many(rows)
+
+    assert first.child is second.child is first.maybe_child is first.children[0]
+
+
+@pytest.mark.anyio
+async def test_orm_rows_match_model_validate(create_users):
+    await create_users(["mapper-a", "mapper-b"])
+
+    async with read_session_maker() as session:
+        rows = (await session.scalars(select(UserORMModel))).unique().all()
+        mapped = DomainMapper(User).map_many(rows)
+        validated = [User.model_validate(row) for row in rows]
+
+    assert mapped == validated
@@ -0,0 +1,125 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from engine.db import create_db_engine
+from engine.migrations import migrate, plan
+from engine.migrations.versions import BASELINE_VERSION
+from engine.schema import SCHEMA_VERSION, get_schema_version
+
+pytestmark = pytest.mark.anyio
+
+# Tables as created before migrations existed.
+BASELINE_SCHEMA = [
+    """
+    CREATE TABLE roles (
+        id INTEGER NOT NULL,
+        name VARCHAR(320) NOT NULL,
+        PRIMARY KEY (id),
+        UNIQUE (name)
+    )
+    """,
+    """
+    CREATE TABLE users (
+        id INTEGER NOT NULL,
+        username VARCHAR(320) NOT NULL,
+        hashed_password VARCHAR(1024) NOT NULL,
+        role_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(role_id) REFERENCES roles (id)
+    )
+    """,
+    "CREATE UNIQUE INDEX ix_users_username ON users (username)",
+    """
+    CREATE TABLE camera_owner (
+        id INTEGER NOT NULL,
+        owner_id INTEGER NOT NULL,
+        camera_id INTEGER NOT NULL,
+        PRIMARY KEY (id),
+        FOREIGN KEY(owner_id) REFERENCES users (id),
+        FOREIGN KEY(camera_id) REFERENCES users (id)
+    )
+    """,
+]
+
+
+@pytest.fixture
+async def db_engine(tmp_path):
+    db_engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}")
+    yield db_engine
+    await db_engine.dispose()
+
+
+async def create_baseline(
+    db_engine: AsyncEngine, camera_owners: list[tuple[int, int, int]] = ()
+) -> None:
+    async with db_engine.begin() as conn:
+        for ddl in BASELINE_SCHEMA:
+            await conn.execute(text(ddl))
+        await conn.execute(
+            text("INSERT INTO roles (id, name) VALUES (1, 'admin'), (2, 'camera')")
+        )
+        await conn.execute(
+            text(
+                "INSERT INTO users (id, username, hashed_password, role_id)"
+                " VALUES (1, 'owner', 'hash', 1), (2, 'camera', 'hash', 2)"
+            )
+        )
+        for row in camera_owners:
+            await conn.execute(
+                text("INSERT INTO camera_owner VALUES (:id, :owner_id, :camera_id)"),
+                dict(zip(("id", "owner_id", "camera_id"), row)),
+            )
+
+
+async def schema_version(db_engine: AsyncEngine) -> int:
+    async with db_engine.connect() as conn:
+        return await conn.run_sync(get_schema_version)
+
+
+async def test_new_database_is_created_at_latest_version(db_engine):
+    assert await migrate(db_engine, None) == SCHEMA_VERSION
+    assert await schema_version(db_engine) == SCHEMA_VERSION
+    assert await plan(db_engine) == []
+
+
+async def test_pre_versioning_database_is_migrated(db_engine):
+    await create_baseline(db_engine)
+
+    assert await schema_version(db_engine) is None
+    assert await migrate(db_engine, None) == SCHEMA_VERSION
+    assert await schema_version(db_engine) == SCHEMA_VERSION
+    assert await plan(db_engine) == []
+
+    async with db_engine.connect() as conn:
+        res = await conn.execute(
+            text("SELECT username, token_version FROM users ORDER BY id")
+        )
+        assert res.all() == [("owner", 0), ("camera", 0)]
+
+
+async def test_migrations_can_be_run_again(db_engine):
+    await create_baseline(db_engine)
+    await migrate(db_engine, None)
+
+    # As after a run interrupted before its versions were recorded.
+    assert await migrate(db_engine, BASELINE_VERSION) == SCHEMA_VERSION
+    assert await migrate(db_engine, SCHEMA_VERSION) == SCHEMA_VERSION
+    assert await plan(db_engine) == []
+
+
+async def test_duplicate_camera_owners_are_removed(db_engine):
+    await create_baseline(db_engine, [(1, 1, 2), (2, 1, 2), (3, 2, 1), (4, 1, 2)])
+
+    assert await migrate(db_engine, None) == SCHEMA_VERSION
+
+    async with db_engine.connect() as conn:
+        res = await conn.execute(text("SELECT * FROM camera_owner ORDER BY id"))
+        assert res.all() == [(1, 1, 2), (3, 2, 1)]
+
+    with pytest.raises(IntegrityError):
+        async with db_engine.begin() as conn:
+            await conn.execute(
+                text("INSERT INTO camera_owner (owner_id, camera_id) VALUES (1, 2)")
+            )
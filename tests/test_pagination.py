@@ -0,0 +1,113 @@
+import uuid
+
+import pytest
+
+from engine.auth.repos import UserRepository
+from engine.auth.repos.refresh_tokens_repo import RefreshTokenRepository
+from engine.base import encode_cursor
+from engine.db import read_session_maker
+from .conftest import usernames
+
+pytestmark = pytest.mark.anyio
+
+
+async def walk_pages(client, headers, role_id: int, limit: int) -> list[list[int]]:
+    pages = []
+    params = {"role_id": role_id, "limit": limit}
+    while True:
+        response = await client.get("/users", params=params, headers=headers)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append([user["id"] for user in page["items"]])
+        if page["next_cursor"] is None:
+            return pages
+        params["cursor"] = page["next_cursor"]
+
+
+async def test_pages_cover_all_users_once(client, admin_headers, create_users):
+    users = await create_users(usernames(7))
+
+    pages = await walk_pages(client, admin_headers, users[0].role.id, limit=3)
+
+    assert [len(page) for page in pages] == [3, 3, 1]
+    assert sum(pages, []) == sorted(user.id for user in users)
+
+
+async def test_last_full_page_has_no_cursor(client, admin_headers, create_users):
+    users = await create_users(usernames(4))
+
+    pages = await walk_pages(client, admin_headers, users[0].role.id, limit=2)
+
+    assert [len(page) for page in pages] == [2, 2]
+
+
+async def test_pages_ordered_by_column(create_users):
+    # Inserted out of order, ids and usernames sort differently.
+    prefix = uuid.uuid4().hex
+    users = await create_users([f"{prefix}-{name}" for name in "cadbe"])
+    role_id = users[0].role.id
+    found = []
+    cursor = None
+
+    async with read_session_maker() as session:
+        repo = UserRepository(session)
+        while True:
+            page = await repo.get_page(2, cursor, order_by="username", role_id=role_id)
+            found.extend(
+                user.username.removeprefix(f"{prefix}-") for user in page.items
+            )
+            if page.next_cursor is None:
+                break
+            cursor = page.next_cursor
+
+    assert found == ["a", "b", "c", "d", "e"]
+
+
+@pytest.mark.parametrize(
+    "repo_class, order_by",
+    [
+        (UserRepository, "missing"),
+        (RefreshTokenRepository, "revoked_at"),  # nullable
+        (RefreshTokenRepository, "revoked"),  # bool, not a JSON scalar cursors accept
+    ],
+)
+async def test_unorderable_columns_are_rejected(database, repo_class, order_by):
+    async with read_session_maker() as session:
+        with pytest.raises(ValueError):
+            await repo_class(session).get_page(10, order_by=order_by)
+
+
+@pytest.mark.parametrize(
+    "cursor",
+    [
+        "not base64!",
+        "bm90IGpzb24",  # "not json"
+        encode_cursor(["id", 1]),
+        encode_cursor(["username", "a", 1]),
+        encode_cursor(["id", None, None]),
+        encode_cursor(["id", {"id": 1}, 1]),
+    ],
+)
+async def test_invalid_cursor_is_rejected(client, admin_headers, cursor):
+    response = await client.get(
+        "/users", params={"cursor": cursor}, headers=admin_headers
+    )
+
+    assert response.status_code == 400
+    assert response.json()["detail"][0]["type"] == "InvalidCursor"
+
+
+async def test_pages_leave_out_password_hashes(client, admin_headers, create_users):
+    users = await create_users(usernames(1))
+
+    response = await client.get(
+        "/users", params={"role_id": users[0].role.id}, headers=admin_headers
+    )
+
+    assert response.json()["items"] == [
+        {
+            "id": users[0].id,
+            "username": users[0].username,
+            "role": {"id": users[0].role.id, "name": users[0].role.name},
+        }
+    ]
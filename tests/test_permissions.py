@@ -0,0 +1,86 @@
+import pytest
+
+from engine.auth.domain import Principal, Role
+from engine.auth.permissions import (
+    DEFAULT_PERMISSIONS,
+    Permission,
+    PermissionTable,
+)
+from engine.auth.schemas.schemes import UserGenerateMany
+from engine.exceptions import PermissionDenied
+from .conftest import bearer, login, usernames
+
+ADMIN = Role(id=1, name="admin")
+CLIENT = Role(id=2, name="client")
+
+
+@pytest.fixture
+def table() -> PermissionTable:
+    table = PermissionTable(
+        {"admin": Permission.ALL, "client": Permission.READ_ROLES},
+        DEFAULT_PERMISSIONS,
+    )
+    table.compile([ADMIN, CLIENT])
+    return table
+
+
+def test_compiled_roles(table):
+    assert table.get(ADMIN) == Permission.ALL
+    assert table.get(CLIENT) == Permission.READ_ROLES
+
+
+def test_has_requires_every_permission(table):
+    assert table.has(CLIENT, Permission.READ_ROLES)
+    assert not table.has(CLIENT, Permission.READ_ROLES | Permission.READ_USERS)
+    assert table.has(ADMIN, Permission.READ_USERS | Permission.MANAGE_USERS)
+
+
+def test_unlisted_role_gets_the_defaults(table):
+    assert table.get(Role(id=3, name="runtime")) == DEFAULT_PERMISSIONS
+
+
+def test_renamed_role_gets_the_permissions_of_its_name(table):
+    assert table.get(Role(id=ADMIN.id, name="renamed")) == DEFAULT_PERMISSIONS
+    assert table.get(Role(id=3, name="admin")) == Permission.ALL
+
+
+def test_check(table):
+    table.check(Principal(id=1, role=ADMIN), Permission.MANAGE_USERS)
+    with pytest.raises(PermissionDenied):
+        table.check(Principal(id=2, role=CLIENT), Permission.MANAGE_USERS)
+
+
+async def role_headers(client, user_manager, role_id: int) -> dict[str, str]:
+    (user,) = await user_manager.generate_users(
+        UserGenerateMany(role_id=role_id, count=1)
+    )
+    tokens = await login(client, user.username, user.password)
+    return bearer(tokens["access_token"])
+
+
+@pytest.mark.anyio
+async def test_client_cannot_read_users(client, admin_headers, user_manager):
+    roles = {role.name: role.id for role in await user_manager.role_repo.get_all()}
+    headers = await role_headers(client, user_manager, roles["client"])
+
+    response = await client.get("/users", headers=headers)
+
+    assert response.status_code == 403
+    assert response.json()["detail"][0]["type"] == "PermissionDenied"
+    assert (await client.get("/users", headers=admin_headers)).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_runtime_role_gets_the_defaults(client, admin_headers, user_manager):
+    response = await client.post(
+        "/roles", json={"name": usernames(1)[0]}, headers=admin_headers
+    )
+    assert response.status_code == 200
+    role_id = response.json()["id"]
+    headers = await role_headers(client, user_manager, role_id)
+
+    assert (await client.get("/roles", headers=headers)).status_code == 200
+    response = await client.get("/roles/my_role", headers=headers)
+    assert response.status_code == 200
+    assert response.json()["id"] == role_id
+    assert (await client.get("/users", headers=headers)).status_code == 403
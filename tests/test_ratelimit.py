@@ -0,0 +1,150 @@
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from engine.db import create_db_engine
+from engine.migrations import migrate
+from engine.ratelimit import (
+    DatabaseRateLimitBackend,
+    MemoryRateLimitBackend,
+    RateLimitHitORMModel,
+    RateLimiter,
+)
+from .conftest import ADMIN_PASSWORD, ADMIN_USERNAME
+
+pytestmark = pytest.mark.anyio
+
+
+class Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock() -> Clock:
+    return Clock()
+
+
+@pytest.fixture
+async def session_maker(tmp_path):
+    db_engine = create_db_engine(f"sqlite+aiosqlite:///{tmp_path / 'engine.db'}")
+    await migrate(db_engine, None)
+    yield async_sessionmaker(db_engine, expire_on_commit=False)
+    await db_engine.dispose()
+
+
+@pytest.fixture(params=["memory", "database"])
+def backend(request, clock):
+    if request.param == "memory":
+        return MemoryRateLimitBackend(100, timer=clock)
+
+    session_maker = request.getfixturevalue("session_maker")
+    return DatabaseRateLimitBackend(session_maker, max_age=60, timer=clock)
+
+
+async def test_hits_over_limit_wait_for_oldest(backend, clock):
+    for _ in range(3):
+        assert await backend.hit("key", 3, 10) == 0
+        clock.now += 1
+
+    assert await backend.hit("key", 3, 10) == pytest.approx(7)
+
+
+async def test_window_slides(backend, clock):
+    for _ in range(3):
+        await backend.hit("key", 3, 10)
+        clock.now += 1
+
+    clock.now += 7.5
+    assert await backend.hit("key", 3, 10) == 0
+    assert await backend.hit("key", 3, 10) == pytest.approx(0.5)
+
+
+async def test_keys_are_independent(backend):
+    assert await backend.hit("a", 1, 10) == 0
+    assert await backend.hit("a", 1, 10) > 0
+    assert await backend.hit("b", 1, 10) == 0
+
+
+async def test_reset(backend):
+    await backend.hit("key", 1, 10)
+
+    await backend.reset("key")
+
+    assert await backend.hit("key", 1, 10) == 0
+
+
+async def test_limiters_with_prefixes_share_backend(backend):
+    by_username = RateLimiter(backend, 1, 10, prefix="username:")
+    by_ip = RateLimiter(backend, 1, 10, prefix="ip:")
+
+    assert await by_username.hit("127.0.0.1") == 0
+    assert await by_ip.hit("127.0.0.1") == 0
+    assert await by_ip.hit("127.0.0.1") > 0
+
+
+async def test_memory_backend_is_bounded(clock):
+    backend = MemoryRateLimitBackend(2, timer=clock)
+
+    for key in ("a", "b", "a", "c"):
+        await backend.hit(key, 1, 10)
+
+    assert len(backend) == 2
+    # "b" was hit least recently and forgotten.
+    assert await backend.hit("b", 1, 10) == 0
+    assert await backend.hit("c", 1, 10) > 0
+
+
+async def test_database_backend_deletes_old_hits(session_maker, clock):
+    backend = DatabaseRateLimitBackend(session_maker, max_age=60, timer=clock)
+    await backend.hit("a", 5, 60)
+    await backend.hit("b", 5, 60)
+
+    clock.now += 60
+    await backend.hit("c", 5, 60)
+
+    async with session_maker() as session:
+        keys = await session.scalars(select(RateLimitHitORMModel.key))
+        assert list(keys) == ["c"]
+
+
+async def test_database_backend_is_shared(session_maker, clock):
+    workers = [
+        DatabaseRateLimitBackend(session_maker, max_age=60, timer=clock)
+        for _ in range(2)
+    ]
+
+    assert await workers[0].hit("key", 2, 60) == 0
+    assert await workers[1].hit("key", 2, 60) == 0
+    assert await workers[0].hit("key", 2, 60) > 0
+
+    async with session_maker() as session:
+        assert await session.scalar(select(func.count(RateLimitHitORMModel.id))) == 2
+
+
+async def test_login_over_limit_is_rejected(client, app, monkeypatch):
+    limiter = RateLimiter(MemoryRateLimitBackend(100), 2, 60)
+    monkeypatch.setattr(app.state.auth, "username_limiter", limiter)
+    credentials = {"username": ADMIN_USERNAME, "password": "wrong"}
+
+    for _ in range(2):
+        response = await client.post("/login", data=credentials)
+        assert response.status_code == 400
+
+    credentials["password"] = ADMIN_PASSWORD
+    response = await client.post("/login", data=credentials)
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+
+
+async def test_login_resets_username_limit(client, app, monkeypatch):
+    limiter = RateLimiter(MemoryRateLimitBackend(100), 2, 60)
+    monkeypatch.setattr(app.state.auth, "username_limiter", limiter)
+    credentials = {"username": ADMIN_USERNAME, "password": ADMIN_PASSWORD}
+
+    for _ in range(3):
+        response = await client.post("/login", data=credentials)
+        assert response.status_code == 200
@@ -0,0 +1,65 @@
+import anyio
+import pytest
+
+from engine.auth import depends
+from .conftest import ADMIN_PASSWORD, ADMIN_USERNAME, bearer, login
+
+pytestmark = pytest.mark.anyio
+
+
+async def refresh(client, refresh_token: str):
+    return await client.post("/refresh", json={"refresh_token": refresh_token})
+
+
+async def test_refresh_rotates_the_token_pair(client):
+    tokens = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+
+    response = await refresh(client, tokens["refresh_token"])
+
+    assert response.status_code == 200
+    rotated = response.json()
+    assert rotated["refresh_token"] != tokens["refresh_token"]
+    response = await client.get(
+        "/roles/my_role", headers=bearer(rotated["access_token"])
+    )
+    assert response.json()["name"] == "admin"
+
+
+async def test_unknown_token_is_rejected(client):
+    response = await refresh(client, "not-a-token")
+
+    assert response.status_code == 401
+
+
+async def test_reuse_after_grace_revokes_the_family(client, monkeypatch):
+    monkeypatch.setattr(depends, "REFRESH_TOKEN_REUSE_GRACE", 0)
+    tokens = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+    rotated = (await refresh(client, tokens["refresh_token"])).json()
+
+    assert (await refresh(client, tokens["refresh_token"])).status_code == 401
+    assert (await refresh(client, rotated["refresh_token"])).status_code == 401
+
+
+async def test_reuse_within_grace_keeps_the_family(client):
+    tokens = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+    rotated = (await refresh(client, tokens["refresh_token"])).json()
+
+    assert (await refresh(client, tokens["refresh_token"])).status_code == 401
+    assert (await refresh(client, rotated["refresh_token"])).status_code == 200
+
+
+async def test_concurrent_refresh_has_one_winner(client):
+    tokens = await login(client, ADMIN_USERNAME, ADMIN_PASSWORD)
+    responses = []
+
+    async def refresh_once() -> None:
+        responses.append(await refresh(client, tokens["refresh_token"]))
+
+    async with anyio.create_task_group() as task_group:
+        task_group.start_soon(refresh_once)
+        task_group.start_soon(refresh_once)
+
+    assert sorted(response.status_code for response in responses) == [200, 401]
+    winner = next(response for response in responses if response.status_code == 200)
+    response = await refresh(client, winner.json()["refresh_token"])
+    assert response.status_code == 200
@@ -0,0 +1,107 @@
+import time
+
+import pytest
+
+from engine.auth.domain import Role
+from engine.auth.role_registry import role_registry
+from engine.auth.schemas.schemes import UserUpdate
+from engine.auth.token_versions import token_versions
+from engine.db import read_session_maker
+from .conftest import usernames
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def auth_service(app):
+    return app.state.auth.auth_service
+
+
+@pytest.fixture
+async def user(create_users):
+    (user,) = await create_users(usernames(1))
+    return user
+
+
+def claims_token(auth_service, data: dict) -> str:
+    """Token with exactly these claims besides the audience."""
+    import jwt
+
+    key = auth_service.keys.active
+    return jwt.encode(
+        {"aud": ["cam:auth"], **data},
+        key.signing_key,
+        algorithm=key.algorithm,
+        headers=key.headers,
+    )
+
+
+async def test_principal_from_claims(auth_service, user):
+    principal = auth_service.read_principal(await auth_service.write_token(user))
+
+    assert principal.id == user.id
+    assert principal.role == user.role
+    assert principal.token_version == user.token_version
+
+
+async def test_revoked_version_is_rejected(auth_service, user_manager, user):
+    token = await auth_service.write_token(user)
+
+    updated = await user_manager.update(user.id, UserUpdate(password="changed"))
+
+    assert auth_service.read_principal(token) is None
+    principal = auth_service.read_principal(await auth_service.write_token(updated))
+    assert principal.token_version == updated.token_version
+
+
+async def test_deleted_user_is_rejected(auth_service, user_manager, user):
+    token = await auth_service.write_token(user)
+
+    await user_manager.delete(user.id)
+
+    assert auth_service.read_principal(token) is None
+
+
+async def test_deleted_user_stays_rejected_after_reload(
+    auth_service, user_manager, user
+):
+    token = await auth_service.write_token(user)
+    await user_manager.delete(user.id)
+
+    # Another worker starting up knows the deletion from the tombstones only.
+    async with read_session_maker() as session:
+        await token_versions.load(session)
+
+    assert auth_service.read_principal(token) is None
+
+
+async def test_missing_role_is_rejected(auth_service, user):
+    gone = user.model_copy(update={"role": Role(id=10**9, name="gone")})
+
+    assert auth_service.read_principal(await auth_service.write_token(gone)) is None
+
+
+async def test_role_from_claims_before_registry_is_loaded(
+    auth_service, user, monkeypatch
+):
+    monkeypatch.setattr(role_registry, "loaded", False)
+    gone = user.model_copy(update={"role": Role(id=10**9, name="gone")})
+
+    principal = auth_service.read_principal(await auth_service.write_token(gone))
+
+    assert principal.role == Role(id=10**9, name="gone")
+
+
+@pytest.mark.parametrize("missing", ["sub", "role_id", "iat"])
+async def test_missing_claims_are_rejected(auth_service, user, missing):
+    data = {
+        "sub": str(user.id),
+        "role_id": user.role.id,
+        "ver": user.token_version,
+        "iat": int(time.time()),
+    }
+    assert auth_service.read_principal(claims_token(auth_service, data)) is not None
+
+    del data[missing]
+
+    assert auth_service.read_principal(claims_token(auth_service, data)) is None
@@ -0,0 +1,152 @@
+import pytest
+
+from engine.auth.domain import Role, User
+from engine.auth.schemas.schemes import UserUpdate
+from engine.auth.token_cache import UserTokenCache
+from .conftest import usernames
+
+
+def make_user(id_: int, role_id: int = 1) -> User:
+    return User(
+        id=id_,
+        username=f"user-{id_}",
+        hashed_password="-",
+        role=Role(id=role_id, name=f"role-{role_id}"),
+    )
+
+
+def test_hit():
+    cache = UserTokenCache(100, 60)
+    user = make_user(1)
+
+    cache.set("token", user)
+
+    assert cache.get("token") == user
+    assert cache.get("other") is None
+
+
+def test_invalidate_user_drops_only_its_tokens():
+    cache = UserTokenCache(100, 60)
+    cache.set("first", make_user(1))
+    cache.set("second", make_user(1))
+    cache.set("other", make_user(2))
+
+    cache.invalidate_user(1)
+
+    assert cache.get("first") is None
+    assert cache.get("second") is None
+    assert cache.get("other") == make_user(2)
+
+
+def test_user_invalidated_during_lookup_is_not_cached():
+    cache = UserTokenCache(100, 60)
+    generation = cache.generation()
+
+    cache.invalidate_user(1)
+    cache.set("stale", make_user(1), generation=generation)
+    cache.set("other", make_user(2), generation=generation)
+
+    assert cache.get("stale") is None
+    assert cache.get("other") == make_user(2)
+
+
+def test_lookup_started_after_invalidation_is_cached():
+    cache = UserTokenCache(100, 60)
+    cache.invalidate_user(1)
+
+    cache.set("fresh", make_user(1), generation=cache.generation())
+
+    assert cache.get("fresh") == make_user(1)
+
+
+def test_role_invalidation_skips_every_lookup_in_flight():
+    cache = UserTokenCache(100, 60)
+    cache.set("cached", make_user(1, role_id=1))
+    cache.set("other role", make_user(2, role_id=2))
+    generation = cache.generation()
+
+    cache.invalidate_role(1)
+    # The role of a user that is being loaded is not known yet.
+    cache.set("in flight", make_user(3, role_id=2), generation=generation)
+
+    assert cache.get("cached") is None
+    assert cache.get("other role") == make_user(2, role_id=2)
+    assert cache.get("in flight") is None
+
+
+def test_forgotten_invalidation_still_skips_stale_users():
+    cache = UserTokenCache(1, 60)
+    generation = cache.generation()
+
+    cache.invalidate_user(1)
+    # Evicts the stamp of user 1.
+    cache.invalidate_user(2)
+    cache.set("stale", make_user(1), generation=generation)
+
+    assert cache.get("stale") is None
+
+
+@pytest.fixture
+async def token_user(app, create_users):
+    (user,) = await create_users(usernames(1))
+    return await app.state.auth.auth_service.write_token(user), user
+
+
+@pytest.mark.anyio
+async def test_read_token_is_cached(app, user_manager, token_user, monkeypatch):
+    auth_service = app.state.auth.auth_service
+    token, user = token_user
+    assert (await auth_service.read_token(token, user_manager)).id == user.id
+
+    async def fail(user_id):
+        raise AssertionError("loaded a cached user")
+
+    monkeypatch.setattr(user_manager, "get", fail)
+
+    assert (await auth_service.read_token(token, user_manager)).id == user.id
+
+
+@pytest.mark.anyio
+async def test_update_invalidates(app, user_manager, token_user):
+    auth_service, token_cache = app.state.auth.auth_service, app.state.auth.token_cache
+    token, user = token_user
+    await auth_service.read_token(token, user_manager)
+    new_username = usernames(1)[0]
+
+    await user_manager.update(user.id, UserUpdate(username=new_username))
+
+    assert token_cache.get(token) is None
+    read = await auth_service.read_token(token, user_manager)
+    assert read.username == new_username
+
+
+@pytest.mark.anyio
+async def test_delete_invalidates(app, user_manager, token_user):
+    auth_service, token_cache = app.state.auth.auth_service, app.state.auth.token_cache
+    token, user = token_user
+    await auth_service.read_token(token, user_manager)
+
+    await user_manager.delete(user.id)
+
+    assert token_cache.get(token) is None
+    assert await auth_service.read_token(token, user_manager) is None
+
+
+@pytest.mark.anyio
+async def test_update_during_read_token_is_not_cached(
+    app, user_manager, token_user, monkeypatch
+):
+    auth_service, token_cache = app.state.auth.auth_service, app.state.auth.token_cache
+    token, user = token_user
+    get = user_manager.get
+
+    async def get_then_update(user_id):
+        # Another request updates the user after it was read.
+        loaded = await get(user_id)
+        token_cache.invalidate_user(user_id)
+        return loaded
+
+    monkeypatch.setattr(user_manager, "get", get_then_update)
+
+    assert (await auth_service.read_token(token, user_manager)).id == user.id
+    assert token_cache.get(token) is None
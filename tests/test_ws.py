@@ -0,0 +1,157 @@
+import asyncio
+import importlib
+import json
+
+import pytest
+
+from engine.auth.repos import RoleRepository, UserRepository
+from engine.auth.schemas.schemes import UserUpdate
+from engine.auth.services.auth_service import AuthService
+from engine.auth.services.user_manager import UserManager
+from engine.db import write_session_maker
+from .conftest import usernames
+
+pytestmark = pytest.mark.anyio
+
+# engine.ws exports the APIRouter under the module's name.
+ws_router = importlib.import_module("engine.ws.router")
+
+
+class Socket:
+    """Client side of a websocket, driven through the ASGI interface."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+        self.inbox: asyncio.Queue = asyncio.Queue()
+        self.outbox: asyncio.Queue = asyncio.Queue()
+        self.task = None
+
+    async def connect(self, token: str) -> None:
+        scope = {
+            "type": "websocket",
+            "asgi": {"version": "3.0"},
+            "scheme": "ws",
+            "path": "/ws",
+            "raw_path": b"/ws",
+            "root_path": "",
+            "query_string": b"",
+            "headers": [],
+            "client": ("test", 0),
+            "server": ("test", 80),
+            "subprotocols": [],
+        }
+        self.task = asyncio.create_task(
+            self.app(scope, self.outbox.get, self.inbox.put)
+        )
+        await self.outbox.put({"type": "websocket.connect"})
+        assert (await self.receive())["type"] == "websocket.accept"
+        await self.send({"token": token})
+
+    async def send(self, data) -> None:
+        await self.outbox.put({"type": "websocket.receive", "text": json.dumps(data)})
+
+    async def receive(self, timeout: float = 2) -> dict:
+        return await asyncio.wait_for(self.inbox.get(), timeout)
+
+    async def assert_open(self) -> None:
+        with pytest.raises(asyncio.TimeoutError):
+            await self.receive(0.2)
+
+    async def disconnect(self) -> None:
+        await self.outbox.put({"type": "websocket.disconnect", "code": 1000})
+        await asyncio.wait_for(self.task, 2)
+
+
+@pytest.fixture
+async def connect(app):
+    sockets = []
+
+    async def connect(token: str) -> Socket:
+        socket = Socket(app)
+        sockets.append(socket)
+        await socket.connect(token)
+        return socket
+
+    yield connect
+    for socket in sockets:
+        await socket.disconnect()
+
+
+@pytest.fixture
+def check_interval(monkeypatch):
+    def set_interval(seconds: float) -> None:
+        monkeypatch.setattr(ws_router, "WS_TOKEN_CHECK_INTERVAL", seconds)
+
+    return set_interval
+
+
+async def write_token(app, user, lifetime_seconds=None) -> str:
+    auth_service = app.state.auth.auth_service
+    if lifetime_seconds is not None:
+        auth_service = AuthService("", lifetime_seconds, keys=auth_service.keys)
+    return await auth_service.write_token(user)
+
+
+async def revoke(app, user_id: int) -> None:
+    container = app.state.auth
+    async with write_session_maker() as session:
+        user_manager = UserManager(
+            UserRepository(session),
+            RoleRepository(session),
+            container.password_helper,
+            container.token_cache,
+        )
+        await user_manager.update(user_id, UserUpdate(password="changed"))
+
+
+async def assert_policy_close(socket: Socket, timeout: float = 2) -> None:
+    message = await socket.receive(timeout)
+    assert message == {"type": "websocket.close", "code": 1008, "reason": ""}
+
+
+async def test_idle_socket_closes_on_revocation(
+    app, connect, create_users, check_interval
+):
+    check_interval(0.05)
+    (user,) = await create_users(usernames(1))
+    socket = await connect(await write_token(app, user))
+    await socket.assert_open()
+
+    await revoke(app, user.id)
+
+    await assert_policy_close(socket)
+
+
+async def test_idle_socket_closes_on_expiry(app, connect, create_users, check_interval):
+    check_interval(3600)
+    (user,) = await create_users(usernames(1))
+    # exp is truncated to whole seconds, the token is valid for at least one.
+    socket = await connect(await write_token(app, user, lifetime_seconds=2))
+    await socket.assert_open()
+
+    await assert_policy_close(socket, timeout=3)
+
+
+async def test_revoked_socket_gets_no_frames(
+    app, client, admin_headers, connect, create_users, check_interval
+):
+    # Only the send path may notice, the timer does not run during the test.
+    check_interval(3600)
+    owner, camera = await create_users(usernames(2))
+    response = await client.post(
+        "/cameras",
+        json={"owner_id": owner.id, "camera_id": camera.id},
+        headers=admin_headers,
+    )
+    assert response.status_code == 200
+    owner_socket = await connect(await write_token(app, owner))
+    camera_socket = await connect(await write_token(app, camera))
+
+    await camera_socket.send({"data": "frame"})
+    message = await owner_socket.receive()
+    assert json.loads(message["text"]) == {"from": camera.id, "data": "frame"}
+
+    await revoke(app, owner.id)
+    await camera_socket.send({"data": "frame"})
+
+    await assert_policy_close(owner_socket)